@@ -1,33 +1,63 @@
 import os
+import logging
+from importlib import import_module
 from dotenv import load_dotenv
 from flask import Flask
-from flask_migrate import Migrate
-from models.db import db
-import models
-from routes.auth import auth_bp
-from routes.projects import projects_bp
-from routes.project_member import project_member_bp
-from routes.item import item_bp
-from routes.board_column import column_bp
-from routes.user import user_bp
-from routes.teams import teams_bp
-from routes.notification import notification_bp
-from routes.reports import reports_bp
-from routes.admin import admin_bp
-from flask_cors import CORS
-from flask import request
-from flask_jwt_extended import JWTManager
-import logging
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+# Blueprints are imported inside create_app() so that `import app` stays cheap
+# and free of side effects; each entry is (module, blueprint attribute, options).
+BLUEPRINTS = [
+    ('routes.auth', 'auth_bp', {}),
+    ('routes.projects', 'projects_bp', {}),
+    ('routes.project_member', 'project_member_bp', {}),
+    ('routes.item', 'item_bp', {'url_prefix': '/items'}),
+    ('routes.board_column', 'column_bp', {}),
+    ('routes.user', 'user_bp', {}),
+    ('routes.teams', 'teams_bp', {}),
+    ('routes.notification', 'notification_bp', {}),
+    ('routes.reports', 'reports_bp', {}),
+    ('routes.admin', 'admin_bp', {}),
+    ('routes.metrics', 'metrics_bp', {}),
+]
+
+def register_blueprints(app):
+    for module_name, attr, options in BLUEPRINTS:
+        blueprint = getattr(import_module(module_name), attr)
+        app.register_blueprint(blueprint, **options)
 
-load_dotenv()
+def init_migrations(app, db):
+    # Flask-Migrate pulls in alembic, which dominates cold start; it is only
+    # needed by the `flask db ...` commands, so skip it for gunicorn workers.
+    if os.environ.get('FLASK_RUN_FROM_CLI'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
-app = None # Placeholder
+def init_logging(app):
+    # `python app.py`, a gunicorn --log-config or an embedding app may have
+    # configured logging already; otherwise INFO and up go to stderr.
+    app.config.setdefault('LOG_LEVEL', os.environ.get('LOG_LEVEL', 'INFO'))
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=app.config['LOG_LEVEL'], format='%(asctime)s %(levelname)s %(name)s %(message)s')
 
 def create_app(test_config=None):
+    load_dotenv()
+    from flask_cors import CORS
+    from flask_jwt_extended import JWTManager
+    from sqlalchemy.exc import DBAPIError
+    from models.db import db
+    from services.change_feed import change_feed
+    from services.jobs import jobs
+    from services import principal
+    from services.credentials import credentials
+    from services.metrics import request_metrics
+    from services.profiling import request_profiler
+    from services.replicas import replicas
+    from services.roles import role_catalog
+    from services.sql_instrumentation import sql_instrumentation
+    import models  # noqa: F401  registers every model on db.metadata
+
     app = Flask(__name__)
-    
+
     # Default config
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('SQLALCHEMY_DATABASE_URI')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -40,35 +70,56 @@ def create_app(test_config=None):
     if test_config:
         app.config.update(test_config)
 
+    init_logging(app)
+
     CORS(app, resources={r"/*": {"origins": os.environ.get('CORS_ORIGINS', '*')}}, allow_headers="*", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
 
-    # Register blueprints
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(projects_bp)
-    app.register_blueprint(project_member_bp)
-    app.register_blueprint(item_bp, url_prefix='/items')
-    app.register_blueprint(column_bp)
-    app.register_blueprint(user_bp)
-    app.register_blueprint(teams_bp)
-    app.register_blueprint(notification_bp)
-    app.register_blueprint(reports_bp)
-    app.register_blueprint(admin_bp)
+    register_blueprints(app)
 
+    request_metrics.init_app(app)
     db.init_app(app)
-    Migrate(app, db)
-    JWTManager(app)
-    
+    replicas.init_app(app)
+    role_catalog.init_app(app)
+    change_feed.init_app(app)
+    init_migrations(app, db)
+    principal.init_app(app, JWTManager(app))
+    credentials.init_app(app)
+    jobs.init_app(app)
+    sql_instrumentation.init_app(app)
+    request_profiler.init_app(app)
+
+    from services.analytics import analytics_cli
+    from services.bulk_import import import_cli
+    from services.change_feed import changes_cli
+    from services.jobs import jobs_cli
+    from services.ranking import ranks_cli
+    from services.roles import roles_cli
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(import_cli)
+    app.cli.add_command(changes_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(principal.admin_cli)
+    app.cli.add_command(ranks_cli)
+    app.cli.add_command(roles_cli)
+
     @app.route('/')
     def index():
         return 'Cumin Dashboard Backend is running!'
-        
+
     with app.app_context():
         db.create_all()
-        
-    return app
+        try:
+            role_catalog.load()
+        except DBAPIError:
+            # Columns added since the database was created are missing until
+            # `flask db upgrade` runs; the catalog then loads on first use.
+            db.session.rollback()
+            logging.getLogger(__name__).warning('Role catalog not loaded; run `flask db upgrade`.')
+    jobs.recover(app)
 
-# Main entry point
-app = create_app()
+    return app
 
+# Entry points: `flask --app app run`, `gunicorn "app:create_app()"`, or `python app.py`.
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
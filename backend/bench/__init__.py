@@ -0,0 +1 @@
+"""Synthetic data generation and load-test replay; see `python -m bench --help`."""
@@ -0,0 +1,103 @@
+import argparse
+import json
+import logging
+import sys
+from dataclasses import replace
+from bench.seed import BENCH_PASSWORD, SCALES, bench_email, bench_user_ids, seed_org
+from bench.workload import ClientTarget, HttpTarget, compare, run_workload
+
+def _app():
+    from app import create_app
+    return create_app()
+
+def seed_command(args):
+    spec = SCALES[args.scale]
+    overrides = {k: getattr(args, k) for k in ('users', 'teams', 'projects', 'items', 'activity_logs')
+                 if getattr(args, k) is not None}
+    spec = replace(spec, **overrides)
+    print(f'Seeding {spec}')
+    with _app().app_context():
+        result = seed_org(spec, seed=args.seed, batch_size=args.batch_size)
+    print(json.dumps(result))
+
+def run_command(args):
+    app = None if args.url else _app()
+    if app is not None:
+        with app.app_context():
+            user_ids = bench_user_ids(limit=args.users)
+    else:
+        user_ids = range(args.first_user_id, args.first_user_id + args.users)
+    emails = [bench_email(uid) for uid in user_ids]
+    if not emails:
+        sys.exit('No benchmark users found; run `python -m bench seed` first.')
+    target = HttpTarget(args.url) if args.url else ClientTarget(app)
+    result = run_workload(target, emails, BENCH_PASSWORD, duration=args.duration, requests=args.requests,
+                          concurrency=args.concurrency, seed=args.seed, read_only=args.read_only)
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    if args.baseline:
+        _report(_load(args.baseline), result, args)
+
+def compare_command(args):
+    _report(_load(args.baseline), _load(args.current), args)
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def _report(baseline, current, args):
+    regressions = compare(baseline, current, metric=args.metric, tolerance=args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r['endpoint']}: {r['metric']} {r['baseline']} -> {r['current']} ms (+{r['change']:.0%})",
+              file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print(f'No {args.metric} regressions beyond {args.tolerance:.0%}.', file=sys.stderr)
+
+def _comparison_options(parser):
+    parser.add_argument('--metric', default='p95_ms')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown (default 0.25).')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Benchmark data generation and load replay.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help='Bulk-insert a synthetic organisation into SQLALCHEMY_DATABASE_URI.')
+    seed.add_argument('--scale', choices=sorted(SCALES), default='tiny')
+    for name in ('users', 'teams', 'projects', 'items', 'activity-logs'):
+        seed.add_argument(f'--{name}', type=int, default=None)
+    seed.add_argument('--seed', type=int, default=0)
+    seed.add_argument('--batch-size', type=int, default=10_000)
+    seed.set_defaults(func=seed_command)
+
+    run = commands.add_parser('run', help='Replay a mixed workload and print per-endpoint percentiles as JSON.')
+    run.add_argument('--url', help='Base URL of a running server; defaults to the in-process test client.')
+    run.add_argument('--first-user-id', type=int, default=2, help='First benchmark user id (with --url).')
+    run.add_argument('--users', type=int, default=50, help='Distinct benchmark users to log in as.')
+    run.add_argument('--duration', type=float, default=None, help='Seconds to run.')
+    run.add_argument('--requests', type=int, default=None, help='Total requests to issue.')
+    run.add_argument('--concurrency', type=int, default=4)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--read-only', action='store_true')
+    run.add_argument('--output', help='Write the JSON results to this file (e.g. a new baseline).')
+    run.add_argument('--baseline', help='Compare against a previous results file; exit 1 on regressions.')
+    _comparison_options(run)
+    run.set_defaults(func=run_command)
+
+    cmp = commands.add_parser('compare', help='Compare two results files; exit 1 on regressions.')
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    _comparison_options(cmp)
+    cmp.set_defaults(func=compare_command)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run' and not args.duration and not args.requests:
+        args.duration = 30
+    logging.basicConfig(level=logging.WARNING)
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
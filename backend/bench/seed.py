@@ -0,0 +1,191 @@
+"""Bulk synthetic organisation generator for benchmarks.
+
+Rows are generated lazily with pre-reserved primary keys and written by
+`services.bulk_import.BulkWriter` (COPY on PostgreSQL, executemany batches
+elsewhere), so relationships are derived from id arithmetic instead of
+lookups and nothing is held in memory beyond one batch. Every seeded user
+shares a single precomputed password hash.
+"""
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import select, text
+from werkzeug.security import generate_password_hash
+from models.db import db
+from models.activity_log import ActivityLog
+from models.board_column import BoardColumn
+from models.item import Item
+from models.project import Project
+from models.project_member import ProjectMember
+from models.role import Role
+from models.team import Team
+from models.team_member import TeamMember
+from models.user import User
+from services.bulk_import import BulkWriter
+
+BENCH_PASSWORD = 'benchpass'
+STATUSES = ('todo', 'inprogress', 'inreview', 'done')
+COLUMN_NAMES = ('To Do', 'In Progress', 'In Review', 'Done')
+TYPES = ('task', 'task', 'task', 'bug', 'feature', 'epic')
+PRIORITIES = ('Low', 'Medium', 'High', 'Critical', None)
+ACTIONS = ('updated', 'updated', 'updated', 'commented', 'created')
+
+@dataclass(frozen=True)
+class OrgSpec:
+    users: int
+    teams: int
+    projects: int
+    items: int
+    activity_logs: int
+
+SCALES = {
+    'tiny': OrgSpec(users=50, teams=5, projects=10, items=500, activity_logs=2_000),
+    'small': OrgSpec(users=1_000, teams=100, projects=500, items=100_000, activity_logs=500_000),
+    'medium': OrgSpec(users=5_000, teams=500, projects=2_500, items=500_000, activity_logs=2_500_000),
+    'large': OrgSpec(users=10_000, teams=1_000, projects=5_000, items=2_000_000, activity_logs=10_000_000),
+}
+
+def bench_email(n):
+    return f'user{n}@bench.example.com'
+
+def _roles():
+    roles = {r.name: r.id for r in Role.query.all()}
+    if 'Project Owner' not in roles:
+        from generate_demo_data import seed_roles_and_permissions
+        roles = {name: role.id for name, role in seed_roles_and_permissions().items()}
+    return roles
+
+def seed_org(spec, seed=0, batch_size=10_000, log=print):
+    """Append one synthetic organisation of `spec` size to the current database."""
+    if spec.users < spec.teams or (spec.items and not spec.projects):
+        raise ValueError('A synthetic org needs at least one user per team and a project for its items')
+    rng = random.Random(seed)
+    roles = _roles()
+    if not User.query.filter_by(email='admin@example.com').first():
+        db.session.add(User(username='admin', email='admin@example.com', password_hash=generate_password_hash(BENCH_PASSWORD),
+                            firm_role_id=roles['Firm Admin']))
+        db.session.commit()
+    now = datetime.utcnow().replace(microsecond=0)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    writer = BulkWriter(db.session, batch_size)
+    user0, team0 = writer.reserve_ids(User, spec.users), writer.reserve_ids(Team, spec.teams)
+    project0 = writer.reserve_ids(Project, spec.projects)
+    column0 = writer.reserve_ids(BoardColumn, spec.projects * len(STATUSES))
+    item0, log0 = writer.reserve_ids(Item, spec.items), writer.reserve_ids(ActivityLog, spec.activity_logs)
+
+    # Users are split round-robin into teams; the team's first user manages it
+    # and owns the team's projects, the other members contribute to them.
+    def team_users(t):
+        return range(user0 + t, user0 + spec.users, spec.teams)
+
+    def project_team(p):
+        return p % spec.teams
+
+    started = time.perf_counter()
+
+    def step(name, model, rows):
+        if db.engine.dialect.name == 'sqlite':
+            # Seeding is restartable, so skip fsyncs (must run outside a transaction).
+            db.session.execute(text('PRAGMA synchronous = OFF'))
+        count = writer.write(model, rows)
+        db.session.commit()
+        log(f'{name}: {count} rows ({time.perf_counter() - started:.1f}s)')
+
+    step('users', User, ({
+        'id': user0 + n,
+        'username': f'bench{user0 + n}',
+        'email': bench_email(user0 + n),
+        'password_hash': password_hash,
+        'created_at': now,
+        'updated_at': now,
+    } for n in range(spec.users)))
+
+    step('teams', Team, ({
+        'id': team0 + t,
+        'name': f'Bench Team {team0 + t}',
+        'description': 'Synthetic benchmark team',
+        'manager_id': user0 + t,
+        'created_at': now,
+        'updated_at': now,
+    } for t in range(spec.teams)))
+
+    step('team members', TeamMember, ({
+        'team_id': team0 + t,
+        'user_id': u,
+        'role_id': roles['Team Manager'] if u == user0 + t else roles['Team Member'],
+    } for t in range(spec.teams) for u in team_users(t)))
+
+    step('projects', Project, ({
+        'id': project0 + p,
+        'name': f'Bench Project {project0 + p}',
+        'description': 'Synthetic benchmark project',
+        'owner_id': user0 + project_team(p),
+        'owner_team_id': team0 + project_team(p),
+        'created_at': now,
+        'updated_at': now,
+    } for p in range(spec.projects)))
+
+    step('board columns', BoardColumn, ({
+        'id': column0 + p * len(STATUSES) + i,
+        'name': COLUMN_NAMES[i],
+        'project_id': project0 + p,
+        'order': i,
+        'created_at': now,
+        'updated_at': now,
+    } for p in range(spec.projects) for i in range(len(STATUSES))))
+
+    step('project members', ProjectMember, ({
+        'project_id': project0 + p,
+        'user_id': u,
+        'role_id': roles['Project Owner'] if u == user0 + project_team(p) else roles['Project Contributor'],
+    } for p in range(spec.projects) for u in team_users(project_team(p))))
+
+    def items():
+        for n in range(spec.items):
+            p = rng.randrange(spec.projects)
+            members = team_users(project_team(p))
+            status = rng.randrange(len(STATUSES))
+            created = now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+            yield {
+                'id': item0 + n,
+                'title': f'Synthetic item {item0 + n}',
+                'description': 'Generated for load testing',
+                'type': rng.choice(TYPES),
+                'status': STATUSES[status],
+                'column_id': column0 + p * len(STATUSES) + status,
+                'project_id': project0 + p,
+                'reporter_id': rng.choice(members),
+                'assignee_id': rng.choice(members) if rng.random() < 0.8 else None,
+                'priority': rng.choice(PRIORITIES),
+                'due_date': (created + timedelta(days=rng.randrange(1, 60))).date(),
+                'created_at': created,
+                'updated_at': created + timedelta(minutes=rng.randrange(30 * 24 * 60)),
+            }
+
+    step('items', Item, items())
+
+    def activity_logs():
+        for n in range(spec.activity_logs):
+            action = rng.choice(ACTIONS)
+            yield {
+                'id': log0 + n,
+                'item_id': item0 + rng.randrange(spec.items),
+                'user_id': user0 + rng.randrange(spec.users),
+                'action': action,
+                'details': f"status: {rng.choice(STATUSES)} -> {rng.choice(STATUSES)}" if action == 'updated' else None,
+                'created_at': now - timedelta(minutes=rng.randrange(365 * 24 * 60)),
+            }
+
+    if spec.items:
+        step('activity logs', ActivityLog, activity_logs())
+
+    writer.sync_sequences([User, Team, Project, BoardColumn, Item, ActivityLog])
+    db.session.commit()
+    return {'first_user_id': user0, 'users': spec.users, 'seconds': round(time.perf_counter() - started, 1)}
+
+def bench_user_ids(limit=None):
+    query = select(User.id).where(User.email.like('%@bench.example.com')).order_by(User.id)
+    if limit:
+        query = query.limit(limit)
+    return list(db.session.scalars(query))
@@ -0,0 +1,250 @@
+"""Mixed read/write workload replay with per-endpoint latency percentiles."""
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+# (name, weight, write); names are what the results are keyed by.
+OPERATIONS = [
+    ('GET /projects', 15, False),
+    ('GET /items/projects/<id>/items', 20, False),
+    ('GET /items/<id>', 20, False),
+    ('GET /items/my-tasks', 10, False),
+    ('GET /projects/<id>/columns', 5, False),
+    ('GET /notifications', 8, False),
+    ('GET /dashboard/stats', 5, False),
+    ('GET /teams/my-teams', 5, False),
+    ('PATCH /items/<id>', 6, True),
+    ('POST /items/projects/<id>/items', 4, True),
+    ('POST /items/<id>/comments', 2, True),
+]
+STATUSES = ('todo', 'inprogress', 'inreview', 'done')
+
+class ClientTarget:
+    """Replays requests in-process through the Flask test client (one client per thread)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def describe(self):
+        return 'flask-test-client'
+
+    def request(self, method, path, headers=None, json=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, headers=headers, json=json)
+        return response.status_code, response.get_json(silent=True)
+
+class HttpTarget:
+    """Replays requests against a running server, e.g. `gunicorn "app:create_app()"`."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def describe(self):
+        return self.base_url
+
+    def request(self, method, path, headers=None, json=None):
+        data = None
+        headers = dict(headers or {})
+        if json is not None:
+            data = _json_dumps(json)
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, _json_loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, _json_loads(e.read())
+
+def _json_dumps(value):
+    return json.dumps(value).encode()
+
+def _json_loads(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+class VirtualUser:
+    def __init__(self, target, email, password, rng):
+        self.target = target
+        self.rng = rng
+        status, body = target.request('POST', '/login', json={'email': email, 'password': password})
+        if status != 200:
+            raise RuntimeError(f'Login failed for {email}: {status}')
+        self.headers = {'Authorization': f"Bearer {body['token']}"}
+        self.user_id = body['user']['id']
+        status, body = target.request('GET', '/projects', headers=self.headers)
+        self.project_ids = [p['id'] for p in (body or {}).get('projects', [])]
+        self.columns = {}
+        self.items = {}
+
+    def _project(self):
+        return self.rng.choice(self.project_ids)
+
+    def _columns(self, project_id):
+        if project_id not in self.columns:
+            _, body = self.target.request('GET', f'/projects/{project_id}/columns', headers=self.headers)
+            self.columns[project_id] = [c['id'] for c in (body or {}).get('columns', [])]
+        return self.columns[project_id]
+
+    def _item(self):
+        project_id = self._project()
+        if project_id not in self.items:
+            _, body = self.target.request('GET', f'/items/projects/{project_id}/items', headers=self.headers)
+            self.items[project_id] = [i['id'] for i in (body or {}).get('items', [])]
+        return self.rng.choice(self.items[project_id]) if self.items[project_id] else None
+
+    def build(self, name):
+        """Return (method, path, json) for operation `name`, or None if it cannot run for this user."""
+        if not self.project_ids and '<id>' in name:
+            return None
+        if name == 'GET /projects':
+            return 'GET', '/projects', None
+        if name == 'GET /items/my-tasks':
+            return 'GET', '/items/my-tasks', None
+        if name == 'GET /notifications':
+            return 'GET', '/notifications', None
+        if name == 'GET /dashboard/stats':
+            return 'GET', '/dashboard/stats', None
+        if name == 'GET /teams/my-teams':
+            return 'GET', '/teams/my-teams', None
+        if name == 'GET /items/projects/<id>/items':
+            return 'GET', f'/items/projects/{self._project()}/items', None
+        if name == 'GET /projects/<id>/columns':
+            return 'GET', f'/projects/{self._project()}/columns', None
+        if name == 'POST /items/projects/<id>/items':
+            project_id = self._project()
+            columns = self._columns(project_id)
+            if not columns:
+                return None
+            body = {'title': f'Bench item {self.rng.randrange(10 ** 9)}', 'type': 'task', 'status': 'todo',
+                    'column_id': columns[0], 'assignee_id': self.user_id}
+            return 'POST', f'/items/projects/{project_id}/items', body
+        item_id = self._item()
+        if item_id is None:
+            return None
+        if name == 'GET /items/<id>':
+            return 'GET', f'/items/{item_id}', None
+        if name == 'PATCH /items/<id>':
+            return 'PATCH', f'/items/{item_id}', {'status': self.rng.choice(STATUSES)}
+        if name == 'POST /items/<id>/comments':
+            return 'POST', f'/items/{item_id}/comments', {'content': 'Benchmark comment'}
+        raise KeyError(name)
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return round(ordered[rank], 3)
+
+def summarize(samples, wall_seconds):
+    by_name = {}
+    for name, elapsed_ms, ok in samples:
+        by_name.setdefault(name, []).append((elapsed_ms, ok))
+    endpoints = {}
+    for name, rows in sorted(by_name.items()):
+        latencies = sorted(ms for ms, _ in rows)
+        endpoints[name] = {
+            'count': len(rows),
+            'errors': sum(1 for _, ok in rows if not ok),
+            'throughput_rps': round(len(rows) / wall_seconds, 2) if wall_seconds else None,
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'p50_ms': _percentile(latencies, 50),
+            'p90_ms': _percentile(latencies, 90),
+            'p95_ms': _percentile(latencies, 95),
+            'p99_ms': _percentile(latencies, 99),
+            'max_ms': round(latencies[-1], 3),
+        }
+    latencies = sorted(ms for _, ms, _ in samples)
+    total = {
+        'count': len(samples),
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'throughput_rps': round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        'p50_ms': _percentile(latencies, 50),
+        'p95_ms': _percentile(latencies, 95),
+        'p99_ms': _percentile(latencies, 99),
+    }
+    return {'endpoints': endpoints, 'total': total}
+
+def run_workload(target, emails, password, duration=None, requests=None, concurrency=4, seed=0,
+                 read_only=False, operations=OPERATIONS):
+    """Replay a weighted mix of operations from `concurrency` threads.
+
+    Each thread logs in as one of `emails` and runs until `duration` seconds
+    have passed or `requests` requests have been issued in total.
+    """
+    if not duration and not requests:
+        raise ValueError('Pass a duration or a number of requests')
+    operations = [op for op in operations if not (read_only and op[2])]
+    names = [name for name, _, _ in operations]
+    weights = [weight for _, weight, _ in operations]
+    users = [VirtualUser(target, emails[i % len(emails)], password, random.Random(seed + i)) for i in range(concurrency)]
+    remaining = [requests]
+    lock = threading.Lock()
+    samples = [[] for _ in users]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take():
+        if requests is None:
+            return True
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(user, out):
+        while (deadline is None or time.perf_counter() < deadline) and take():
+            name = user.rng.choices(names, weights)[0]
+            call = user.build(name)
+            if call is None:
+                continue
+            method, path, body = call
+            started = time.perf_counter()
+            status, _ = user.target.request(method, path, headers=user.headers, json=body)
+            out.append((name, (time.perf_counter() - started) * 1000, status < 400))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(user, out)) for user, out in zip(users, samples)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall_seconds = time.perf_counter() - started
+    result = summarize([s for out in samples for s in out], wall_seconds)
+    result['meta'] = {
+        'target': target.describe(),
+        'started_at': datetime.utcnow().isoformat(),
+        'duration_s': round(wall_seconds, 3),
+        'concurrency': concurrency,
+        'users': len(set(emails[:concurrency])),
+        'read_only': read_only,
+        'seed': seed,
+    }
+    return result
+
+def compare(baseline, current, metric='p95_ms', tolerance=0.25, min_count=20):
+    """List endpoints whose `metric` regressed by more than `tolerance` against `baseline`."""
+    regressions = []
+    for name, stats in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if not before or stats['count'] < min_count or before['count'] < min_count:
+            continue
+        if before[metric] and stats[metric] > before[metric] * (1 + tolerance):
+            regressions.append({
+                'endpoint': name,
+                'metric': metric,
+                'baseline': before[metric],
+                'current': stats[metric],
+                'change': round(stats[metric] / before[metric] - 1, 3),
+            })
+    return regressions
@@ -1,13 +1,14 @@
-from flask import request, jsonify
+from flask import current_app, request, jsonify, send_file
 from models.user import User
 from models.team import Team
 from models.team_member import TeamMember
 from models.project import Project
 from models.project_member import ProjectMember
-from models.role import Role
+from services.roles import role_catalog
 from models.db import db
 from models.project_member import add_team_as_project_visitors, remove_all_project_visitors
 from controllers.rbac import is_admin
+from services.profiling import list_profiles, profile_path
 from flask_jwt_extended import get_jwt_identity
 
 def check_admin():
@@ -24,7 +25,7 @@ def add_user_to_team(user_id, team_id):
     if TeamMember.query.filter_by(user_id=user_id, team_id=team_id).first():
         return jsonify({'error': 'User already in team'}), 409
     # Assign default team role if not provided
-    team_role = Role.query.filter_by(name='Team Member', scope='team').first()
+    team_role = role_catalog.find('Team Member', 'team')
     if not team_role:
         return jsonify({'error': 'Default team role not found'}), 400
     tm = TeamMember(user_id=user_id, team_id=team_id, role_id=team_role.id)
@@ -50,7 +51,7 @@ def add_user_to_project(user_id, project_id):
     if ProjectMember.query.filter_by(user_id=user_id, project_id=project_id).first():
         return jsonify({'error': 'User already in project'}), 409
     # Assign default project role if not provided
-    project_role = Role.query.filter_by(name='Project Contributor', scope='project').first()
+    project_role = role_catalog.find('Project Contributor', 'project')
     if not project_role:
         return jsonify({'error': 'Default project role not found'}), 400
     pm = ProjectMember(user_id=user_id, project_id=project_id, role_id=project_role.id)
@@ -74,7 +75,7 @@ def change_user_team_role(user_id, team_id):
     data = request.get_json()
     role_id = data.get('role_id')
     tm = TeamMember.query.filter_by(user_id=user_id, team_id=team_id).first()
-    role = Role.query.get(role_id)
+    role = role_catalog.get(role_id)
     if not tm or not role or role.scope != 'team':
         return jsonify({'error': 'Invalid membership or role'}), 400
     tm.role_id = role_id
@@ -87,7 +88,7 @@ def change_user_project_role(user_id, project_id):
     data = request.get_json()
     role_id = data.get('role_id')
     pm = ProjectMember.query.filter_by(user_id=user_id, project_id=project_id).first()
-    role = Role.query.get(role_id)
+    role = role_catalog.get(role_id)
     if not pm or not role or role.scope != 'project':
         return jsonify({'error': 'Invalid membership or role'}), 400
     pm.role_id = role_id
@@ -101,7 +102,7 @@ def list_team_members(team_id):
     result = []
     for m in members:
         user = User.query.get(m.user_id)
-        role = Role.query.get(m.role_id) if m.role_id else None
+        role = role_catalog.get(m.role_id)
         result.append({
             'user_id': m.user_id,
             'username': user.username if user else None,
@@ -117,7 +118,7 @@ def list_project_members(project_id):
     result = []
     for m in members:
         user = User.query.get(m.user_id)
-        role = Role.query.get(m.role_id) if m.role_id else None
+        role = role_catalog.get(m.role_id)
         result.append({
             'user_id': m.user_id,
             'username': user.username if user else None,
@@ -154,3 +155,19 @@ def remove_visitors_from_project(project_id):
         return jsonify({'message': f'All visitors removed', 'visitors_removed': removed}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
+
+def get_profiles():
+    if not check_admin():
+        return jsonify({'error': 'Forbidden: Admins only'}), 403
+    return jsonify({
+        'enabled': current_app.config['PROFILE_ENABLED'],
+        'profiles': list_profiles(current_app.config['PROFILE_DIR']),
+    }), 200
+
+def download_profile(profile_id):
+    if not check_admin():
+        return jsonify({'error': 'Forbidden: Admins only'}), 403
+    path = profile_path(current_app.config['PROFILE_DIR'], profile_id)
+    if not path:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=f'{profile_id}.prof')
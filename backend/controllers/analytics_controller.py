@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from flask import request, jsonify
+from models.db import db
+from models.item_status_fact import ItemStatusFact
+from models.project import Project
+from models.project_daily_snapshot import ProjectDailySnapshot
+from controllers.rbac import require_project_permission
+from services.jobs import jobs
+import services.analytics  # noqa: F401  registers the analytics_snapshot job
+
+MAX_DAYS = 365
+MAX_WEEKS = 52
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+def _hours_summary(values):
+    return {
+        'avg': round(sum(values) / len(values), 2) if values else None,
+        'p50': round(_percentile(values, 50), 2) if values else None,
+        'p85': round(_percentile(values, 85), 2) if values else None,
+        'max': round(max(values), 2) if values else None,
+    }
+
+def _window(name, default, maximum):
+    # A positive int no larger than `maximum`, or None; the bound keeps requests off the full history.
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        return None
+    return value if 1 <= value <= maximum else None
+
+def _bad_window(name, maximum):
+    return jsonify({'error': f'{name} must be an integer from 1 to {maximum}'}), 400
+
+@require_project_permission('manage_project')
+def create_snapshot(project_id):
+    if not Project.query.get(project_id):
+        return jsonify({'error': 'Project not found'}), 404
+    job = jobs.enqueue('analytics_snapshot', project_ids=[project_id])
+    db.session.commit()
+    return jsonify({'job': {'id': job.id, 'status': job.status}}), 202
+
+@require_project_permission('view_tasks')
+def get_burndown(project_id):
+    days = _window('days', 30, MAX_DAYS)
+    if days is None:
+        return _bad_window('days', MAX_DAYS)
+    since = datetime.utcnow().date() - timedelta(days=days)
+    rows = ProjectDailySnapshot.query.filter(
+        ProjectDailySnapshot.project_id == project_id, ProjectDailySnapshot.day >= since
+    ).order_by(ProjectDailySnapshot.day.asc()).all()
+    return jsonify({'burndown': [{
+        'day': r.day.isoformat(),
+        'remaining': r.total - r.done,
+        'done': r.done,
+        'total': r.total,
+        'todo': r.todo,
+        'inprogress': r.inprogress,
+        'inreview': r.inreview,
+    } for r in rows]}), 200
+
+@require_project_permission('view_tasks')
+def get_velocity(project_id):
+    weeks = _window('weeks', 8, MAX_WEEKS)
+    if weeks is None:
+        return _bad_window('weeks', MAX_WEEKS)
+    today = datetime.utcnow().date()
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    done = db.session.query(ItemStatusFact.done_at).filter(
+        ItemStatusFact.project_id == project_id, ItemStatusFact.done_at >= first_week
+    )
+    counts = {first_week + timedelta(weeks=w): 0 for w in range(weeks)}
+    for (done_at,) in done:
+        week = done_at.date() - timedelta(days=done_at.weekday())
+        if week in counts:
+            counts[week] += 1
+    return jsonify({'velocity': [{'week': w.isoformat(), 'completed': n} for w, n in counts.items()]}), 200
+
+@require_project_permission('view_tasks')
+def get_cycle_time(project_id):
+    days = _window('days', 90, MAX_DAYS)
+    if days is None:
+        return _bad_window('days', MAX_DAYS)
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = db.session.query(ItemStatusFact.created_at, ItemStatusFact.started_at, ItemStatusFact.done_at).filter(
+        ItemStatusFact.project_id == project_id, ItemStatusFact.done_at >= since
+    ).all()
+    cycle = [(r.done_at - r.started_at).total_seconds() / 3600 for r in rows if r.started_at]
+    lead = [(r.done_at - r.created_at).total_seconds() / 3600 for r in rows if r.created_at]
+    return jsonify({
+        'completed': len(rows),
+        'cycle_time_hours': _hours_summary(cycle),
+        'lead_time_hours': _hours_summary(lead),
+    }), 200
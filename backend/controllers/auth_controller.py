@@ -1,8 +1,13 @@
 from flask import request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from models.db import db
 from models.user import User
 from flask_jwt_extended import create_access_token
+from services.credentials import credentials, CredentialServiceBusy, LoginRateLimited
+
+def _busy():
+    response = jsonify({'error': 'Authentication is busy, please retry'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 def register_user():
     data = request.get_json()
@@ -13,7 +18,10 @@ def register_user():
         return jsonify({'error': 'Missing required fields'}), 400
     if User.query.filter((User.username == username) | (User.email == email)).first():
         return jsonify({'error': 'User already exists'}), 409
-    password_hash = generate_password_hash(password)
+    try:
+        password_hash = credentials.hash_password(password)
+    except CredentialServiceBusy:
+        return _busy()
     user = User(username=username, email=email, password_hash=password_hash)
     db.session.add(user)
     db.session.commit()
@@ -25,9 +33,21 @@ def login_user():
     password = data.get('password')
     if not email or not password:
         return jsonify({'error': 'Missing email or password'}), 400
+    try:
+        credentials.check_login_rate(email)
+    except LoginRateLimited as e:
+        response = jsonify({'error': 'Too many login attempts'})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password_hash, password):
-        return jsonify({'error': 'Invalid credentials'}), 401
+    try:
+        if not user or not credentials.verify_password(user.password_hash, password):
+            return jsonify({'error': 'Invalid credentials'}), 401
+        if credentials.needs_rehash(user.password_hash):
+            user.password_hash = credentials.hash_password(password)
+            db.session.commit()
+    except CredentialServiceBusy:
+        return _busy()
     access_token = create_access_token(identity=str(user.id))  # Ensure identity is a string
     return jsonify({
         'message': 'Login successful',
@@ -37,4 +57,4 @@ def login_user():
             'username': user.username,
             'email': user.email
         }
-    }), 200
\ No newline at end of file
+    }), 200
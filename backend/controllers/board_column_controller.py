@@ -1,13 +1,30 @@
 from flask import request, jsonify
+from flask_jwt_extended import get_jwt_identity
 from models.db import db
 from models.board_column import BoardColumn
+from sqlalchemy.orm.exc import StaleDataError
 from controllers.rbac import require_project_permission
+from services.board import card_count, move_cards, reorder_columns
+from services.concurrency import conflict, if_match_failed, with_version
+from services.ranking import place, schedule_rebalance
+
+def _column_json(column):
+    return {'id': column.id, 'name': column.name, 'order': column.order, 'rank': column.rank, 'version': column.version}
+
+def _column_conflict(column_id):
+    column = BoardColumn.query.get(column_id)
+    if not column:
+        return jsonify({'error': 'Column not found'}), 404
+    return conflict(f'Column {column_id} was modified by someone else', column, _column_json(column))
+
+def _board_columns(project_id):
+    columns = BoardColumn.query.filter_by(project_id=project_id) \
+        .order_by(BoardColumn.rank.is_(None), BoardColumn.rank, BoardColumn.order, BoardColumn.id).all()
+    return [_column_json(c) for c in columns]
 
 @require_project_permission('view_tasks')
 def get_columns(project_id):
-    columns = BoardColumn.query.filter_by(project_id=project_id).order_by(BoardColumn.order.asc()).all()
-    result = [{'id': c.id, 'name': c.name, 'order': c.order} for c in columns]
-    return jsonify({'columns': result})
+    return jsonify({'columns': _board_columns(project_id)})
 
 @require_project_permission('manage_project')
 def create_column(project_id):
@@ -19,26 +36,78 @@ def create_column(project_id):
     column = BoardColumn(name=name, order=order, project_id=project_id)
     db.session.add(column)
     db.session.commit()
-    return jsonify({'message': 'Column created', 'column': {'id': column.id, 'name': column.name}}), 201
+    return with_version(jsonify({'message': 'Column created', 'column': _column_json(column)}), column), 201
 
 @require_project_permission('manage_project')
 def update_column(column_id):
     column = BoardColumn.query.get(column_id)
     if not column:
         return jsonify({'error': 'Column not found'}), 404
+    if if_match_failed(column):
+        return _column_conflict(column_id)
     data = request.get_json()
     if 'name' in data:
         column.name = data['name']
     if 'order' in data:
         column.order = data['order']
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return _column_conflict(column_id)
+    return with_version(jsonify({'message': 'Column updated', 'column': _column_json(column)}), column)
+
+@require_project_permission('manage_project')
+def move_column(column_id):
+    column = BoardColumn.query.get(column_id)
+    if not column:
+        return jsonify({'error': 'Column not found'}), 404
+    if if_match_failed(column):
+        return _column_conflict(column_id)
+    data = request.get_json() or {}
+    neighbours = {}
+    for key in ('after_id', 'before_id'):
+        if data.get(key) is not None:
+            neighbour = BoardColumn.query.get(data[key])
+            if not neighbour or neighbour.project_id != column.project_id or neighbour.rank is None or neighbour.id == column.id:
+                return jsonify({'error': f'{key} must be another ranked column of this project'}), 400
+            neighbours[key.replace('_id', '_rank')] = neighbour.rank
+    column.rank = place(BoardColumn, column.project_id, exclude_id=column.id, **neighbours)
+    try:
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return _column_conflict(column_id)
+    schedule_rebalance(len(column.rank), project_id=column.project_id)
     db.session.commit()
-    return jsonify({'message': 'Column updated'})
+    return with_version(jsonify({'message': 'Column moved', 'column': _column_json(column)}), column)
 
 @require_project_permission('manage_project')
 def delete_column(column_id):
     column = BoardColumn.query.get(column_id)
     if not column:
         return jsonify({'error': 'Column not found'}), 404
+    move_to = request.args.get('move_to', type=int)
+    moved = 0
+    if move_to is None:
+        count = card_count(column_id)
+        if count:
+            return jsonify({'error': f'Column has {count} items; pass move_to=<column_id> to move them', 'items': count}), 409
+    else:
+        target = BoardColumn.query.get(move_to)
+        if not target or target.project_id != column.project_id or target.id == column.id:
+            return jsonify({'error': 'move_to must be another column of this project'}), 400
+        moved = move_cards(column_id, move_to, int(get_jwt_identity()))
     db.session.delete(column)
     db.session.commit()
-    return jsonify({'message': 'Column deleted'})
\ No newline at end of file
+    return jsonify({'message': 'Column deleted', 'moved_items': moved})
+
+@require_project_permission('manage_project')
+def reorder_columns_in_project(project_id):
+    column_ids = (request.get_json() or {}).get('column_ids')
+    if not isinstance(column_ids, list) or not all(isinstance(i, int) for i in column_ids):
+        return jsonify({'error': 'column_ids must be a list of column ids'}), 400
+    if not reorder_columns(project_id, column_ids):
+        return jsonify({'error': 'column_ids must list every column of the project exactly once'}), 400
+    db.session.commit()
+    return jsonify({'message': 'Columns reordered', 'columns': _board_columns(project_id)})
\ No newline at end of file
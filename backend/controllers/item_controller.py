@@ -2,32 +2,74 @@ import logging
 from flask import request, jsonify
 from models.db import db
 from models.item import Item
+from models.board_column import BoardColumn
 from models.project import Project
 from models.user import User
 from models.activity_log import ActivityLog
+from models.activity_change import ActivityChange
 from datetime import datetime
 from controllers.rbac import require_project_permission
 from models.comment import Comment
-from sqlalchemy.orm import joinedload
-from controllers.notification_controller import create_notification
-from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert, true
+from sqlalchemy.orm.exc import StaleDataError
+from controllers.notification_controller import notify_users
+from flask_jwt_extended import current_user, get_jwt_identity
+from services import archive, deletion
+from services.concurrency import conflict, if_match_failed, with_version
+from services.jobs import jobs
+from services.ranking import place, schedule_rebalance
+from services.task_sync import InvalidSyncToken, sync_tasks
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _change_value(value):
+    return None if value is None else str(value)
+
 def log_activity(item_id, user_id, action, details=None):
+    # Written by a background job that commits together with the caller's change.
     if item_id is None:
         logger.warning("Tried to log activity with null item_id. Skipping log entry.")
         return
-    log = ActivityLog(item_id=item_id, user_id=user_id, action=action, details=details)
+    jobs.enqueue('activity_log', item_id=item_id, user_id=int(user_id), action=action, details=details,
+                 created_at=datetime.utcnow().isoformat())
+
+def log_changes(item_id, user_id, changes):
+    # changes: [(field, old, new), ...]; details keeps the legacy 'field: old -> new' text.
+    # Written directly in the caller's transaction so field history (which analytics
+    # reads) commits with the update itself, never after it.
+    details = '; '.join(f'{field}: {old} -> {new}' for field, old, new in changes)
+    changes = [(field, _change_value(old), _change_value(new)) for field, old, new in changes]
+    _write_activity(item_id, int(user_id), 'updated', details, datetime.utcnow(), changes)
+
+@jobs.task('activity_log')
+def write_activity_log(item_id, user_id, action, details, created_at):
+    _write_activity(item_id, user_id, action, details, datetime.fromisoformat(created_at))
+
+def _write_activity(item_id, user_id, action, details, created_at, changes=()):
+    log = ActivityLog(item_id=item_id, user_id=user_id, action=action, details=details, created_at=created_at)
     db.session.add(log)
-    db.session.commit()
+    if changes:
+        db.session.flush()
+        db.session.execute(insert(ActivityChange), [{
+            'activity_log_id': log.id,
+            'item_id': item_id,
+            'user_id': user_id,
+            'field': field,
+            'old_value': old,
+            'new_value': new,
+            'changed_at': created_at,
+        } for field, old, new in changes])
+
+@jobs.task('comment_notify')
+def notify_comment_participants(item_id, author_id):
+    item = Item.query.get(item_id)
+    if not item:
+        return
+    recipients = {item.assignee_id, item.reporter_id} - {None, author_id}
+    notify_users(recipients, f"New comment on task '{item.title}'")
 
 def get_recent_activity():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 401
+    user_id = current_user.id
     logs = ActivityLog.query.join(Item, ActivityLog.item_id == Item.id)
     logs = logs.filter((Item.reporter_id == user_id) | (Item.assignee_id == user_id))
     logs = logs.order_by(ActivityLog.created_at.desc()).limit(20).all()
@@ -86,43 +128,54 @@ def create_item(project_id):
         severity=severity
     )
     db.session.add(item)
-    db.session.commit()
+    db.session.flush()
+    schedule_rebalance(len(item.rank), column_id=item.column_id)
     log_activity(item.id, reporter_id, 'created', f'Task created: {title}')
     # Notify assignee if assigned (task creation)
     if assignee_id:
-        assignee = User.query.get(assignee_id)
-        if assignee:
-            create_notification(assignee_id, f"You have been assigned to task '{title}'")
-    return jsonify({'message': 'Item created', 'item': {'id': item.id, 'title': item.title}}), 201
+        notify_users([assignee_id], f"You have been assigned to task '{title}'")
+    db.session.commit()
+    return with_version(jsonify({'message': 'Item created', 'item': {'id': item.id, 'title': item.title, 'version': item.version}}), item), 201
 
 @require_project_permission('view_tasks')
 def get_items(project_id=None, **kwargs):
     item_type = request.args.get('type')
-    limit = int(request.args.get('limit', 50))
-    offset = int(request.args.get('offset', 0))
+    try:
+        limit = int(request.args.get('limit', 50))
+        offset = int(request.args.get('offset', 0))
+        column_id = int(request.args['column_id']) if request.args.get('column_id') else None
+    except ValueError:
+        return jsonify({'error': 'limit, offset and column_id must be integers'}), 400
+    archived = request.args.get('archived') in ('1', 'true')
     query = Item.query.filter_by(project_id=project_id)
+    if archived:
+        query = query.filter(Item.archived == true()).execution_options(**archive.INCLUDE_ARCHIVED)
     if item_type:
         query = query.filter_by(type=item_type)
+    if column_id is not None:
+        query = query.filter_by(column_id=column_id)
     total = query.count()
-    items = query.offset(offset).limit(limit).all()
+    order = (Item.archived_at.desc(), Item.id) if archived else (Item.column_id, Item.rank.is_(None), Item.rank, Item.id)
+    items = query.order_by(*order).offset(offset).limit(limit).all()
     result = [{
         'id': i.id,
         'title': i.title,
         'status': i.status,
+        'column_id': i.column_id,
+        'rank': i.rank,
         'assignee_id': i.assignee_id,
         'priority': i.priority,
         'due_date': i.due_date.isoformat() if i.due_date else None,
         'parent_id': i.parent_id,
-        'type': i.type
+        'type': i.type,
+        'archived_at': i.archived_at.isoformat() if i.archived_at else None,
     } for i in items]
     return jsonify({'items': result, 'total': total, 'limit': limit, 'offset': offset}), 200
 
 @require_project_permission('view_tasks')
 def get_item(item_id):
-    item = Item.query.options(
-        joinedload(Item.comments),
-        joinedload(Item.subtasks)
-    ).get(item_id)
+    # comments and subtasks are dynamic relationships, queried below; they cannot be eager loaded.
+    item = Item.query.get(item_id)
     if not item:
         return jsonify({'error': f'Item not found: {item_id}'}), 404
     assignee = User.query.get(item.assignee_id) if item.assignee_id else None
@@ -161,8 +214,9 @@ def get_item(item_id):
                 'priority': parent.priority,
                 'due_date': parent.due_date.isoformat() if parent.due_date else None
             }
-    return jsonify({'item': {
+    return with_version(jsonify({'item': {
         'id': item.id,
+        'version': item.version,
         'title': item.title,
         'description': item.description,
         'status': item.status,
@@ -180,15 +234,18 @@ def get_item(item_id):
         'comments': comments,
         'subtasks': subtasks,
         'parent_epic': parent_epic
-    }}), 200
+    }}), item), 200
 
 @require_project_permission('edit_any_task', allow_own='edit_own_task')
 def update_item(item_id):
     item = Item.query.get(item_id)
     if not item:
         return jsonify({'error': f'Item not found: {item_id}'}), 404
+    if if_match_failed(item):
+        return _item_conflict(item_id)
     data = request.get_json()
     changes = []
+    old_assignee = item.assignee_id
     allowed_status = {'todo', 'inprogress', 'done', 'inreview'}
     allowed_types = {'task', 'bug', 'epic', 'story'}
     allowed_priority = {'Low', 'Medium', 'High', 'Critical', None}
@@ -205,40 +262,62 @@ def update_item(item_id):
             old = getattr(item, field)
             new = data[field]
             if old != new:
-                changes.append(f'{field}: {old} -> {new}')
+                changes.append((field, old, new))
             setattr(item, field, new)
     if 'due_date' in data:
         old = item.due_date.isoformat() if item.due_date else None
         new = data['due_date']
         if old != new:
-            changes.append(f'due_date: {old} -> {new}')
+            changes.append(('due_date', old, new))
         item.due_date = datetime.strptime(data['due_date'], '%Y-%m-%d').date() if data['due_date'] else None
-    db.session.commit()
+    try:
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return _item_conflict(item_id)
     if changes:
-        log_activity(item.id, get_jwt_identity(), 'updated', '; '.join(changes))
-    old_assignee = item.assignee_id
-    for field in ['title', 'description', 'status', 'assignee_id', 'column_id', 'priority', 'parent_id', 'type', 'severity']:
-        if field in data:
-            if field == 'assignee_id' and data['assignee_id'] != old_assignee:
-                new_assignee = data['assignee_id']
-                if new_assignee:
-                    assignee_user = User.query.get(new_assignee)
-                    if assignee_user:
-                        create_notification(new_assignee, f"You have been assigned to task '{item.title}'")
-    return jsonify({'message': 'Item updated'}), 200
+        log_changes(item.id, get_jwt_identity(), changes)
+    if 'assignee_id' in data and data['assignee_id'] != old_assignee and data['assignee_id']:
+        notify_users([data['assignee_id']], f"You have been assigned to task '{item.title}'")
+    db.session.commit()
+    return with_version(jsonify({'message': 'Item updated', 'item': _task_json(item)}), item), 200
 
 @require_project_permission('delete_any_task', allow_own='delete_own_task')
 def delete_item(item_id):
-    item = Item.query.get(item_id)
+    item = db.session.get(Item, item_id, execution_options=archive.INCLUDE_ARCHIVED)
     if not item:
         return jsonify({'error': f'Item not found: {item_id}'}), 404
-    log_activity(item_id, get_jwt_identity(), 'deleted', 'Task deleted')
-    for log in item.activity_logs.all():
-        db.session.delete(log)
-    db.session.delete(item)
+    deletion.delete_items([item_id])
+    # The item's own log goes with it, so a subtask's deletion is logged on its parent.
+    if item.parent_id:
+        log_activity(item.parent_id, get_jwt_identity(), 'deleted', f'Subtask {item_id} deleted')
+    else:
+        logger.info('Task %s deleted by user %s', item_id, get_jwt_identity())
     db.session.commit()
     return jsonify({'message': 'Item deleted'}), 200
 
+@require_project_permission('edit_any_task', allow_own='edit_own_task')
+def archive_item(item_id):
+    item = Item.query.get(item_id)
+    if not item:
+        return jsonify({'error': f'Item not found: {item_id}'}), 404
+    count = archive.archive_item(item)
+    log_activity(item_id, get_jwt_identity(), 'archived', f'Task archived: {item.title}')
+    db.session.commit()
+    return jsonify({'message': 'Item archived', 'archived_items': count}), 200
+
+@require_project_permission('edit_any_task', allow_own='edit_own_task')
+def restore_item(item_id):
+    item = archive.get_archived(Item, item_id)
+    if not item:
+        return jsonify({'error': f'Archived item not found: {item_id}'}), 404
+    if not Project.query.get(item.project_id):
+        return jsonify({'error': 'The project is archived; restore the project instead'}), 409
+    count = archive.restore_item(item)
+    log_activity(item_id, get_jwt_identity(), 'restored', f'Task restored: {item.title}')
+    db.session.commit()
+    return jsonify({'message': 'Item restored', 'restored_items': count}), 200
+
 @require_project_permission('view_tasks')
 def get_subtasks(item_id):
     parent = Item.query.get(item_id)
@@ -280,12 +359,11 @@ def create_subtask(item_id):
         parent_id=parent.id
     )
     db.session.add(subtask)
-    db.session.commit()
+    db.session.flush()
     log_activity(subtask.id, get_jwt_identity(), 'created', f'Subtask created: {title}')
     if data.get('assignee_id'):
-        assignee = User.query.get(data.get('assignee_id'))
-        if assignee:
-            create_notification(data.get('assignee_id'), f"You have been assigned to subtask '{title}'")
+        notify_users([data.get('assignee_id')], f"You have been assigned to subtask '{title}'")
+    db.session.commit()
     return jsonify({'message': 'Subtask created', 'subtask': {'id': subtask.id, 'title': subtask.title}}), 201
 
 @require_project_permission('edit_any_task')
@@ -293,6 +371,8 @@ def update_subtask(subtask_id):
     subtask = Item.query.get(subtask_id)
     if not subtask or not subtask.parent_id:
         return jsonify({'error': 'Subtask not found'}), 404
+    if if_match_failed(subtask):
+        return _item_conflict(subtask_id)
     data = request.get_json()
     changes = []
     old_assignee = subtask.assignee_id
@@ -301,32 +381,34 @@ def update_subtask(subtask_id):
             old = getattr(subtask, field)
             new = data[field]
             if old != new:
-                changes.append(f'{field}: {old} -> {new}')
+                changes.append((field, old, new))
             setattr(subtask, field, new)
-            if field == 'assignee_id' and new != old_assignee:
-                if new:
-                    assignee_user = User.query.get(new)
-                    if assignee_user:
-                        create_notification(new, f"You have been assigned to subtask '{subtask.title}'")
+            if field == 'assignee_id' and new != old_assignee and new:
+                notify_users([new], f"You have been assigned to subtask '{subtask.title}'")
     if 'due_date' in data:
         old = subtask.due_date.isoformat() if subtask.due_date else None
         new = data['due_date']
         if old != new:
-            changes.append(f'due_date: {old} -> {new}')
+            changes.append(('due_date', old, new))
         subtask.due_date = datetime.strptime(data['due_date'], '%Y-%m-%d').date() if data['due_date'] else None
-    db.session.commit()
+    try:
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return _item_conflict(subtask_id)
     if changes:
-        log_activity(subtask.id, get_jwt_identity(), 'updated', '; '.join(changes))
-    return jsonify({'message': 'Subtask updated'}), 200
+        log_changes(subtask.id, get_jwt_identity(), changes)
+    db.session.commit()
+    return with_version(jsonify({'message': 'Subtask updated', 'item': _task_json(subtask)}), subtask), 200
 
 @require_project_permission('delete_any_task')
 def delete_subtask(subtask_id):
     subtask = Item.query.get(subtask_id)
     if not subtask or not subtask.parent_id:
         return jsonify({'error': 'Subtask not found'}), 404
-    db.session.delete(subtask)
+    deletion.delete_items([subtask_id])
+    log_activity(subtask.parent_id, get_jwt_identity(), 'deleted', f'Subtask {subtask_id} deleted')
     db.session.commit()
-    log_activity(subtask_id, get_jwt_identity(), 'deleted', 'Subtask deleted')
     return jsonify({'message': 'Subtask deleted'}), 200
 
 @require_project_permission('view_tasks')
@@ -341,64 +423,111 @@ def get_activity_logs(item_id):
     } for log in logs]
     return jsonify({'activity_logs': result}), 200
 
+@require_project_permission('view_tasks')
+def get_item_history(item_id):
+    query = ActivityChange.query.filter_by(item_id=item_id)
+    field = request.args.get('field')
+    if field:
+        query = query.filter_by(field=field)
+    changes = query.order_by(ActivityChange.changed_at.asc(), ActivityChange.id.asc()).all()
+    return jsonify({'history': [{
+        'id': c.id,
+        'field': c.field,
+        'old_value': c.old_value,
+        'new_value': c.new_value,
+        'user_id': c.user_id,
+        'changed_at': c.changed_at.isoformat()
+    } for c in changes]}), 200
+
+def _task_json(task):
+    return {
+        'id': task.id,
+        'version': task.version,
+        'title': task.title,
+        'description': task.description,
+        'status': task.status,
+        'type': task.type,
+        'priority': task.priority,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'project_id': task.project_id,
+        'column_id': task.column_id,
+        'rank': task.rank,
+        'parent_id': task.parent_id,
+        'assignee_id': task.assignee_id,
+        'reporter_id': task.reporter_id,
+        'created_at': task.created_at.isoformat(),
+        'updated_at': task.updated_at.isoformat() if task.updated_at else None,
+    }
+
+@require_project_permission('edit_any_task', allow_own='edit_own_task')
+def move_item(item_id):
+    item = Item.query.get(item_id)
+    if not item:
+        return jsonify({'error': f'Item not found: {item_id}'}), 404
+    if if_match_failed(item):
+        return _item_conflict(item_id)
+    data = request.get_json() or {}
+    column_id = data.get('column_id', item.column_id)
+    if column_id != item.column_id:
+        column = BoardColumn.query.get(column_id)
+        if not column or column.project_id != item.project_id:
+            return jsonify({'error': f'Column not found in this project: {column_id}'}), 400
+    neighbours = {}
+    for key in ('after_id', 'before_id'):
+        if data.get(key) is not None:
+            neighbour = db.session.query(Item.column_id, Item.rank).filter(Item.id == data[key]).first()
+            if not neighbour or neighbour.column_id != column_id or neighbour.rank is None or data[key] == item.id:
+                return jsonify({'error': f'{key} must be another ranked item in the target column'}), 400
+            neighbours[key.replace('_id', '_rank')] = neighbour.rank
+    item.column_id = column_id
+    item.rank = place(Item, column_id, exclude_id=item.id, **neighbours)
+    try:
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return _item_conflict(item_id)
+    schedule_rebalance(len(item.rank), column_id=column_id)
+    db.session.commit()
+    return with_version(jsonify({'message': 'Item moved', 'item': _task_json(item)}), item), 200
+
+def _item_conflict(item_id):
+    item = Item.query.get(item_id)
+    if not item:
+        return jsonify({'error': f'Item not found: {item_id}'}), 404
+    return conflict(f'Item {item_id} was modified by someone else', item, _task_json(item))
+
 def get_my_tasks():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 401
+    user_id = current_user.id
     try:
         tasks = Item.query.filter(
             (Item.assignee_id == user_id) | (Item.reporter_id == user_id)
         ).order_by(Item.created_at.desc()).all()
-        result = []
-        for task in tasks:
-            result.append({
-                'id': task.id,
-                'title': task.title,
-                'description': task.description,
-                'status': task.status,
-                'type': task.type,
-                'priority': task.priority,
-                'due_date': task.due_date.isoformat() if task.due_date else None,
-                'project_id': task.project_id,
-                'assignee_id': task.assignee_id,
-                'reporter_id': task.reporter_id,
-                'created_at': task.created_at.isoformat(),
-                'updated_at': task.updated_at.isoformat() if task.updated_at else None,
-            })
-        return jsonify({'tasks': result}), 200
+        return jsonify({'tasks': [_task_json(task) for task in tasks]}), 200
     except Exception as e:
         logger.error(f'[get_my_tasks] Exception: {e}')
         return jsonify({'error': 'Internal server error'}), 500
 
+def sync_my_tasks():
+    try:
+        tasks, removed, token, full = sync_tasks(current_user.id, request.args.get('token'))
+    except InvalidSyncToken as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'tasks': [_task_json(task) for task in tasks], 'removed': removed, 'token': token, 'full': full}), 200
+
 def add_comment(item_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 401
+    user = current_user
     data = request.get_json()
     content = data.get('content')
     if not content:
         return jsonify({'error': 'Content required'}), 400
     comment = Comment(item_id=item_id, user_id=user.id, content=content)
     db.session.add(comment)
+    jobs.enqueue('comment_notify', item_id=item_id, author_id=user.id)
     db.session.commit()
-    item = Item.query.get(item_id)
-    if item:
-        notified_users = set()
-        if item.assignee_id and item.assignee_id != user.id:
-            create_notification(item.assignee_id, f"New comment on task '{item.title}'")
-            notified_users.add(item.assignee_id)
-        if item.reporter_id and item.reporter_id != user.id and item.reporter_id not in notified_users:
-            create_notification(item.reporter_id, f"New comment on task '{item.title}'")
     return jsonify({'message': 'Comment added', 'comment': {'id': comment.id, 'content': comment.content, 'user_id': comment.user_id, 'author_name': user.username, 'created_at': comment.created_at.isoformat()}}), 201
 
 @require_project_permission('edit_any_comment', allow_own='edit_own_comment')
 def edit_comment(item_id, comment_id): 
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 401
     comment = Comment.query.get(comment_id)
     if not comment:
         return jsonify({'error': 'Comment not found'}), 404
@@ -0,0 +1,24 @@
+import hmac
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from controllers.rbac import is_admin
+from services.metrics import registry
+
+def get_metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, token):
+            return jsonify({'error': 'Unauthorized'}), 401
+    return registry.expose(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+def get_query_metrics():
+    if not is_admin(int(get_jwt_identity())):
+        return jsonify({'error': 'Forbidden: Admins only'}), 403
+    stats = current_app.extensions.get('sql_stats')
+    if stats is None:
+        return jsonify({'error': 'SQL instrumentation is disabled'}), 404
+    return jsonify({
+        'endpoints': stats.snapshot(),
+        'budgets': current_app.config['SQL_QUERY_BUDGETS'],
+    }), 200
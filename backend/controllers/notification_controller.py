@@ -1,6 +1,9 @@
 from flask import request, jsonify
 from models.notification import Notification
+from models.user import User
 from models.db import db
+from services.jobs import jobs
+from services.metrics import NOTIFICATION_FANOUT
 from flask_jwt_extended import get_jwt_identity
 import logging
 
@@ -31,4 +34,17 @@ def create_notification(user_id, message):
     notif = Notification(user_id=user_id, message=message)
     db.session.add(notif)
     db.session.commit()
-    return notif 
\ No newline at end of file
+    return notif
+
+def notify_users(user_ids, message):
+    # Fan-out happens in a background job; it commits with the caller's write.
+    user_ids = sorted({int(u) for u in user_ids if u})
+    if user_ids:
+        jobs.enqueue('notify', user_ids=user_ids, message=message)
+
+@jobs.task('notify')
+def deliver_notifications(user_ids, message):
+    existing = [row.id for row in db.session.query(User.id).filter(User.id.in_(user_ids))]
+    db.session.add_all([Notification(user_id=uid, message=message) for uid in existing])
+    NOTIFICATION_FANOUT.observe(len(existing))
+    return {'delivered': len(existing)}
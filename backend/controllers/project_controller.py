@@ -1,4 +1,5 @@
-from flask import request, jsonify
+from flask import current_app, request, jsonify
+from sqlalchemy import func, true
 from models.db import db
 from models.project import Project
 from models.user import User
@@ -7,9 +8,12 @@ from models.team import Team
 from models.item import Item
 from models.board_column import BoardColumn
 from models.team_member import TeamMember
-from models.role import Role 
+from services.roles import role_catalog
 from controllers.rbac import require_project_permission, require_permission
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from services import archive, deletion
+from services.jobs import jobs
+from services.membership_sync import add_team_to_projects
+from flask_jwt_extended import current_user, jwt_required
 
 
 @require_permission('create_project', team_lookup=lambda *a, **k: request.get_json().get('owner_team_id'))
@@ -18,12 +22,8 @@ def create_project():
     name = data.get('name')
     description = data.get('description')
     owner_team_id = data.get('owner_team_id')
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
     if not name:
         return jsonify({'error': 'Project name is required'}), 400
-    if not user:
-        return jsonify({'error': 'User not found'}), 401
     if not owner_team_id:
         return jsonify({'error': 'Owner team ID is required'}), 400
     # Ensure the team exists
@@ -32,49 +32,79 @@ def create_project():
         return jsonify({'error': 'Owner team not found'}), 404
     project = Project(name=name, description=description, owner_id=team.manager_id, owner_team_id=owner_team_id)
     db.session.add(project)
-    db.session.commit()
+    db.session.flush()
     # add default columns
     default_columns = ["To Do", "In Progress", "In Review", "Done"]
     for idx, col_name in enumerate(default_columns):
         column = BoardColumn(name=col_name, project_id=project.id, order=idx)
         db.session.add(column)
-    db.session.commit()
 
-    # Assign project roles to team members
-    owner_role = Role.query.filter_by(name='Project Owner', scope='project').first()
-    contributor_role = Role.query.filter_by(name='Project Contributor', scope='project').first()
-    team_members = TeamMember.query.filter_by(team_id=owner_team_id).all()
-    for tm in team_members:
-        if tm.user_id == team.manager_id:
-            # Team manager becomes Project Owner
-            if owner_role:
-                pm = ProjectMember(project_id=project.id, user_id=tm.user_id, role_id=owner_role.id)
-                db.session.add(pm)
-        else:
-            # Other members become Project Contributor
-            if contributor_role:
-                pm = ProjectMember(project_id=project.id, user_id=tm.user_id, role_id=contributor_role.id)
-                db.session.add(pm)
+    # Team manager becomes Project Owner, other members Project Contributor
+    owner_role = role_catalog.find('Project Owner', 'project')
+    contributor_role = role_catalog.find('Project Contributor', 'project')
+    if owner_role and contributor_role:
+        add_team_to_projects(owner_team_id, [project.id], contributor_role.id, {team.manager_id: owner_role.id})
     db.session.commit()
 
     return jsonify({'message': 'Project created', 'project_id': project.id}), 201
 
 def get_projects():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 401
-    # Get all ProjectMember entries for this user (including visitors)
-    memberships = ProjectMember.query.filter_by(user_id=user.id).all()
-    project_ids = [m.project_id for m in memberships]
-    projects = Project.query.filter(Project.id.in_(project_ids)).all()
-    # For each project, get the user's role
-    result = []
-    for p in projects:
-        pm = next((m for m in memberships if m.project_id == p.id), None)
-        role_name = pm.role.name if pm and pm.role else None
-        result.append({'id': p.id, 'name': p.name, 'description': p.description, 'owner_id': p.owner_id, 'role': role_name})
-    return jsonify({'projects': result}), 200
+    """The user's projects with their role, in id order; one query (plus one with ?progress=1).
+
+    ?limit=N returns a page and a `next_cursor` to pass back as ?cursor=; ?archived=1 lists the
+    user's archived projects instead.
+    """
+    try:
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        cursor = int(request.args['cursor']) if 'cursor' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'limit and cursor must be integers'}), 400
+    if limit is not None and not 1 <= limit <= 1000:
+        return jsonify({'error': 'limit must be between 1 and 1000'}), 400
+    query = db.session.query(Project.id, Project.name, Project.description, Project.owner_id, Project.owner_team_id,
+                             ProjectMember.role_id) \
+        .join(ProjectMember, ProjectMember.project_id == Project.id) \
+        .filter(ProjectMember.user_id == current_user.id)
+    # ?permission=<action> keeps projects where the user's role grants it (admins hold every permission)
+    permission = request.args.get('permission')
+    if permission and not current_user.is_admin:
+        query = query.filter(role_catalog.grants_clause(ProjectMember.role_id, permission))
+    if request.args.get('archived') in ('1', 'true'):
+        query = query.filter(Project.archived == true()).execution_options(**archive.INCLUDE_ARCHIVED)
+    if cursor is not None:
+        query = query.filter(Project.id > cursor)
+    query = query.order_by(Project.id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    result = [{'id': r.id, 'name': r.name, 'description': r.description, 'owner_id': r.owner_id,
+               'owner_team_id': r.owner_team_id, 'role': role_catalog.name_of(r.role_id)} for r in rows]
+    if request.args.get('progress') in ('1', 'true') and result:
+        progress = project_progress_counts([r.id for r in rows])
+        for project in result:
+            project['progress'] = progress.get(project['id'], {'total': 0, 'completed': 0, 'in_progress': 0, 'todo': 0})
+    response = {'projects': result}
+    if limit is not None:
+        response['next_cursor'] = next_cursor
+    return jsonify(response), 200
+
+def project_progress_counts(project_ids):
+    """{project_id: {'total', 'completed', 'in_progress', 'todo'}} from one grouped query."""
+    rows = db.session.query(Item.project_id, Item.status, func.count()) \
+        .filter(Item.project_id.in_(project_ids)) \
+        .group_by(Item.project_id, Item.status)
+    progress = {}
+    for project_id, status, count in rows:
+        counts = progress.setdefault(project_id, {'total': 0, 'completed': 0, 'in_progress': 0, 'todo': 0})
+        counts['total'] += count
+        key = {'done': 'completed', 'inprogress': 'in_progress', 'todo': 'todo'}.get(status)
+        if key:
+            counts[key] += count
+    return progress
 
 def get_all_projects():
     projects = Project.query.all()
@@ -83,12 +113,9 @@ def get_all_projects():
 
 @jwt_required()
 def get_dashboard_stats():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 401
-
-    project_count = ProjectMember.query.filter_by(user_id=user.id).count()
+    user = current_user
+    project_count = ProjectMember.query.join(Project, Project.id == ProjectMember.project_id) \
+        .filter(ProjectMember.user_id == user.id).count()
     task_count = Item.query.filter((Item.reporter_id == user.id) | (Item.assignee_id == user.id)).count()
     team_count = TeamMember.query.filter_by(user_id=user.id).count()
 
@@ -100,18 +127,8 @@ def get_dashboard_stats():
 
 @require_project_permission('view_tasks')
 def get_project_progress(project_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 401
-    total = Item.query.filter_by(project_id=project_id).count()
-    completed = Item.query.filter_by(project_id=project_id, status='done').count()
-    return jsonify({
-        'total': total,
-        'completed': completed,
-        'in_progress': Item.query.filter_by(project_id=project_id, status='inprogress').count(),
-        'todo': Item.query.filter_by(project_id=project_id, status='todo').count()
-    }), 200
+    counts = project_progress_counts([project_id])
+    return jsonify(counts.get(project_id, {'total': 0, 'completed': 0, 'in_progress': 0, 'todo': 0})), 200
 
 @require_project_permission('manage_project')
 def update_project(project_id):
@@ -128,13 +145,36 @@ def update_project(project_id):
 
 @require_project_permission('delete_project')
 def delete_project(project_id):
+    project = db.session.get(Project, project_id, execution_options=archive.INCLUDE_ARCHIVED)
+    if not project:
+        return jsonify({'error': 'Project not found'}), 404
+    if deletion.project_item_count(project_id) > current_app.config.get('DELETION_INLINE_ITEMS', 2000):
+        # Hide the project from its members now and delete the rest in committed chunks.
+        deletion.detach_project_members(project_id)
+        job = jobs.enqueue('delete_project', project_id=project_id, commit=True)
+        db.session.commit()
+        return jsonify({'message': 'Project deletion started', 'job_id': job.id}), 202
+    deletion.delete_project(project_id)
+    db.session.commit()
+    return jsonify({'message': 'Project deleted'}), 200
 
+@require_project_permission('manage_project')
+def archive_project(project_id):
     project = Project.query.get(project_id)
     if not project:
         return jsonify({'error': 'Project not found'}), 404
-    db.session.delete(project)
+    count = archive.archive_project(project)
     db.session.commit()
-    return jsonify({'message': 'Project deleted'}), 200
+    return jsonify({'message': 'Project archived', 'archived_items': count}), 200
+
+@require_project_permission('manage_project')
+def restore_project(project_id):
+    project = archive.get_archived(Project, project_id)
+    if not project:
+        return jsonify({'error': 'Archived project not found'}), 404
+    count = archive.restore_project(project)
+    db.session.commit()
+    return jsonify({'message': 'Project restored', 'restored_items': count}), 200
 
 @require_project_permission('transfer_ownership')
 def transfer_ownership(project_id):
@@ -3,13 +3,14 @@ from models.db import db
 from models.project_member import ProjectMember
 from models.user import User
 from models.project import Project
-from models.role import Role
+from services.roles import role_catalog
 from controllers.rbac import require_project_permission
 from models.project_member import ProjectJoinRequest
 from flask_jwt_extended import get_jwt_identity
 from flask_jwt_extended import jwt_required
-from controllers.notification_controller import create_notification
+from controllers.notification_controller import notify_users
 from controllers.rbac import is_admin
+from services.jobs import jobs
 
 @require_project_permission('add_remove_members')
 def add_member(project_id):
@@ -26,7 +27,7 @@ def add_member(project_id):
     if ProjectJoinRequest.query.filter_by(project_id=project_id, user_id=user.id, type='invite', status='pending').first():
         return jsonify({'error': 'Invitation already pending'}), 409
     # Use scope-based role lookup
-    role = Role.query.filter_by(name=role_name, scope='project').first()
+    role = role_catalog.find(role_name, 'project')
     if not role:
         return jsonify({'error': f'Role {role_name} not found for project scope'}), 404
     invite = ProjectJoinRequest(
@@ -36,8 +37,8 @@ def add_member(project_id):
         status='pending'
     )
     db.session.add(invite)
+    notify_users([user.id], f"You have been invited to join project {project_id}.")
     db.session.commit()
-    create_notification(user.id, f"You have been invited to join project {project_id}.")
     return jsonify({'message': 'Invitation sent'}), 200
 
 @require_project_permission('add_remove_members')
@@ -46,7 +47,7 @@ def remove_member(project_id, user_id):
     if not member:
         return jsonify({'error': 'Member not found'}), 404
     # Prevent removing the only Project Owner
-    owner_role = Role.query.filter_by(name='Project Owner', scope='project').first()
+    owner_role = role_catalog.find('Project Owner', 'project')
     if member.role_id == (owner_role.id if owner_role else None):
         owner_count = ProjectMember.query.filter_by(project_id=project_id, role_id=owner_role.id).count()
         if owner_count <= 1:
@@ -65,21 +66,21 @@ def update_member_role(project_id, user_id):
     if not member:
         return jsonify({'error': 'Member not found'}), 404
     # Use scope-based role lookup
-    role = Role.query.filter_by(name=role_name, scope='project').first()
+    role = role_catalog.find(role_name, 'project')
     if not role:
         return jsonify({'error': f'Role {role_name} not found for project scope'}), 404
     if role_name == 'Project Owner':
         # Demote any existing Project Owner to Project Contributor
-        owner_role = Role.query.filter_by(name='Project Owner', scope='project').first()
-        contributor_role = Role.query.filter_by(name='Project Contributor', scope='project').first()
+        owner_role = role_catalog.find('Project Owner', 'project')
+        contributor_role = role_catalog.find('Project Contributor', 'project')
         if owner_role and contributor_role:
             existing_owners = ProjectMember.query.filter_by(project_id=project_id, role_id=owner_role.id).all()
             for o in existing_owners:
                 if o.user_id != user_id:
                     o.role_id = contributor_role.id
     # Prevent demoting the only Project Owner
-    if member.role and member.role.name == 'Project Owner' and role_name != 'Project Owner':
-        owner_role = Role.query.filter_by(name='Project Owner', scope='project').first()
+    if role_catalog.name_of(member.role_id) == 'Project Owner' and role_name != 'Project Owner':
+        owner_role = role_catalog.find('Project Owner', 'project')
         owner_count = ProjectMember.query.filter_by(project_id=project_id, role_id=owner_role.id).count()
         if owner_count <= 1:
             return jsonify({'error': 'Cannot demote the only Project Owner from the project.'}), 400
@@ -97,7 +98,7 @@ def list_members(project_id):
             'user_id': m.user_id,
             'username': user.username if user else None,
             'email': user.email if user else None,
-            'role': m.role.name if m.role else None
+            'role': role_catalog.name_of(m.role_id)
         })
     return jsonify({'members': result}), 200
 
@@ -113,13 +114,8 @@ def request_to_join_project(project_id, user_id):
         status='pending'
     )
     db.session.add(join_request)
+    jobs.enqueue('project_managers_notify', project_id=project_id, message=f"New join request for project {project_id}.")
     db.session.commit()
-    managers = ProjectMember.query.filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.role.has(Role.name.in_(['Project Owner', 'Project Manager']))
-    ).all()
-    for m in managers:
-        create_notification(m.user_id, f"New join request for project {project_id}.")
     return jsonify({'message': 'Join request submitted'}), 200
 
 @require_project_permission('add_remove_members')
@@ -147,14 +143,14 @@ def accept_join_request(project_id, request_id):
         req.status = 'accepted'
         db.session.commit()
         return jsonify({'message': 'User already a member, request marked accepted'}), 200
-    role = Role.query.filter_by(name='Project Contributor', scope='project').first()
+    role = role_catalog.find('Project Contributor', 'project')
     if not role:
         return jsonify({'error': 'Default role not found'}), 400
     member = ProjectMember(project_id=project_id, user_id=req.user_id, role_id=role.id)
     db.session.add(member)
     req.status = 'accepted'
+    notify_users([req.user_id], f"Your join request for project {project_id} was accepted.")
     db.session.commit()
-    create_notification(req.user_id, f"Your join request for project {project_id} was accepted.")
     return jsonify({'message': 'Request accepted, user added'}), 200
 
 @require_project_permission('add_remove_members')
@@ -163,9 +159,9 @@ def reject_join_request(project_id, request_id):
     if not req:
         return jsonify({'error': 'Request not found'}), 404
     req.status = 'rejected'
-    db.session.commit()
     # Notify user
-    create_notification(req.user_id, f"Your join request for project {project_id} was rejected.")
+    notify_users([req.user_id], f"Your join request for project {project_id} was rejected.")
+    db.session.commit()
     return jsonify({'message': 'Request rejected'}), 200
 
 def list_my_invitations(user_id):
@@ -189,20 +185,15 @@ def accept_invitation(project_id, invite_id, user_id):
         inv.status = 'accepted'
         db.session.commit()
         return jsonify({'message': 'Already a member, invitation marked accepted'}), 200
-    role = Role.query.filter_by(name='Project Contributor', scope='project').first()
+    role = role_catalog.find('Project Contributor', 'project')
     if not role:
         return jsonify({'error': 'Default role not found'}), 400
     member = ProjectMember(project_id=project_id, user_id=user_id, role_id=role.id)
     db.session.add(member)
     inv.status = 'accepted'
-    db.session.commit()
     # Notify all project owners/managers
-    managers = ProjectMember.query.filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.role.has(Role.name.in_(['Project Owner', 'Project Manager']))
-    ).all()
-    for m in managers:
-        create_notification(m.user_id, f"User {user_id} accepted invitation to project {project_id}.")
+    jobs.enqueue('project_managers_notify', project_id=project_id, message=f"User {user_id} accepted invitation to project {project_id}.")
+    db.session.commit()
     return jsonify({'message': 'Invitation accepted, user added'}), 200
 
 def reject_invitation(project_id, invite_id, user_id):
@@ -210,12 +201,15 @@ def reject_invitation(project_id, invite_id, user_id):
     if not inv:
         return jsonify({'error': 'Invitation not found'}), 404
     inv.status = 'rejected'
-    db.session.commit()
     # Notify all managers/admins
-    managers = ProjectMember.query.filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.role.has(Role.name.in_(['Project Owner', 'Project Manager']))
-    ).all()
-    for m in managers:
-        create_notification(m.user_id, f"User {user_id} rejected invitation to project {project_id}.")
+    jobs.enqueue('project_managers_notify', project_id=project_id, message=f"User {user_id} rejected invitation to project {project_id}.")
+    db.session.commit()
     return jsonify({'message': 'Invitation rejected'}), 200
+
+@jobs.task('project_managers_notify')
+def notify_project_managers(project_id, message):
+    managers = db.session.query(ProjectMember.user_id).filter(
+        ProjectMember.project_id == project_id,
+        ProjectMember.role_id.in_([role_catalog.id_of(name, 'project') for name in ('Project Owner', 'Project Manager')])
+    )
+    notify_users([m.user_id for m in managers], message)
@@ -3,46 +3,59 @@ from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.project_member import ProjectMember
 from models.team_member import TeamMember
-from models.role import Role
-from models.permission import Permission
 from models.item import Item
+from models.board_column import BoardColumn
 from models.user import User
 from models.team import Team
 from models.project import Project
+from models.db import db
+from services.archive import INCLUDE_ARCHIVED
+from services.principal import ADMIN_ROLE, current_principal, load_principal
+from services.roles import role_catalog
+
+def get_principal(user_id):
+    # The requesting user is already resolved; only other users need a query.
+    principal = current_principal()
+    if principal is None or principal.id != int(user_id):
+        principal = load_principal(user_id)
+    return principal
 
 def is_admin(user_id):
-    user = User.query.get(user_id)
-    admin_role = Role.query.filter_by(name='Firm Admin', scope='firm').first()
-    # Check if user is the only admin (by email or username)
-    return user and user.email == 'admin@example.com'
+    principal = get_principal(user_id)
+    return bool(principal and principal.is_admin)
+
+def admin_user_ids():
+    role_id = role_catalog.id_of(ADMIN_ROLE, 'firm')
+    if role_id is None:
+        return []
+    return [row.id for row in db.session.query(User.id).filter(User.firm_role_id == role_id)]
 
 
 def has_permission(user_id, action, team_id=None, project_id=None):
+    principal = get_principal(user_id)
+    if principal is None:
+        return False
     # 0. Admin override: admin user has all permissions
-    if is_admin(user_id):
+    if principal.is_admin:
         return True
 
-    # 1. Check firm-level roles (if any)
-    firm_roles = Role.query.filter_by(scope='firm').all()
-    firm_role_ids = [r.id for r in firm_roles]
-    firm_memberships = TeamMember.query.filter_by(user_id=user_id).filter(TeamMember.role_id.in_(firm_role_ids)).all()
-    for membership in firm_memberships:
-        if any(p.action == action for p in membership.role.permissions):
-            return True
+    action_bit = role_catalog.action_bit(action)
+    if not action_bit:
+        return False
 
-    # 2. Check team-level roles
-    if team_id:
-        team_member = TeamMember.query.filter_by(user_id=user_id, team_id=team_id).first()
-        if team_member and team_member.role and any(p.action == action for p in team_member.role.permissions):
-            return True
+    # 1. The user's firm-level role (if any)
+    mask = role_catalog.mask(principal.firm_role_id)
 
-    # 3. Check project-level roles
-    if project_id:
-        project_member = ProjectMember.query.filter_by(user_id=user_id, project_id=project_id).first()
-        if project_member and project_member.role and any(p.action == action for p in project_member.role.permissions):
-            return True
+    # 2. Team-level roles
+    if team_id and not mask & action_bit:
+        mask |= role_catalog.mask(
+            db.session.query(TeamMember.role_id).filter_by(user_id=user_id, team_id=team_id).scalar())
 
-        return False
+    # 3. Project-level roles
+    if project_id and not mask & action_bit:
+        mask |= role_catalog.mask(
+            db.session.query(ProjectMember.role_id).filter_by(user_id=user_id, project_id=project_id).scalar())
+    return bool(mask & action_bit)
 
 
 def require_permission(action, team_lookup=None, project_lookup=None):
@@ -76,12 +89,22 @@ def require_project_permission(action, allow_own=None):
             user_id = get_jwt_identity()
             if not user_id:
                 return jsonify({"error": "Unauthorized: No user ID found."}), 401
-            project_id = kwargs.get('project_id') or (getattr(request, 'view_args', {}) or {}).get('project_id')
-            item_id = kwargs.get('item_id') or (getattr(request, 'view_args', {}) or {}).get('item_id')
+            view_args = getattr(request, 'view_args', {}) or {}
+            project_id = kwargs.get('project_id') or view_args.get('project_id')
+            item_id = kwargs.get('item_id') or view_args.get('item_id') or kwargs.get('subtask_id') or view_args.get('subtask_id')
+            column_id = kwargs.get('column_id') or view_args.get('column_id')
             if not project_id and item_id:
                 item = Item.query.get(item_id)
                 if item:
                     project_id = item.project_id
+                else:
+                    # Archived items are hidden from Item.query; restoring one still needs its project.
+                    project_id = db.session.query(Item.project_id).filter(Item.id == item_id) \
+                        .execution_options(**INCLUDE_ARCHIVED).scalar()
+            if not project_id and column_id:
+                column = BoardColumn.query.get(column_id)
+                if column:
+                    project_id = column.project_id
             if not project_id:
                 return jsonify({"error": "Project ID not found in request."}), 400
             # Check main permission
@@ -93,7 +116,7 @@ def require_project_permission(action, allow_own=None):
                 if has_permission(user_id, own_action, project_id=project_id):
                     # Check if user is the owner (reporter or assignee) of the item
                     if item_id:
-                        item = Item.query.get(item_id)
+                        item = db.session.get(Item, item_id, execution_options=INCLUDE_ARCHIVED)
                         if item and int(user_id) in [item.reporter_id, item.assignee_id]:
                             return f(*args, **kwargs)
                         else:
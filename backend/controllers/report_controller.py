@@ -1,16 +1,31 @@
-from flask import request, jsonify
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime
+from flask import request, jsonify, make_response, url_for
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import func, select
+from models.db import db
+from models.change_feed import ChangeFeed
 from models.project import Project
 from models.item import Item
+from models.job import Job
 from models.project_member import ProjectMember
+from models.report_artifact import ReportArtifact
 from models.user import User
-from controllers.rbac import require_project_permission 
+from controllers.rbac import require_project_permission, has_permission
+from services.jobs import jobs
+from services.metrics import cache_lookup
+from services.roles import role_catalog
 
-@require_project_permission('view_tasks')
-def get_project_report(project_id):
+REPORT_FORMATS = {'json': 'application/json', 'csv': 'text/csv'}
+CSV_COLUMNS = ['id', 'title', 'type', 'status', 'assignee_id', 'reporter_id', 'due_date']
 
+def build_project_report(project_id):
     project = Project.query.get(project_id)
     if not project:
-        return jsonify({'error': 'Project not found'}), 404
+        return None
     items = Item.query.filter_by(project_id=project_id).all()
     members = ProjectMember.query.filter_by(project_id=project_id).all()
     member_details = []
@@ -21,7 +36,7 @@ def get_project_report(project_id):
                 'id': user.id,
                 'username': user.username,
                 'email': user.email,
-                'role': m.role.name if m.role else None
+                'role': role_catalog.name_of(m.role_id)
             })
     status_counts = {}
     for item in items:
@@ -39,7 +54,7 @@ def get_project_report(project_id):
         }
         for item in items
     ]
-    report = {
+    return {
         'project': { 'id': project.id, 'name': project.name },
         'members': member_details,
         'stats': {
@@ -51,4 +66,106 @@ def get_project_report(project_id):
         },
         'tasks': tasks
     }
-    return jsonify({'report': report}), 200
\ No newline at end of file
+
+@require_project_permission('view_tasks')
+def get_project_report(project_id):
+    report = build_project_report(project_id)
+    if report is None:
+        return jsonify({'error': 'Project not found'}), 404
+    return jsonify({'report': report}), 200
+
+def project_data_version(project_id):
+    # Fingerprint of everything the report reads. The project's latest change
+    # feed seq moves on every item or membership write, bulk ones included;
+    # the item aggregate covers `flask import`, which bypasses the feed.
+    # Members are listed in full (the report embeds each one's role, username
+    # and email), so swapped roles or a renamed user change it too.
+    project = db.session.query(Project.name, Project.updated_at).filter(Project.id == project_id).one()
+    last_change = select(func.max(ChangeFeed.seq)).where(ChangeFeed.project_id == project_id).scalar_subquery()
+    items = db.session.query(func.count(Item.id), func.sum(Item.id), func.max(Item.updated_at), last_change) \
+        .filter(Item.project_id == project_id).one()
+    members = db.session.query(ProjectMember.user_id, ProjectMember.role_id, User.username, User.email) \
+        .join(User, User.id == ProjectMember.user_id) \
+        .filter(ProjectMember.project_id == project_id).order_by(ProjectMember.user_id).all()
+    fingerprint = repr((tuple(project), tuple(items), [tuple(m) for m in members]))
+    return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+def render_report(report, fmt):
+    if fmt == 'csv':
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(report['tasks'])
+        return out.getvalue()
+    return json.dumps({'report': report}, sort_keys=True)
+
+@jobs.task('project_report')
+def generate_report_artifact(project_id, format, data_version):
+    artifact = ReportArtifact.query.filter_by(project_id=project_id, format=format, data_version=data_version).first()
+    if artifact is None:
+        report = build_project_report(project_id)
+        if report is None:
+            raise LookupError(f'Project {project_id} not found')
+        content = render_report(report, format)
+        # Older versions can never be served again; keep one artifact per format.
+        ReportArtifact.query.filter_by(project_id=project_id, format=format).delete()
+        artifact = ReportArtifact(project_id=project_id, format=format, data_version=data_version,
+                                  digest=hashlib.sha256(content.encode()).hexdigest(), content=content)
+        db.session.add(artifact)
+        db.session.flush()
+    return {'artifact_id': artifact.id, 'digest': artifact.digest}
+
+def _job_json(job):
+    return {
+        'id': job.id,
+        'status': job.status,
+        'attempts': job.attempts,
+        'error': job.error if job.status == 'failed' else None,
+        'url': url_for('reports.report_job', job_id=job.id),
+    }
+
+@require_project_permission('view_tasks')
+def create_report_job(project_id):
+    if not Project.query.get(project_id):
+        return jsonify({'error': 'Project not found'}), 404
+    data = request.get_json(silent=True) or {}
+    fmt = data.get('format', request.args.get('format', 'json'))
+    if fmt not in REPORT_FORMATS:
+        return jsonify({'error': f'Invalid format: {fmt}'}), 400
+    data_version = project_data_version(project_id)
+    payload = {'project_id': project_id, 'format': fmt, 'data_version': data_version}
+    artifact = ReportArtifact.query.filter_by(project_id=project_id, format=fmt, data_version=data_version).first()
+    cache_lookup('report_artifact', artifact is not None)
+    if artifact:
+        # Cache hit: record a finished job pointing at the existing artifact.
+        job = Job(kind='project_report', payload=json.dumps(payload), status='done', attempts=0,
+                  finished_at=datetime.utcnow(), result=json.dumps({'artifact_id': artifact.id, 'digest': artifact.digest}))
+        db.session.add(job)
+    else:
+        job = jobs.enqueue('project_report', **payload)
+    db.session.commit()
+    response = jsonify({'job': _job_json(job)})
+    response.headers['Location'] = url_for('reports.report_job', job_id=job.id)
+    return response, 202
+
+def get_report_job(job_id):
+    job = Job.query.get(job_id)
+    if not job or job.kind != 'project_report':
+        return jsonify({'error': 'Job not found'}), 404
+    payload = json.loads(job.payload)
+    if not has_permission(get_jwt_identity(), 'view_tasks', project_id=payload['project_id']):
+        return jsonify({'error': "Forbidden: You lack 'view_tasks' permission."}), 403
+    if job.status == 'failed':
+        return jsonify({'job': _job_json(job)}), 500
+    if job.status != 'done':
+        return jsonify({'job': _job_json(job)}), 202
+    artifact = ReportArtifact.query.get(json.loads(job.result)['artifact_id'])
+    if artifact is None:
+        return jsonify({'error': 'Report artifact expired, request a new report job'}), 410
+    if request.if_none_match.contains(artifact.digest):
+        return '', 304
+    response = make_response(artifact.content, 200)
+    response.headers['Content-Type'] = REPORT_FORMATS[artifact.format]
+    response.set_etag(artifact.digest)
+    response.headers['Cache-Control'] = 'private, max-age=0'
+    return response
@@ -3,12 +3,12 @@ from models.db import db
 from models.team import Team
 from models.user import User
 from models.team_member import TeamMember
-from models.project import Project
-from models.project_member import ProjectMember
-from models.role import Role
+from services.roles import role_catalog
 from models.team_manager_request import TeamManagerRequest
-from controllers.rbac import is_admin
-from controllers.notification_controller import create_notification
+from controllers.rbac import admin_user_ids, is_admin
+from controllers.notification_controller import notify_users
+from services import deletion
+from services.membership_sync import add_team_to_projects, remove_team_from_projects, team_projects
 from flask_jwt_extended import get_jwt_identity
 import logging
 
@@ -25,12 +25,10 @@ def request_manager(team_id):
         return jsonify({'error': 'Request already pending'}), 409
     req = TeamManagerRequest(team_id=team_id, user_id=user_id, status='pending')
     db.session.add(req)
+    # Notify current manager and firm admins
+    recipients = [team.manager_id] + admin_user_ids()
+    notify_users(recipients, f"User {user_id} requested to become manager of team {team_id}.")
     db.session.commit()
-    # Notify current manager and firm admin
-    create_notification(team.manager_id, f"User {user_id} requested to become manager of team {team_id}.")
-    admin_user = User.query.filter_by(email='admin@example.com').first()
-    if admin_user:
-        create_notification(admin_user.id, f"User {user_id} requested to become manager of team {team_id}.")
     return jsonify({'message': 'Request submitted'}), 200
 
 def list_manager_requests(team_id):
@@ -59,8 +57,8 @@ def accept_manager_request(team_id, request_id):
     if not req:
         return jsonify({'error': 'Request not found'}), 404
     # Transfer manager
-    manager_role = Role.query.filter_by(name='Team Manager', scope='team').first()
-    member_role = Role.query.filter_by(name='Team Member', scope='team').first()
+    manager_role = role_catalog.find('Team Manager', 'team')
+    member_role = role_catalog.find('Team Member', 'team')
     # Demote all other managers
     for m in TeamMember.query.filter_by(team_id=team_id).all():
         if m.user_id != req.user_id and m.role_id == manager_role.id:
@@ -71,8 +69,8 @@ def accept_manager_request(team_id, request_id):
     if tm:
         tm.role_id = manager_role.id
     req.status = 'accepted'
+    notify_users([req.user_id], f"Your request to become manager of team {team_id} was accepted.")
     db.session.commit()
-    create_notification(req.user_id, f"Your request to become manager of team {team_id} was accepted.")
     return jsonify({'message': 'Manager transferred'}), 200
 
 def reject_manager_request(team_id, request_id):
@@ -86,8 +84,8 @@ def reject_manager_request(team_id, request_id):
     if not req:
         return jsonify({'error': 'Request not found'}), 404
     req.status = 'rejected'
+    notify_users([req.user_id], f"Your request to become manager of team {team_id} was rejected.")
     db.session.commit()
-    create_notification(req.user_id, f"Your request to become manager of team {team_id} was rejected.")
     return jsonify({'message': 'Request rejected'}), 200
 
 def get_teams():
@@ -110,7 +108,7 @@ def create_team():
     db.session.commit()
     
     # Add manager as TeamMember
-    manager_role = Role.query.filter_by(name='Team Manager', scope='team').first()
+    manager_role = role_catalog.find('Team Manager', 'team')
     if manager_role:
         tm = TeamMember(team_id=team.id, user_id=user_id, role_id=manager_role.id)
         db.session.add(tm)
@@ -122,12 +120,12 @@ def get_team(team_id):
     team = Team.query.get(team_id)
     if not team:
         return jsonify({'error': 'Team not found'}), 404
-    members = TeamMember.query.filter_by(team_id=team_id).all()
-    member_list = []
-    for m in members:
-        user = User.query.get(m.user_id)
-        if user:
-            member_list.append({'id': user.id, 'username': user.username, 'email': user.email, 'is_manager': user.id == team.manager_id})
+    users = db.session.query(User.id, User.username, User.email) \
+        .join(TeamMember, TeamMember.user_id == User.id).filter(TeamMember.team_id == team_id).all()
+    member_list = [
+        {'id': u.id, 'username': u.username, 'email': u.email, 'is_manager': u.id == team.manager_id}
+        for u in users
+    ]
     return jsonify({
         'id': team.id,
         'name': team.name,
@@ -147,16 +145,16 @@ def add_team_project(team_id):
     roles = data.get('roles', {})
     if not project_id:
         return jsonify({'error': 'Project ID required'}), 400
-    # Note: ProjectTeam logic was removed in original file, logic here matches what was present
-    team_members = TeamMember.query.filter_by(team_id=team_id).all()
-    for tm in team_members:
-        if not ProjectMember.query.filter_by(project_id=project_id, user_id=tm.user_id).first():
-            role_name = roles.get(str(tm.user_id), 'member')
-            role_obj = Role.query.filter_by(name=role_name, scope='project').first()
-            if not role_obj:
-                return jsonify({'error': f'Role {role_name} not found for project scope'}), 400
-            pm = ProjectMember(project_id=project_id, user_id=tm.user_id, role_id=role_obj.id)
-            db.session.add(pm)
+    if not isinstance(roles, dict) or not all(str(key).isdigit() for key in roles):
+        return jsonify({'error': 'Roles must map user ids to role names'}), 400
+    role_names = {str(user_id): name for user_id, name in roles.items()}
+    names = set(role_names.values()) | {'Project Contributor'}
+    role_ids = {name: role_catalog.id_of(name, 'project') for name in names}
+    missing = {name for name, role_id in role_ids.items() if role_id is None}
+    if missing:
+        return jsonify({'error': f'Role {sorted(missing)[0]} not found for project scope'}), 400
+    overrides = {int(user_id): role_ids[name] for user_id, name in role_names.items()}
+    add_team_to_projects(team_id, [project_id], role_ids['Project Contributor'], overrides)
     db.session.commit()
     return jsonify({'message': 'Project associated'}), 200
 
@@ -166,11 +164,7 @@ def remove_team_project(team_id, project_id):
     if team.manager_id != user_id and not is_admin(user_id):
         return jsonify({'error': 'Forbidden: You are not the manager of this team.'}), 403
         
-    team_members = TeamMember.query.filter_by(team_id=team_id).all()
-    for tm in team_members:
-        direct_member = ProjectMember.query.filter_by(project_id=project_id, user_id=tm.user_id).first()
-        if direct_member:
-            db.session.delete(direct_member)
+    remove_team_from_projects(team_id, [project_id])
     db.session.commit()
     return jsonify({'message': 'Project disassociated'}), 200
 
@@ -179,9 +173,9 @@ def add_team_member(team_id):
     user_id = int(get_jwt_identity())
     # Allow team admin or manager to add members
     is_team_manager = team.manager_id == user_id
-    manager_role = Role.query.filter_by(name='Team Manager', scope='team').first()
+    manager_role = role_catalog.find('Team Manager', 'team')
     is_manager = False
-    if manager_role:
+    if manager_role and not is_team_manager:
         tm = TeamMember.query.filter_by(team_id=team_id, user_id=user_id, role_id=manager_role.id).first()
         is_manager = tm is not None
     if not (is_team_manager or is_manager or is_admin(user_id)):
@@ -198,18 +192,15 @@ def add_team_member(team_id):
         return jsonify({'error': 'User already a member'}), 409
     tm = TeamMember(team_id=team_id, user_id=user.id, role_id=None)
     # Assign default team role
-    team_role = Role.query.filter_by(name='Team Member', scope='team').first()
+    team_role = role_catalog.find('Team Member', 'team')
     if not team_role:
         return jsonify({'error': 'Default team role not found'}), 400
     tm.role_id = team_role.id
+    project_role = role_catalog.find('Project Contributor', 'project')
+    if not project_role:
+        return jsonify({'error': 'Default project role not found'}), 400
     db.session.add(tm)
-    for pl in Project.query.filter_by(owner_team_id=team_id).all():
-        if not ProjectMember.query.filter_by(project_id=pl.id, user_id=user.id).first():
-            project_role = Role.query.filter_by(name='Project Contributor', scope='project').first()
-            if not project_role:
-                return jsonify({'error': 'Default project role not found'}), 400
-            pm = ProjectMember(project_id=pl.id, user_id=user.id, role_id=project_role.id)
-            db.session.add(pm)
+    add_team_to_projects(team_id, team_projects(team_id), project_role.id, user_ids=[user.id])
     db.session.commit()
     return jsonify({'message': 'Member added'}), 200
 
@@ -217,9 +208,9 @@ def remove_team_member(team_id, user_id):
     team = Team.query.get_or_404(team_id)
     current_user_id = int(get_jwt_identity())
     is_team_manager = team.manager_id == current_user_id
-    manager_role = Role.query.filter_by(name='Team Manager', scope='team').first()
+    manager_role = role_catalog.find('Team Manager', 'team')
     is_manager = False
-    if manager_role:
+    if manager_role and not is_team_manager:
         tm = TeamMember.query.filter_by(team_id=team_id, user_id=current_user_id, role_id=manager_role.id).first()
         is_manager = tm is not None
     if not (is_team_manager or is_manager or is_admin(current_user_id)):
@@ -228,41 +219,38 @@ def remove_team_member(team_id, user_id):
     tm = TeamMember.query.filter_by(team_id=team_id, user_id=user_id).first()
     if not tm:
         return jsonify({'error': 'Member not found'}), 404
-    for pl in Project.query.filter_by(owner_team_id=team_id).all():
-        direct_member = ProjectMember.query.filter_by(project_id=pl.id, user_id=user_id).first()
-        if direct_member:
-            db.session.delete(direct_member)
+    remove_team_from_projects(team_id, team_projects(team_id), user_ids=[user_id])
     db.session.delete(tm)
     db.session.commit()
     return jsonify({'message': 'Member removed'}), 200
 
 def get_my_team_permissions(team_id):
     user_id = int(get_jwt_identity())
-    member = TeamMember.query.filter_by(user_id=user_id, team_id=team_id).first()
-    if not member or not member.role:
+    role_id = db.session.query(TeamMember.role_id).filter_by(user_id=user_id, team_id=team_id).scalar()
+    role = role_catalog.get(role_id)
+    if not role:
         return jsonify({'permissions': [], 'role': None}), 200
-    perms = [p.action for p in member.role.permissions]
-    return jsonify({'permissions': perms, 'role': member.role.name}), 200
+    return jsonify({'permissions': sorted(role.permissions), 'role': role.name}), 200
 
 def change_team_member_role(team_id, user_id):
     current_user_id = int(get_jwt_identity())
     is_team_manager = Team.query.get(team_id).manager_id == current_user_id
-    manager_role = Role.query.filter_by(name='Team Manager', scope='team').first()
-    member_role = Role.query.filter_by(name='Team Member', scope='team').first()
+    manager_role = role_catalog.find('Team Manager', 'team')
+    member_role = role_catalog.find('Team Member', 'team')
     is_manager = False
     if manager_role:
         tm = TeamMember.query.filter_by(team_id=team_id, user_id=current_user_id, role_id=manager_role.id).first()
         is_manager = tm is not None
     has_assign_perm = False
     member = TeamMember.query.filter_by(team_id=team_id, user_id=current_user_id).first()
-    if member and member.role and any(p.action == 'assign_team_role' for p in member.role.permissions):
+    if member and role_catalog.grants(member.role_id, 'assign_team_role'):
         has_assign_perm = True
     if not (is_team_manager or is_manager or has_assign_perm or is_admin(current_user_id)):
         return jsonify({'error': 'Forbidden: Only team managers or users with the Team Manager role or assign_team_role permission can change roles.'}), 403
     data = request.get_json()
     role_id = data.get('role_id')
     tm = TeamMember.query.filter_by(team_id=team_id, user_id=user_id).first()
-    role = Role.query.get(role_id)
+    role = role_catalog.get(role_id)
     if not tm or not role or role.scope != 'team':
         return jsonify({'error': 'Invalid membership or role'}), 400
     team = Team.query.get(team_id)
@@ -282,8 +270,7 @@ def delete_team(team_id):
     team = Team.query.get(team_id)
     if not team:
         return jsonify({'error': 'Team not found'}), 404
-    TeamMember.query.filter_by(team_id=team_id).delete()
-    db.session.delete(team)
+    deletion.delete_team(team_id)
     db.session.commit()
     return jsonify({'message': 'Team deleted'}), 200
 
@@ -323,5 +310,5 @@ def get_all_teams():
     return jsonify({'teams': result}), 200
 
 def get_team_roles():
-    roles = Role.query.filter_by(scope='team').all()
+    roles = role_catalog.in_scope('team')
     return jsonify({'roles': [{'id': r.id, 'name': r.name} for r in roles]}), 200
@@ -25,13 +25,13 @@ from models.project_member import ProjectMember
 from models.item import Item
 from models.board_column import BoardColumn
 from werkzeug.security import generate_password_hash
-from app import app
+from app import create_app
 
 def reset_db():
     db.drop_all()
     db.create_all()
 
-def seed_data():
+def seed_roles_and_permissions():
     # --- Permissions ---
     PERMISSIONS = [
         Permission(action='create_team', description='Create a new team'),
@@ -87,18 +87,24 @@ def seed_data():
     visitor_perms = [perm_map[a] for a in ['view_project', 'view_tasks', 'view_project_settings', 'view_reports'] if a in perm_map]
     roles['Project Visitor'].permissions = visitor_perms
     db.session.commit()
+    return roles
+
+def seed_data():
+    roles = seed_roles_and_permissions()
 
     # --- Users ---
     user_objs = {}
     user_defs = [
-        {'username': 'admin', 'email': 'admin@example.com', 'password': 'adminpass'},
+        {'username': 'admin', 'email': 'admin@example.com', 'password': 'adminpass', 'firm_role': 'Firm Admin'},
         {'username': 'alice', 'email': 'alice@example.com', 'password': 'password123'},
         {'username': 'bob', 'email': 'bob@example.com', 'password': 'password123'},
         {'username': 'carol', 'email': 'carol@example.com', 'password': 'password123'},
         {'username': 'dave', 'email': 'dave@example.com', 'password': 'password123'},
     ]
     for u in user_defs:
-        user = User(username=u['username'], email=u['email'], password_hash=generate_password_hash(u['password']))
+        firm_role = roles.get(u.get('firm_role'))
+        user = User(username=u['username'], email=u['email'], password_hash=generate_password_hash(u['password']),
+                    firm_role_id=firm_role.id if firm_role else None)
         db.session.add(user)
         user_objs[u['username']] = user
         db.session.commit()
@@ -171,6 +177,7 @@ def seed_data():
     db.session.commit()
 
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         reset_db()
         seed_data()
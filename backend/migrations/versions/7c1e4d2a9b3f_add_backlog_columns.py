@@ -0,0 +1,145 @@
+"""Add and backfill the columns new models added to existing tables
+
+`db.create_all()` creates new tables but never alters existing ones, so a
+database created before these columns existed needs this revision. On a
+database created from the current models every step is skipped.
+
+Revision ID: 7c1e4d2a9b3f
+Revises:
+Create Date: 2026-10-19 13:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from services.ranking import spread
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4d2a9b3f'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ADMIN_ROLE = 'Firm Admin'
+LEGACY_ADMIN_EMAIL = 'admin@example.com'  # the admin check before firm roles
+MAX_PERMISSION_BIT = 62
+
+user = sa.table('user', sa.column('id', sa.Integer), sa.column('email', sa.String), sa.column('firm_role_id', sa.Integer))
+role = sa.table('role', sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('scope', sa.String),
+                sa.column('permission_mask', sa.BigInteger))
+permission = sa.table('permission', sa.column('id', sa.Integer), sa.column('bit', sa.Integer))
+role_permissions = sa.table('role_permissions', sa.column('role_id', sa.Integer), sa.column('permission_id', sa.Integer))
+team_member = sa.table('team_member', sa.column('user_id', sa.Integer), sa.column('role_id', sa.Integer))
+item = sa.table('item', sa.column('id', sa.Integer), sa.column('column_id', sa.Integer), sa.column('rank', sa.String))
+board_column = sa.table('board_column', sa.column('id', sa.Integer), sa.column('project_id', sa.Integer),
+                        sa.column('order', sa.Integer), sa.column('rank', sa.String))
+
+def _columns(table):
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+def _indexes(table):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+def _create_index(name, table, columns, **kwargs):
+    if name not in _indexes(table):
+        op.create_index(name, table, columns, **kwargs)
+
+def _rank_column():
+    return sa.String(64).with_variant(postgresql.VARCHAR(64, collation='C'), 'postgresql')
+
+def _backfill_ranks(table, group, order_by):
+    # Keep the order the rows were listed in before ranks existed.
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(table.c.id, group).order_by(group, *order_by)).all()
+    groups = {}
+    for row_id, key in rows:
+        groups.setdefault(key, []).append(row_id)
+    params = [{'b_id': row_id, 'b_rank': rank} for ids in groups.values() for row_id, rank in zip(ids, spread(len(ids)))]
+    if params:
+        bind.execute(table.update().where(table.c.id == sa.bindparam('b_id')).values(rank=sa.bindparam('b_rank')), params)
+
+def _grant_firm_roles():
+    bind = op.get_bind()
+    admin_id = bind.scalar(sa.select(role.c.id).where(role.c.name == ADMIN_ROLE, role.c.scope == 'firm'))
+    if admin_id is not None:
+        bind.execute(user.update().where(user.c.email == LEGACY_ADMIN_EMAIL, user.c.firm_role_id.is_(None))
+                     .values(firm_role_id=admin_id))
+    # Firm roles used to be assigned through team memberships.
+    firm_role = sa.select(team_member.c.role_id).join(role, role.c.id == team_member.c.role_id) \
+        .where(team_member.c.user_id == user.c.id, role.c.scope == 'firm') \
+        .order_by((role.c.name == ADMIN_ROLE).desc(), role.c.id).limit(1).scalar_subquery()
+    bind.execute(user.update().where(user.c.firm_role_id.is_(None)).values(firm_role_id=firm_role))
+
+def _backfill_permission_bits():
+    bind = op.get_bind()
+    top = bind.scalar(sa.select(sa.func.max(permission.c.bit)))
+    missing = bind.scalars(sa.select(permission.c.id).where(permission.c.bit.is_(None)).order_by(permission.c.id)).all()
+    first = 0 if top is None else top + 1
+    if first + len(missing) - 1 > MAX_PERMISSION_BIT:
+        raise RuntimeError(f'Permission bits exhausted: only {MAX_PERMISSION_BIT + 1} permissions can be encoded')
+    for bit, permission_id in enumerate(missing, first):
+        bind.execute(permission.update().where(permission.c.id == permission_id).values(bit=bit))
+    masks = {}
+    for role_id, bit in bind.execute(sa.select(role_permissions.c.role_id, permission.c.bit)
+                                     .join(permission, permission.c.id == role_permissions.c.permission_id)):
+        masks[role_id] = masks.get(role_id, 0) | (1 << bit)
+    for role_id, mask in masks.items():
+        bind.execute(role.update().where(role.c.id == role_id).values(permission_mask=mask))
+
+def upgrade():
+    if 'firm_role_id' not in _columns('user'):
+        with op.batch_alter_table('user') as batch:
+            batch.add_column(sa.Column('firm_role_id', sa.Integer))
+            batch.create_foreign_key('fk_user_firm_role_id_role', 'role', ['firm_role_id'], ['id'])
+        _grant_firm_roles()
+    _create_index('ix_user_firm_role_id', 'user', ['firm_role_id'])
+
+    if 'bit' not in _columns('permission'):
+        op.add_column('permission', sa.Column('bit', sa.Integer))
+        op.add_column('role', sa.Column('permission_mask', sa.BigInteger, nullable=False, server_default='0'))
+        _backfill_permission_bits()
+        op.create_index('uq_permission_bit', 'permission', ['bit'], unique=True)
+
+    for table in ('item', 'board_column'):
+        if 'version' not in _columns(table):
+            op.add_column(table, sa.Column('version', sa.Integer, nullable=False, server_default='1'))
+    if 'rank' not in _columns('board_column'):
+        op.add_column('board_column', sa.Column('rank', _rank_column()))
+        _backfill_ranks(board_column, board_column.c.project_id, [board_column.c.order, board_column.c.id])
+    if 'rank' not in _columns('item'):
+        op.add_column('item', sa.Column('rank', _rank_column()))
+        _backfill_ranks(item, item.c.column_id, [item.c.id])
+
+    for table in ('item', 'project'):
+        if 'archived' not in _columns(table):
+            op.add_column(table, sa.Column('archived', sa.Boolean, nullable=False, server_default=sa.false()))
+            op.add_column(table, sa.Column('archived_at', sa.DateTime))
+
+    active = sa.column('archived') == sa.false()
+    archived = sa.column('archived') == sa.true()
+    _create_index('ix_item_parent_id', 'item', ['parent_id'])
+    _create_index('ix_item_project_status', 'item', ['project_id', 'status'], postgresql_where=active, sqlite_where=active)
+    _create_index('ix_item_column_rank', 'item', ['column_id', 'rank'], postgresql_where=active, sqlite_where=active)
+    _create_index('ix_item_project_archived', 'item', ['project_id', 'archived_at'],
+                  postgresql_where=archived, sqlite_where=archived)
+    _create_index('ix_board_column_project_rank', 'board_column', ['project_id', 'rank'])
+
+
+def downgrade():
+    # Indexes a fresh create_all() made are dropped with their columns.
+    for name, table in (('ix_board_column_project_rank', 'board_column'), ('ix_item_project_archived', 'item'),
+                        ('ix_item_column_rank', 'item'), ('ix_item_project_status', 'item'),
+                        ('ix_item_parent_id', 'item'), ('uq_permission_bit', 'permission'),
+                        ('ix_user_firm_role_id', 'user')):
+        if name in _indexes(table):
+            op.drop_index(name, table_name=table)
+    for table, columns in (('item', ['archived_at', 'archived', 'rank', 'version']),
+                           ('project', ['archived_at', 'archived']),
+                           ('board_column', ['rank', 'version']),
+                           ('role', ['permission_mask']),
+                           ('permission', ['bit'])):
+        with op.batch_alter_table(table) as batch:
+            for column in columns:
+                batch.drop_column(column)
+    with op.batch_alter_table('user') as batch:
+        batch.drop_column('firm_role_id')  # drops its foreign key with it
@@ -0,0 +1,39 @@
+"""Index the ranks of archived cards and the archive split of projects
+
+Placing a card looks up neighbouring ranks among archived cards too, so a
+restored card cannot tie with one placed while it was archived. Projects
+get the same active/archived partial indexes as items.
+
+Revision ID: a4d8e6f0c215
+Revises: 7c1e4d2a9b3f
+Create Date: 2026-10-19 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d8e6f0c215'
+down_revision = '7c1e4d2a9b3f'
+branch_labels = None
+depends_on = None
+
+
+def _create_index(name, table, columns, where):
+    if name not in {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}:
+        op.create_index(name, table, columns, postgresql_where=where, sqlite_where=where)
+
+
+def upgrade():
+    active = sa.column('archived') == sa.false()
+    archived = sa.column('archived') == sa.true()
+    _create_index('ix_item_column_rank_archived', 'item', ['column_id', 'rank'], archived)
+    _create_index('ix_project_owner_team', 'project', ['owner_team_id'], active)
+    _create_index('ix_project_archived', 'project', ['archived_at'], archived)
+
+
+def downgrade():
+    op.drop_index('ix_project_archived', table_name='project')
+    op.drop_index('ix_project_owner_team', table_name='project')
+    op.drop_index('ix_item_column_rank_archived', table_name='item')
@@ -11,3 +11,11 @@ from .notification import Notification
 from .role import Role
 from .permission import Permission
 from .team_manager_request import TeamManagerRequest
+from .job import Job
+from .report_artifact import ReportArtifact
+from .project_daily_snapshot import ProjectDailySnapshot
+from .item_status_fact import ItemStatusFact
+from .analytics_state import AnalyticsState
+from .activity_change import ActivityChange
+from .change_feed import ChangeFeed
+from .counter import Counter
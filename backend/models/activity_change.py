@@ -0,0 +1,17 @@
+from datetime import datetime
+from .db import db
+
+class ActivityChange(db.Model):
+    __tablename__ = 'activity_change'
+    __table_args__ = (
+        db.Index('ix_activity_change_item_field', 'item_id', 'field', 'changed_at'),
+        db.Index('ix_activity_change_user', 'user_id', 'changed_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    activity_log_id = db.Column(db.Integer, db.ForeignKey('activity_log.id'), index=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    field = db.Column(db.String(30), nullable=False)
+    old_value = db.Column(db.Text)
+    new_value = db.Column(db.Text)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,8 @@
+from datetime import datetime
+from .db import db
+
+class AnalyticsState(db.Model):
+    __tablename__ = 'analytics_state'
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,10 +1,14 @@
 from datetime import datetime
-from .db import db
+from .db import RANK_TYPE, db
 
 class BoardColumn(db.Model):
+    __table_args__ = (db.Index('ix_board_column_project_rank', 'project_id', 'rank'),)
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     order = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    rank = db.Column(RANK_TYPE)  # position on the board, see services/ranking.py
+    version = db.Column(db.Integer, nullable=False, server_default='1')  # see services/concurrency.py
+    __mapper_args__ = {'version_id_col': version}
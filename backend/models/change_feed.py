@@ -0,0 +1,19 @@
+from datetime import datetime
+from .db import db
+
+class ChangeFeed(db.Model):
+    __tablename__ = 'change_feed'
+    __table_args__ = (
+        db.Index('ix_change_feed_project_created', 'project_id', 'created_at'),
+        db.Index('ix_change_feed_user_created', 'user_id', 'created_at'),
+    )
+    # BIGINT on servers; SQLite only autoincrements an INTEGER primary key.
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # 'item', 'board_column', 'project_member', 'comment'
+    entity_id = db.Column(db.Integer, nullable=False)  # user_id for project_member
+    project_id = db.Column(db.Integer)  # no FK: rows outlive their project
+    op = db.Column(db.String(10), nullable=False)  # 'insert', 'update', 'delete'
+    version = db.Column(db.Integer)
+    # Item rows: one per user the item is assigned to or reported by, before or after the change.
+    user_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -0,0 +1,7 @@
+from .db import db
+
+class Counter(db.Model):
+    """Named high-water marks that only ever grow; advanced with UPDATE ... RETURNING."""
+    __tablename__ = 'counter'
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
@@ -1,3 +1,28 @@
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
 
-db = SQLAlchemy()
+class RoutingSession(Session):
+    """`db.session` class: SELECTs go to the engine in `g._db_replica`, if a request set one.
+
+    Once the request flushes or runs a bulk statement it reads from the
+    primary too; `services/replicas.py` picks the replica and reads the
+    `g._db_wrote` flag after the request.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                g._db_wrote = True
+            elif isinstance(clause, Select) and g.get('_db_replica') is not None and not g.get('_db_wrote'):
+                return g._db_replica
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Ranks (services/ranking.py) must compare byte-wise; PostgreSQL would
+# otherwise use the database's locale collation.
+RANK_TYPE = db.String(64).with_variant(postgresql.VARCHAR(64, collation='C'), 'postgresql')
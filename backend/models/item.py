@@ -1,5 +1,6 @@
 from datetime import datetime
-from .db import db
+from sqlalchemy import false, true
+from .db import RANK_TYPE, db
 
 class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -18,7 +19,22 @@ class Item(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     start_date = db.Column(db.DateTime)
-    parent_id = db.Column(db.Integer, db.ForeignKey('item.id'))  # For subtasks
+    parent_id = db.Column(db.Integer, db.ForeignKey('item.id'), index=True)  # For subtasks
     subtasks = db.relationship('Item', backref=db.backref('parent', remote_side=[id]), lazy='dynamic')
     activity_logs = db.relationship('ActivityLog', backref='item', lazy='dynamic')
     comments = db.relationship('Comment', backref='item', lazy='dynamic')
+    rank = db.Column(RANK_TYPE)  # position in the column, see services/ranking.py
+    version = db.Column(db.Integer, nullable=False, server_default='1')  # see services/concurrency.py
+    __mapper_args__ = {'version_id_col': version}
+    archived = db.Column(db.Boolean, nullable=False, default=False, server_default=false())  # see services/archive.py
+    archived_at = db.Column(db.DateTime)
+
+# The board and progress indexes cover active rows only, so they stay the
+# same size however many items are archived; archived rows are reached by
+# (project_id, archived_at), and by (column_id, rank) when ranking cards.
+_active = Item.archived == false()
+db.Index('ix_item_project_status', Item.project_id, Item.status, postgresql_where=_active, sqlite_where=_active)
+db.Index('ix_item_column_rank', Item.column_id, Item.rank, postgresql_where=_active, sqlite_where=_active)
+_archived = Item.archived == true()
+db.Index('ix_item_project_archived', Item.project_id, Item.archived_at, postgresql_where=_archived, sqlite_where=_archived)
+db.Index('ix_item_column_rank_archived', Item.column_id, Item.rank, postgresql_where=_archived, sqlite_where=_archived)
@@ -0,0 +1,10 @@
+from .db import db
+
+class ItemStatusFact(db.Model):
+    __tablename__ = 'item_status_fact'
+    __table_args__ = (db.Index('ix_item_status_fact_project_done', 'project_id', 'done_at'),)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    created_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)  # first move out of 'todo'
+    done_at = db.Column(db.DateTime)  # last move to 'done', cleared when reopened
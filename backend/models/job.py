@@ -0,0 +1,18 @@
+from datetime import datetime
+from .db import db
+
+class Job(db.Model):
+    __tablename__ = 'job'
+    __table_args__ = (db.Index('ix_job_status_finished_at', 'status', 'finished_at'),)
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)  # set with status done or failed
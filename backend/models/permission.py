@@ -5,6 +5,7 @@ class Permission(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     action = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(255), nullable=True)
+    bit = db.Column(db.Integer, unique=True)  # position in Role.permission_mask; assigned on insert, never reused
 
     def __repr__(self):
         return f'<Permission {self.action}>' 
\ No newline at end of file
@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import false, true
 from .db import db
 from .board_column import BoardColumn
 from .item import Item
@@ -15,3 +16,11 @@ class Project(db.Model):
     items = db.relationship('Item', backref='project', cascade='all, delete-orphan', lazy='dynamic')
     members = db.relationship('ProjectMember', backref='project', cascade='all, delete-orphan', lazy='dynamic')
     owner_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
+    archived = db.Column(db.Boolean, nullable=False, default=False, server_default=false())  # see services/archive.py
+    archived_at = db.Column(db.DateTime)
+
+# As for items, the archive filter's `archived = false` matches a partial index.
+_active = Project.archived == false()
+db.Index('ix_project_owner_team', Project.owner_team_id, postgresql_where=_active, sqlite_where=_active)
+_archived = Project.archived == true()
+db.Index('ix_project_archived', Project.archived_at, postgresql_where=_archived, sqlite_where=_archived)
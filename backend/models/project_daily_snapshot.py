@@ -0,0 +1,13 @@
+from datetime import datetime
+from .db import db
+
+class ProjectDailySnapshot(db.Model):
+    __tablename__ = 'project_daily_snapshot'
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    todo = db.Column(db.Integer, nullable=False, default=0)
+    inprogress = db.Column(db.Integer, nullable=False, default=0)
+    inreview = db.Column(db.Integer, nullable=False, default=0)
+    done = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,7 +1,6 @@
 from .db import db
 from .role import Role
 from datetime import datetime
-from models.team_member import TeamMember
 
 class ProjectMember(db.Model):
     __tablename__ = 'project_member'
@@ -12,30 +11,26 @@ class ProjectMember(db.Model):
 
 # Helper function to add a team as visitors to a project
 def add_team_as_project_visitors(project_id, team_id):
-    visitor_role = Role.query.filter_by(name='Project Visitor', scope='project').first()
+    from services.membership_sync import add_team_to_projects
+    from services.roles import role_catalog
+    visitor_role = role_catalog.find('Project Visitor', 'project')
     if not visitor_role:
         raise Exception('Project Visitor role not found')
-    team_members = TeamMember.query.filter_by(team_id=team_id).all()
-    added = 0
-    for tm in team_members:
-        if not ProjectMember.query.filter_by(project_id=project_id, user_id=tm.user_id).first():
-            pm = ProjectMember(project_id=project_id, user_id=tm.user_id, role_id=visitor_role.id)
-            db.session.add(pm)
-            added += 1
+    added = add_team_to_projects(team_id, [project_id], visitor_role.id)
     db.session.commit()
     return added
 
 # Helper function to remove all visitor members from a project
 
 def remove_all_project_visitors(project_id):
-    visitor_role = Role.query.filter_by(name='Project Visitor', scope='project').first()
+    from services.change_feed import record_bulk
+    from services.roles import role_catalog
+    visitor_role = role_catalog.find('Project Visitor', 'project')
     if not visitor_role:
         raise Exception('Project Visitor role not found')
-    visitors = ProjectMember.query.filter_by(project_id=project_id, role_id=visitor_role.id).all()
-    count = 0
-    for v in visitors:
-        db.session.delete(v)
-        count += 1
+    visitors = ProjectMember.query.filter_by(project_id=project_id, role_id=visitor_role.id)
+    record_bulk('project_member', 'delete', visitors.with_entities(ProjectMember.user_id, ProjectMember.project_id).statement)
+    count = visitors.delete(synchronize_session=False)
     db.session.commit()
     return count
 
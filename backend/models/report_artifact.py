@@ -0,0 +1,13 @@
+from datetime import datetime
+from .db import db
+
+class ReportArtifact(db.Model):
+    __tablename__ = 'report_artifact'
+    __table_args__ = (db.UniqueConstraint('project_id', 'format', 'data_version'),)
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    format = db.Column(db.String(10), nullable=False)  # json, csv
+    data_version = db.Column(db.String(64), nullable=False)
+    digest = db.Column(db.String(64), nullable=False, index=True)  # sha256 of content
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -10,6 +10,7 @@ class Role(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     scope = db.Column(db.String(20), nullable=False)  # 'firm', 'team', 'project'
+    permission_mask = db.Column(db.BigInteger, nullable=False, default=0)  # OR of 1 << Permission.bit
     permissions = db.relationship('Permission', secondary=role_permissions, backref='roles')
 
     def __repr__(self):
@@ -53,4 +53,14 @@ def add_visitor_team(project_id):
 @jwt_required()
 def remove_visitors_from_project(project_id):
     return admin_controller.remove_visitors_from_project(project_id)
- 
\ No newline at end of file
+ 
+
+@admin_bp.route('/admin/profiles', methods=['GET'])
+@jwt_required()
+def get_profiles():
+    return admin_controller.get_profiles()
+
+@admin_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+def download_profile(profile_id):
+    return admin_controller.download_profile(profile_id)
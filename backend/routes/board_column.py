@@ -1,5 +1,5 @@
 from flask import Blueprint
-from controllers.board_column_controller import get_columns, create_column, update_column, delete_column
+from controllers.board_column_controller import get_columns, create_column, update_column, move_column, delete_column, reorder_columns_in_project
 from flask_jwt_extended import jwt_required
 
 column_bp = Blueprint('column', __name__)
@@ -14,11 +14,21 @@ def get_columns_route(project_id):
 def create_column_route(project_id):
     return create_column(project_id)
 
+@column_bp.route('/projects/<int:project_id>/columns/order', methods=['PUT'])
+@jwt_required()
+def reorder_columns_route(project_id):
+    return reorder_columns_in_project(project_id)
+
 @column_bp.route('/columns/<int:column_id>', methods=['PATCH'])
 @jwt_required()
 def update_column_route(column_id):
     return update_column(column_id)
 
+@column_bp.route('/columns/<int:column_id>/move', methods=['POST'])
+@jwt_required()
+def move_column_route(column_id):
+    return move_column(column_id)
+
 @column_bp.route('/columns/<int:column_id>', methods=['DELETE'])
 @jwt_required()
 def delete_column_route(column_id):
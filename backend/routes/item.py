@@ -1,11 +1,9 @@
 from flask import Blueprint, make_response
-from controllers.item_controller import create_item, get_items, get_item, update_item, delete_item, get_subtasks, create_subtask, update_subtask, delete_subtask, get_activity_logs, get_recent_activity, get_my_tasks, add_comment, edit_comment
+from controllers.item_controller import create_item, get_items, get_item, update_item, move_item, delete_item, archive_item, restore_item, get_subtasks, create_subtask, update_subtask, delete_subtask, get_activity_logs, get_item_history, get_recent_activity, get_my_tasks, sync_my_tasks, add_comment, edit_comment
 from flask_jwt_extended import jwt_required
 
 item_bp = Blueprint('item', __name__)
 
-print(f"[ROUTE REGISTRATION] Registering get_items: {get_items}")
-
 @item_bp.route('/projects/<int:project_id>/items', methods=['POST'])
 @jwt_required()
 def create_item_route(project_id):
@@ -26,11 +24,26 @@ def get_item_route(item_id):
 def update_item_route(item_id):
     return update_item(item_id)
 
+@item_bp.route('/<int:item_id>/move', methods=['POST'])
+@jwt_required()
+def move_item_route(item_id):
+    return move_item(item_id)
+
 @item_bp.route('/<int:item_id>', methods=['DELETE'])
 @jwt_required()
 def delete_item_route(item_id):
     return delete_item(item_id)
 
+@item_bp.route('/<int:item_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_item_route(item_id):
+    return archive_item(item_id)
+
+@item_bp.route('/<int:item_id>/restore', methods=['POST'])
+@jwt_required()
+def restore_item_route(item_id):
+    return restore_item(item_id)
+
 @item_bp.route('/<int:item_id>', methods=['OPTIONS'])
 def options_item(item_id):
     response = make_response('', 200)
@@ -65,6 +78,11 @@ def delete_subtask_route(subtask_id):
 def get_activity_logs_route(item_id):
     return get_activity_logs(item_id)
 
+@item_bp.route('/<int:item_id>/history', methods=['GET'])
+@jwt_required()
+def get_item_history_route(item_id):
+    return get_item_history(item_id)
+
 @item_bp.route('/activity', methods=['GET'])
 @jwt_required()
 def get_recent_activity_route():
@@ -75,6 +93,11 @@ def get_recent_activity_route():
 def get_my_tasks_route():
     return get_my_tasks()
 
+@item_bp.route('/my-tasks/sync', methods=['GET'])
+@jwt_required()
+def sync_my_tasks_route():
+    return sync_my_tasks()
+
 @item_bp.route('/<int:item_id>/comments', methods=['POST'])
 @jwt_required()
 def add_comment_route(item_id):
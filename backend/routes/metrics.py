@@ -0,0 +1,14 @@
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+from controllers import metrics_controller
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    return metrics_controller.get_metrics()
+
+@metrics_bp.route('/metrics/queries', methods=['GET'])
+@jwt_required()
+def get_query_metrics():
+    return metrics_controller.get_query_metrics()
@@ -1,9 +1,14 @@
 from flask import Blueprint, request, jsonify
 from controllers.project_controller import create_project, get_projects, get_dashboard_stats, update_project, delete_project, transfer_ownership, get_project_progress, get_all_projects
+from controllers.project_controller import archive_project, restore_project
 from controllers.project_controller import get_project
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_cors import cross_origin
+from controllers.rbac import is_admin
+from models.db import db
+from models.project import Project
 from models.project_member import ProjectMember
+from services.roles import role_catalog
 
 projects_bp = Blueprint('projects', __name__)
 
@@ -11,7 +16,6 @@ projects_bp = Blueprint('projects', __name__)
 @jwt_required()
 def create_project_route():
     user_id = get_jwt_identity()
-    from controllers.rbac import is_admin
     if not is_admin(user_id):
         return jsonify({'error': 'Forbidden: Admins only'}), 403
     return create_project()
@@ -49,11 +53,20 @@ def update_project_route(project_id):
 @jwt_required()
 def delete_project_route(project_id):
     user_id = get_jwt_identity()
-    from controllers.rbac import is_admin
     if not is_admin(user_id):
         return jsonify({'error': 'Forbidden: Admins only'}), 403
     return delete_project(project_id)
 
+@projects_bp.route('/projects/<int:project_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_project_route(project_id):
+    return archive_project(project_id)
+
+@projects_bp.route('/projects/<int:project_id>/restore', methods=['POST'])
+@jwt_required()
+def restore_project_route(project_id):
+    return restore_project(project_id)
+
 @projects_bp.route('/projects/<int:project_id>/transfer-ownership', methods=['POST'])
 @jwt_required()
 def transfer_ownership_route(project_id):
@@ -64,19 +77,16 @@ def transfer_ownership_route(project_id):
 @jwt_required()
 def set_owner_team(project_id):
     user_id = get_jwt_identity()
-    from controllers.rbac import is_admin
     if not is_admin(user_id):
         return jsonify({'error': 'Forbidden: Admins only'}), 403
     if request.method == 'OPTIONS':
         return '', 200
     data = request.get_json()
     team_id = data.get('team_id')
-    from models.project import Project
     project = Project.query.get(project_id)
     if not project:
         return jsonify({'error': 'Project not found'}), 404
     project.owner_team_id = team_id
-    from models.db import db
     db.session.commit()
     return jsonify({'message': 'Owner team set', 'owner_team_id': team_id}), 200
 
@@ -84,17 +94,16 @@ def set_owner_team(project_id):
 @jwt_required()
 def get_my_project_permissions(project_id):
     user_id = get_jwt_identity()
-    member = ProjectMember.query.filter_by(user_id=user_id, project_id=project_id).first()
-    if not member or not member.role:
+    role_id = db.session.query(ProjectMember.role_id).filter_by(user_id=user_id, project_id=project_id).scalar()
+    role = role_catalog.get(role_id)
+    if not role:
         return jsonify({'permissions': [], 'role': None}), 200
-    perms = [p.action for p in member.role.permissions]
-    return jsonify({'permissions': perms, 'role': member.role.name}), 200
+    return jsonify({'permissions': sorted(role.permissions), 'role': role.name}), 200
 
 @projects_bp.route('/projects/all', methods=['GET', 'OPTIONS'])
 @cross_origin()
 @jwt_required()
 def get_projects_all_route():
-    from controllers.rbac import is_admin
     user_id = get_jwt_identity()
     if request.method == 'OPTIONS':
         return '', 200
@@ -1,5 +1,6 @@
 from flask import Blueprint
-from controllers.report_controller import get_project_report
+from controllers.report_controller import get_project_report, create_report_job, get_report_job
+from controllers.analytics_controller import create_snapshot, get_burndown, get_velocity, get_cycle_time
 from flask_jwt_extended import jwt_required
 
 reports_bp = Blueprint('reports', __name__)
@@ -7,4 +8,34 @@ reports_bp = Blueprint('reports', __name__)
 @reports_bp.route('/reports/project/<int:project_id>', methods=['GET'])
 @jwt_required()
 def project_report(project_id):
-    return get_project_report(project_id)
\ No newline at end of file
+    return get_project_report(project_id)
+
+@reports_bp.route('/reports/project/<int:project_id>/jobs', methods=['POST'])
+@jwt_required()
+def create_project_report_job(project_id):
+    return create_report_job(project_id)
+
+@reports_bp.route('/reports/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def report_job(job_id):
+    return get_report_job(job_id)
+
+@reports_bp.route('/reports/project/<int:project_id>/snapshots', methods=['POST'])
+@jwt_required()
+def project_snapshot(project_id):
+    return create_snapshot(project_id)
+
+@reports_bp.route('/reports/project/<int:project_id>/burndown', methods=['GET'])
+@jwt_required()
+def project_burndown(project_id):
+    return get_burndown(project_id)
+
+@reports_bp.route('/reports/project/<int:project_id>/velocity', methods=['GET'])
+@jwt_required()
+def project_velocity(project_id):
+    return get_velocity(project_id)
+
+@reports_bp.route('/reports/project/<int:project_id>/cycle-time', methods=['GET'])
+@jwt_required()
+def project_cycle_time(project_id):
+    return get_cycle_time(project_id)
@@ -1,10 +1,14 @@
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from flask import Blueprint, jsonify
 from models.user import User
 from models.team_member import TeamMember
-from models.role import Role
+from services.roles import role_catalog
 from controllers.rbac import is_admin
-from models.project_member import ProjectMember, ProjectJoinRequest
+from services.principal import revoke_user
+from services import deletion
+from models.project_member import ProjectMember
+from models.team import Team
+from models.project import Project
 from models.db import db
 
 user_bp = Blueprint('user', __name__)
@@ -16,14 +20,11 @@ def get_user(user_id):
     if not user:
         return jsonify({'error': 'User not found'}), 404
     # Get teams
-    from models.team_member import TeamMember
-    from models.team import Team
-    from models.role import Role
     team_memberships = TeamMember.query.filter_by(user_id=user_id).all()
     teams = []
     for tm in team_memberships:
         team = Team.query.get(tm.team_id)
-        role = Role.query.get(tm.role_id) if tm.role_id else None
+        role = role_catalog.get(tm.role_id)
         if team:
             teams.append({
                 'id': team.id,
@@ -33,13 +34,11 @@ def get_user(user_id):
                 'role': role.name if role else None
             })
     # Get projects
-    from models.project_member import ProjectMember
-    from models.project import Project
     project_memberships = ProjectMember.query.filter_by(user_id=user_id).all()
     projects = []
     for pm in project_memberships:
         project = Project.query.get(pm.project_id)
-        role = Role.query.get(pm.role_id) if pm.role_id else None
+        role = role_catalog.get(pm.role_id)
         if project:
             projects.append({
                 'id': project.id,
@@ -59,16 +58,12 @@ def get_user(user_id):
 @user_bp.route('/me/firm-permissions', methods=['GET'])
 @jwt_required()
 def get_my_firm_permissions():
-    user_id = get_jwt_identity()
-    # Find all firm-level roles for this user
-    firm_roles = TeamMember.query.filter_by(user_id=user_id).join(Role).filter(Role.scope == 'firm').all()
     permissions = set()
     roles = []
-    for membership in firm_roles:
-        if membership.role:
-            roles.append(membership.role.name)
-            for perm in membership.role.permissions:
-                permissions.add(perm.action)
+    firm_role = role_catalog.get(current_user.firm_role_id)
+    if firm_role:
+        roles.append(firm_role.name)
+        permissions.update(firm_role.permissions)
     return jsonify({'permissions': list(permissions), 'roles': roles}), 200
 
 @user_bp.route('/users/all', methods=['GET'])
@@ -96,11 +91,10 @@ def delete_user(user_id):
     user = User.query.get(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
-    # Remove from TeamMember, ProjectMember, ProjectJoinRequest
-    TeamMember.query.filter_by(user_id=user_id).delete()
-    ProjectMember.query.filter_by(user_id=user_id).delete()
-    ProjectJoinRequest.query.filter_by(user_id=user_id).delete()
-    # Remove the user
-    db.session.delete(user)
+    if user_id == int(current_user_id):
+        return jsonify({'error': 'Admins cannot delete their own account'}), 400
+    # Reported items, owned projects and teams, comments and activity move to the deleting admin.
+    deletion.delete_user(user_id, int(current_user_id))
     db.session.commit()
+    revoke_user(user_id)
     return jsonify({'message': 'User deleted'}), 200
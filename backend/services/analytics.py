@@ -0,0 +1,197 @@
+import re
+from datetime import date, datetime
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, exists, func, insert, select, update
+from models.db import db
+from models.activity_change import ActivityChange
+from models.activity_log import ActivityLog
+from models.analytics_state import AnalyticsState
+from models.item import Item
+from models.item_status_fact import ItemStatusFact
+from models.project import Project
+from models.project_daily_snapshot import ProjectDailySnapshot
+from services.jobs import jobs
+
+STATUSES = ('todo', 'inprogress', 'inreview', 'done')
+STARTED_STATUSES = {'inprogress', 'inreview', 'done'}
+LEGACY_CHANGE = re.compile(r'^(\w+): (.*) -> (.*)$')
+BATCH_SIZE = 5000
+# Activity change ids are taken at INSERT but become visible at COMMIT, so a
+# slow transaction can commit ids below the cursor; each run re-reads this
+# many ids below it. Replaying a transition is idempotent.
+REPLAY_WINDOW = 10000
+CURSOR_KEY = 'activity_change_id'
+
+def _get_cursor():
+    state = db.session.get(AnalyticsState, CURSOR_KEY)
+    return state.value if state else 0
+
+def _set_cursor(value):
+    state = db.session.get(AnalyticsState, CURSOR_KEY)
+    if state is None:
+        state = AnalyticsState(key=CURSOR_KEY)
+        db.session.add(state)
+    state.value = value
+
+def _status_transitions(after_id, up_to_id):
+    """Yield {item_id: [(changed_at, old, new), ...]} batches of recorded status changes."""
+    while after_id < up_to_id:
+        rows = db.session.query(
+            ActivityChange.id, ActivityChange.item_id, ActivityChange.old_value, ActivityChange.new_value, ActivityChange.changed_at
+        ).filter(
+            ActivityChange.id > after_id, ActivityChange.id <= up_to_id, ActivityChange.field == 'status'
+        ).order_by(ActivityChange.id).limit(BATCH_SIZE).all()
+        if not rows:
+            return
+        batch = {}
+        for row in rows:
+            batch.setdefault(row.item_id, []).append((row.changed_at, row.old_value, row.new_value))
+        yield batch
+        after_id = rows[-1].id
+
+def _apply_transitions(batch):
+    facts = ItemStatusFact.query.filter(ItemStatusFact.item_id.in_(list(batch))).all()
+    for fact in facts:
+        # Only a transition at or after the current done_at may move it, so
+        # replaying older rows (or seeing them late) never undoes a newer one.
+        for changed_at, old, new in sorted(batch[fact.item_id], key=lambda t: t[0]):
+            if new in STARTED_STATUSES and (fact.started_at is None or changed_at < fact.started_at):
+                fact.started_at = changed_at
+            if fact.done_at is not None and changed_at < fact.done_at:
+                continue
+            if new == 'done':
+                fact.done_at = changed_at
+            elif old == 'done':
+                fact.done_at = None
+    db.session.flush()
+
+def _item_value(column):
+    return select(column).where(Item.id == ItemStatusFact.item_id).scalar_subquery()
+
+def _transition_at(aggregate, statuses, fallback):
+    # Earliest/latest recorded transition of the item into `statuses`, else the item's `fallback` column.
+    return func.coalesce(select(aggregate(ActivityChange.changed_at)).where(
+        ActivityChange.item_id == ItemStatusFact.item_id, ActivityChange.field == 'status',
+        ActivityChange.new_value.in_(sorted(statuses))
+    ).scalar_subquery(), _item_value(fallback))
+
+def refresh_item_facts():
+    """Bring item_status_fact up to date with items and activity logged since the last run."""
+    new_items = select(Item.id, Item.project_id, Item.created_at).where(
+        ~exists().where(ItemStatusFact.item_id == Item.id)
+    )
+    created = db.session.execute(
+        insert(ItemStatusFact).from_select(['item_id', 'project_id', 'created_at'], new_items)
+    ).rowcount
+    cursor = _get_cursor()
+    high = db.session.query(func.max(ActivityChange.id)).scalar() or 0
+    for batch in _status_transitions(max(cursor - REPLAY_WINDOW, 0), high):
+        _apply_transitions(batch)
+    _set_cursor(max(cursor, high))
+    # Reconcile items whose status changed without a logged transition.
+    db.session.execute(
+        update(ItemStatusFact).where(
+            ItemStatusFact.started_at.is_(None),
+            ItemStatusFact.item_id.in_(select(Item.id).where(Item.status.in_(STARTED_STATUSES)))
+        ).values(started_at=_transition_at(func.min, STARTED_STATUSES, Item.created_at)).execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(ItemStatusFact).where(
+            ItemStatusFact.done_at.is_(None),
+            ItemStatusFact.item_id.in_(select(Item.id).where(Item.status == 'done'))
+        ).values(done_at=_transition_at(func.max, ['done'], Item.updated_at)).execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(ItemStatusFact).where(
+            ItemStatusFact.done_at.is_not(None),
+            ItemStatusFact.item_id.in_(select(Item.id).where(Item.status != 'done'))
+        ).values(done_at=None).execution_options(synchronize_session=False)
+    )
+    return {'new_items': created, 'activity_change_cursor': max(cursor, high)}
+
+def parse_legacy_details(details):
+    """Split a legacy "field: old -> new; ..." details string into (field, old, new) tuples."""
+    changes = []
+    for part in (details or '').split('; '):
+        match = LEGACY_CHANGE.match(part)
+        if match:
+            field, old, new = match.groups()
+            changes.append((field, None if old == 'None' else old, None if new == 'None' else new))
+    return changes
+
+def backfill_activity_changes():
+    """Create activity_change rows for 'updated' logs written before structured changes existed."""
+    created = 0
+    after_id = 0
+    while True:
+        logs = db.session.query(ActivityLog.id, ActivityLog.item_id, ActivityLog.user_id, ActivityLog.details, ActivityLog.created_at).filter(
+            ActivityLog.id > after_id, ActivityLog.action == 'updated',
+            ~exists().where(ActivityChange.activity_log_id == ActivityLog.id)
+        ).order_by(ActivityLog.id).limit(BATCH_SIZE).all()
+        if not logs:
+            return created
+        rows = [{
+            'activity_log_id': log.id,
+            'item_id': log.item_id,
+            'user_id': log.user_id,
+            'field': field,
+            'old_value': old,
+            'new_value': new,
+            'changed_at': log.created_at,
+        } for log in logs for field, old, new in parse_legacy_details(log.details)]
+        if rows:
+            db.session.execute(insert(ActivityChange), rows)
+        created += len(rows)
+        after_id = logs[-1].id
+
+def snapshot_projects(day=None, project_ids=None):
+    """Write one project_daily_snapshot row per project for `day` (default: today, UTC)."""
+    day = day or datetime.utcnow().date()
+    counts = db.session.query(Item.project_id, Item.status, func.count()).group_by(Item.project_id, Item.status)
+    projects = db.session.query(Project.id)
+    if project_ids is not None:
+        counts = counts.filter(Item.project_id.in_(project_ids))
+        projects = projects.filter(Project.id.in_(project_ids))
+    rows = {pid: {'project_id': pid, 'day': day, 'todo': 0, 'inprogress': 0, 'inreview': 0, 'done': 0, 'total': 0}
+            for (pid,) in projects}
+    for project_id, status, count in counts:
+        row = rows.get(project_id)
+        if row is None:
+            continue
+        if status in STATUSES:
+            row[status] = count
+        row['total'] += count
+    stale = delete(ProjectDailySnapshot).where(ProjectDailySnapshot.day == day)
+    if project_ids is not None:
+        stale = stale.where(ProjectDailySnapshot.project_id.in_(project_ids))
+    db.session.execute(stale)
+    if rows:
+        db.session.execute(insert(ProjectDailySnapshot), list(rows.values()))
+    return len(rows)
+
+@jobs.task('analytics_snapshot')
+def run_snapshot(day=None, project_ids=None):
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    result = refresh_item_facts()
+    result['projects'] = snapshot_projects(day, project_ids)
+    return result
+
+analytics_cli = AppGroup('analytics', help='Historical analytics pipeline.')
+
+@analytics_cli.command('snapshot')
+@click.option('--day', default=None, help='Snapshot date (YYYY-MM-DD), defaults to today (UTC).')
+def snapshot_command(day):
+    """Aggregate daily project snapshots and item status facts (run nightly)."""
+    result = run_snapshot(day)
+    db.session.commit()
+    click.echo(f"Snapshotted {result['projects']} projects, {result['new_items']} new items, "
+               f"activity change cursor at {result['activity_change_cursor']}.")
+
+@analytics_cli.command('backfill-changes')
+def backfill_changes_command():
+    """Convert legacy free-text activity log details into activity_change rows."""
+    created = backfill_activity_changes()
+    db.session.commit()
+    click.echo(f'Created {created} activity changes.')
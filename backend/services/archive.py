@@ -0,0 +1,76 @@
+"""Archived projects and items.
+
+Archiving sets `archived` and `archived_at` instead of deleting. A project
+archives its active items with its own `archived_at`, an item its subtasks,
+so a restore brings back exactly the rows archived together and leaves
+items archived earlier on their own alone.
+
+Every ORM SELECT gets `archived = false` for Item and Project through
+`with_loader_criteria`, so existing read paths skip archived rows without
+changes and match the partial (`WHERE archived = false`) item indexes; pass
+the execution option `include_archived=True` (`INCLUDE_ARCHIVED`) to see
+them. Bulk UPDATE/DELETE statements, INSERT ... SELECT and Core connection
+queries are not filtered.
+"""
+from datetime import datetime
+from sqlalchemy import event, false, or_, select, true, update
+from sqlalchemy.orm import Session, with_loader_criteria
+from models.db import db
+from models.item import Item
+from models.project import Project
+from services.change_feed import record_bulk
+
+INCLUDE_ARCHIVED = {'include_archived': True}
+
+@event.listens_for(Session, 'do_orm_execute')
+def _hide_archived(state):
+    # Lazy and column loads inherit the criteria of the query that loaded the parent.
+    if (state.is_select and not state.is_column_load and not state.is_relationship_load
+            and not state.execution_options.get('include_archived', False)):
+        state.statement = state.statement.options(
+            with_loader_criteria(Item, lambda cls: cls.archived == false(), include_aliases=True),
+            with_loader_criteria(Project, lambda cls: cls.archived == false(), include_aliases=True))
+
+def get_archived(model, row_id):
+    """The `model` row `row_id` if it exists and is archived, else None."""
+    row = db.session.get(model, row_id, execution_options=INCLUDE_ARCHIVED)
+    return row if row is not None and row.archived else None
+
+def _set_items(where, **values):
+    table = Item.__table__
+    record_bulk('item', 'update', select(table.c.id, table.c.project_id).where(where))
+    return db.session.execute(update(table).where(where).values(version=table.c.version + 1, **values),
+                              execution_options={'synchronize_session': False}).rowcount
+
+def _item_tree(item_id):
+    table = Item.__table__
+    return or_(table.c.id == item_id, table.c.parent_id == item_id)
+
+def archive_project(project):
+    """Archive `project` and its active items; returns the number of items archived."""
+    now = datetime.utcnow()
+    table = Item.__table__
+    count = _set_items((table.c.project_id == project.id) & (table.c.archived == false()),
+                       archived=True, archived_at=now)
+    project.archived, project.archived_at = True, now
+    return count
+
+def restore_project(project):
+    """Restore `project` and the items archived with it; returns the number of items restored."""
+    table = Item.__table__
+    count = _set_items((table.c.project_id == project.id) & (table.c.archived == true())
+                       & (table.c.archived_at == project.archived_at), archived=False, archived_at=None)
+    project.archived, project.archived_at = False, None
+    return count
+
+def archive_item(item):
+    """Archive `item` and its active subtasks; returns the number of items archived."""
+    table = Item.__table__
+    return _set_items(_item_tree(item.id) & (table.c.archived == false()),
+                      archived=True, archived_at=datetime.utcnow())
+
+def restore_item(item):
+    """Restore `item` and the subtasks archived with it; returns the number of items restored."""
+    table = Item.__table__
+    return _set_items(_item_tree(item.id) & (table.c.archived == true()) & (table.c.archived_at == item.archived_at),
+                      archived=False, archived_at=None)
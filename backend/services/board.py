@@ -0,0 +1,76 @@
+"""Set-based board column operations.
+
+Reordering a board and deleting a column that still holds cards touch every
+column of the board, or every card of the column; each is done with a
+constant number of statements (a CASE update, INSERT ... SELECT, one bulk
+UPDATE) instead of one per row. Like `services/membership_sync.py`, nothing
+is committed and the change feed is written with `record_bulk` first.
+"""
+from datetime import datetime
+from sqlalchemy import case, func, insert, literal, select, update
+from models.db import db
+from models.activity_change import ActivityChange
+from models.activity_log import ActivityLog
+from models.board_column import BoardColumn
+from models.item import Item
+from services.archive import INCLUDE_ARCHIVED
+from services.change_feed import record_bulk
+from services.ranking import rank_after, schedule_rebalance, spread
+
+def reorder_columns(project_id, column_ids):
+    """Put the columns of `project_id` in the order of `column_ids`, which must list each exactly once.
+
+    Sets `order` to the list position and respaces `rank` in one UPDATE;
+    returns False (and writes nothing) if `column_ids` does not match the board.
+    """
+    existing = set(db.session.scalars(select(BoardColumn.id).where(BoardColumn.project_id == project_id)))
+    if len(column_ids) != len(existing) or set(column_ids) != existing:
+        return False
+    table = BoardColumn.__table__
+    record_bulk('board_column', 'update', select(table.c.id, table.c.project_id).where(table.c.project_id == project_id))
+    db.session.execute(update(table).where(table.c.project_id == project_id).values(
+        order=case({column_id: position for position, column_id in enumerate(column_ids)}, value=table.c.id),
+        rank=case(dict(zip(column_ids, spread(len(column_ids)))), value=table.c.id),
+        version=table.c.version + 1,
+    ))
+    return True
+
+def card_count(column_id):
+    # Archived cards still reference the column.
+    return db.session.scalar(select(func.count(Item.id)).where(Item.column_id == column_id),
+                             execution_options=INCLUDE_ARCHIVED)
+
+def move_cards(source_id, target_id, user_id):
+    """Move every card of column `source_id`, archived ones included, to the end of `target_id`, keeping their order.
+
+    One `updated` activity log per card is written with INSERT ... SELECT
+    ... RETURNING, and its `column_id` activity change with one executemany
+    INSERT keyed by the returned log ids. Returns the number of cards moved.
+    """
+    count, longest = db.session.execute(
+        select(func.count(Item.id), func.max(func.length(Item.rank))).where(Item.column_id == source_id),
+        execution_options=INCLUDE_ARCHIVED).one()
+    if not count:
+        return 0
+    now = datetime.utcnow()
+    details = f'column_id: {source_id} -> {target_id}'
+    cards = select(Item.id, Item.project_id).where(Item.column_id == source_id)
+    record_bulk('item', 'update', cards)
+    logs = db.session.execute(insert(ActivityLog).from_select(
+        ['item_id', 'user_id', 'action', 'details', 'created_at'],
+        select(Item.id, literal(user_id), literal('updated'), literal(details), literal(now))
+        .where(Item.column_id == source_id)).returning(ActivityLog.id, ActivityLog.item_id),
+        execution_options=INCLUDE_ARCHIVED).all()
+    db.session.execute(insert(ActivityChange), [{
+        'activity_log_id': log_id, 'item_id': item_id, 'user_id': user_id, 'field': 'column_id',
+        'old_value': str(source_id), 'new_value': str(target_id), 'changed_at': now,
+    } for log_id, item_id in logs])
+    # Prefixing every moved rank with a key after the target's last card
+    # appends them in their existing order; unranked cards stay unranked.
+    prefix = rank_after(db.session.scalar(select(func.max(Item.rank)).where(Item.column_id == target_id),
+                                          execution_options=INCLUDE_ARCHIVED))
+    table = Item.__table__
+    db.session.execute(update(table).where(table.c.column_id == source_id).values(
+        column_id=target_id, rank=literal(prefix) + table.c.rank, version=table.c.version + 1, updated_at=now))
+    schedule_rebalance(len(prefix) + (longest or 0), column_id=target_id)
+    return count
@@ -0,0 +1,528 @@
+import csv
+import io
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from datetime import date, datetime, timezone
+import click
+from flask.cli import AppGroup
+from sqlalchemy import and_, bindparam, exists, func, insert, literal, select, text, update
+from werkzeug.security import generate_password_hash
+from models.db import db
+from models.board_column import BoardColumn
+from models.comment import Comment
+from models.item import Item
+from models.project import Project
+from models.project_member import ProjectMember
+from models.role import Role
+from models.team import Team
+from models.team_member import TeamMember
+from models.user import User
+from services.archive import INCLUDE_ARCHIVED
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+DEFAULT_COLUMNS = ('To Do', 'In Progress', 'In Review', 'Done')
+STATUSES = ('todo', 'inprogress', 'inreview', 'done')
+ENTITIES = ('users', 'teams', 'projects', 'items', 'comments')
+LOCAL_PREFIX = 'local:'  # marks an item reference as an id already in the database
+
+# Accepted source columns per field, compared case- and punctuation-insensitively;
+# the later aliases match a Jira CSV export.
+FIELDS = {
+    'users': {
+        'id': ('id', 'user id', 'account id'),
+        'username': ('username', 'user name', 'name', 'display name', 'full name'),
+        'email': ('email', 'email address'),
+    },
+    'teams': {
+        'id': ('id', 'team id'),
+        'name': ('name', 'team', 'team name'),
+        'description': ('description',),
+        'manager': ('manager', 'manager email', 'lead'),
+        'members': ('members',),
+    },
+    'projects': {
+        'id': ('id', 'key', 'project key'),
+        'name': ('name', 'project name'),
+        'description': ('description', 'project description'),
+        'owner': ('owner', 'owner email', 'project lead'),
+        'team': ('team', 'owner team', 'team name'),
+    },
+    'items': {
+        'id': ('id', 'key', 'issue key', 'issue id'),
+        'title': ('title', 'summary'),
+        'description': ('description',),
+        'type': ('type', 'issue type'),
+        'status': ('status', 'status category'),
+        'project': ('project', 'project key', 'project name'),
+        'reporter': ('reporter', 'creator'),
+        'assignee': ('assignee',),
+        'priority': ('priority',),
+        'due_date': ('due_date', 'due date', 'due'),
+        'created_at': ('created_at', 'created'),
+        'updated_at': ('updated_at', 'updated'),
+        'parent': ('parent', 'parent id', 'parent key'),
+    },
+    'comments': {
+        'item': ('item', 'item id', 'issue key', 'issue id', 'key'),
+        'author': ('author', 'user', 'comment author'),
+        'content': ('content', 'body', 'comment', 'comment body'),
+        'created_at': ('created_at', 'created', 'comment date'),
+    },
+}
+
+TYPE_ALIASES = {'task': 'task', 'sub-task': 'task', 'subtask': 'task', 'bug': 'bug', 'epic': 'epic',
+                'feature': 'feature', 'story': 'feature', 'improvement': 'feature', 'new feature': 'feature'}
+STATUS_ALIASES = {'todo': 'todo', 'to do': 'todo', 'open': 'todo', 'backlog': 'todo', 'selected for development': 'todo',
+                  'reopened': 'todo', 'inprogress': 'inprogress', 'in progress': 'inprogress',
+                  'inreview': 'inreview', 'in review': 'inreview', 'review': 'inreview', 'code review': 'inreview',
+                  'done': 'done', 'closed': 'done', 'resolved': 'done'}
+PRIORITY_ALIASES = {'highest': 'Critical', 'critical': 'Critical', 'blocker': 'Critical', 'high': 'High',
+                    'major': 'High', 'medium': 'Medium', 'low': 'Low', 'minor': 'Low', 'lowest': 'Low', 'trivial': 'Low'}
+DATETIME_FORMATS = ('%d/%b/%y %I:%M %p', '%d/%b/%Y %I:%M %p', '%Y-%m-%d %H:%M', '%d/%m/%Y', '%m/%d/%Y')
+
+def _normalize(name):
+    return re.sub(r'[^a-z0-9]', '', (name or '').lower())
+
+def read_records(path, fmt=None):
+    """Stream dict records from a CSV or NDJSON file (format picked from the extension by default)."""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def parse_datetime(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value / 1000 if value > 1e11 else value)
+    value = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+    except ValueError:
+        pass
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f'Unrecognised date: {value!r}')
+
+class BulkWriter:
+    """Writes homogeneous row dicts in batches: COPY on PostgreSQL, executemany elsewhere.
+
+    Primary keys are allocated up front from MAX(id), so callers can build
+    foreign keys in memory; `sync_sequences()` moves PostgreSQL sequences past
+    them afterwards. Run imports while nothing else writes to the same tables.
+    """
+
+    def __init__(self, session, batch_size=BATCH_SIZE):
+        self.session = session
+        self.batch_size = batch_size
+        self.use_copy = session.get_bind().dialect.name == 'postgresql'
+        self._next_ids = {}
+
+    def reserve_ids(self, model, count):
+        """Reserve `count` consecutive primary keys for `model` and return the first."""
+        if model not in self._next_ids:
+            self._next_ids[model] = (self.session.query(func.max(model.id)).scalar() or 0) + 1
+        first = self._next_ids[model]
+        self._next_ids[model] = first + count
+        return first
+
+    def allocate_id(self, model):
+        return self.reserve_ids(model, 1)
+
+    def write(self, model, rows):
+        batch = []
+        count = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                count += self._flush(model, batch)
+                batch = []
+        if batch:
+            count += self._flush(model, batch)
+        return count
+
+    def _flush(self, model, batch):
+        if self.use_copy:
+            self._copy(model.__table__.name, list(batch[0]), batch)
+        else:
+            self.session.execute(insert(model), batch)
+        return len(batch)
+
+    def _copy(self, table, columns, batch):
+        buffer = io.StringIO()
+        for row in batch:
+            buffer.write(','.join(_copy_value(row[c]) for c in columns))
+            buffer.write('\n')
+        buffer.seek(0)
+        column_list = ', '.join(f'"{c}"' for c in columns)
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY "{table}" ({column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            cursor.close()
+
+    def sync_sequences(self, models):
+        if self.session.get_bind().dialect.name != 'postgresql':
+            return
+        for model in models:
+            table = model.__table__.name
+            self.session.execute(text(
+                f"""SELECT setval(pg_get_serial_sequence('"{table}"', 'id'), COALESCE((SELECT MAX(id) FROM "{table}"), 1))"""
+            ))
+
+def _copy_value(value):
+    # In COPY's CSV format an unquoted empty field is NULL and "" is an empty string.
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+class Importer:
+    """Streams records into the database, remapping source ids to new primary keys.
+
+    References (owners, assignees, projects, parents, ...) resolve against ids
+    imported earlier in the same run first, then against natural keys that
+    already exist: user email or username, team name, project name. Items
+    have no natural key; `local:<id>` names an item already in the database.
+    """
+
+    def __init__(self, session=None, batch_size=BATCH_SIZE):
+        self.session = session or db.session
+        self.writer = BulkWriter(self.session, batch_size)
+        self.now = datetime.utcnow()
+        self.roles = {name: role_id for role_id, name in self.session.query(Role.id, Role.name)}
+        self.users, self.teams, self.projects, self.items = {}, {}, {}, {}
+        for user_id, email, username in self.session.query(User.id, User.email, User.username):
+            self.users[_normalize_key(email)] = user_id
+            self.users.setdefault(_normalize_key(username), user_id)
+        self.team_managers = {}
+        for team_id, name, manager_id in self.session.query(Team.id, Team.name, Team.manager_id):
+            self.teams[_normalize_key(name)] = team_id
+            self.team_managers[team_id] = manager_id
+        for project_id, name in self.session.query(Project.id, Project.name):
+            self.projects[_normalize_key(name)] = project_id
+        self.columns = {}
+        for column_id, project_id in self.session.query(BoardColumn.id, BoardColumn.project_id).order_by(BoardColumn.order):
+            self.columns.setdefault(project_id, []).append(column_id)
+        self.stats = {}
+        self._password_hash = None
+
+    def _fields(self, entity, record):
+        normalized = {_normalize(k): v for k, v in record.items()}
+        values = {}
+        for field, aliases in FIELDS[entity].items():
+            for alias in aliases:
+                value = normalized.get(_normalize(alias))
+                if value not in (None, ''):
+                    values[field] = value.strip() if isinstance(value, str) else value
+                    break
+        return values
+
+    def _rows(self, entity, records, build):
+        # `build` returns a row, None for records that already exist, or raises
+        # ValueError for records that cannot be imported.
+        stats = self.stats.setdefault(entity, {'imported': 0, 'existing': 0, 'skipped': 0})
+        for n, record in enumerate(records, 1):
+            try:
+                row = build(self._fields(entity, record))
+            except ValueError as e:
+                stats['skipped'] += 1
+                if stats['skipped'] <= 20:
+                    logger.warning('[import] %s record %s skipped: %s', entity, n, e)
+                continue
+            if row is None:
+                stats['existing'] += 1
+                continue
+            stats['imported'] += 1
+            yield row
+
+    def _remember(self, mapping, fields, new_id, *natural_keys):
+        if 'id' in fields:
+            mapping[('id', str(fields['id']))] = new_id
+        for key in natural_keys:
+            if key:
+                mapping[_normalize_key(key)] = new_id
+
+    def _resolve(self, mapping, value, required=None):
+        if value in (None, ''):
+            if required:
+                raise ValueError(f'missing {required}')
+            return None
+        found = mapping.get(('id', str(value)))
+        if found is None:
+            found = mapping.get(_normalize_key(value))
+        if found is None and required:
+            raise ValueError(f'unknown {required} {value!r}')
+        return found
+
+    def _resolve_item(self, value, required=None):
+        # Numeric source ids (Jira issue ids) would collide with local ids, so
+        # only `local:<id>` references items already in the database.
+        if isinstance(value, str) and value.lower().startswith(LOCAL_PREFIX):
+            local_id = value[len(LOCAL_PREFIX):].strip()
+            found = None
+            if local_id.isdigit():
+                found = self.session.scalar(select(Item.id).where(Item.id == int(local_id)),
+                                            execution_options=INCLUDE_ARCHIVED)
+            if found is None and required:
+                raise ValueError(f'unknown {required} {value!r}')
+            return found
+        return self._resolve(self.items, value, required)
+
+    def import_users(self, records):
+        if self._password_hash is None:
+            # Imported accounts get an unguessable password and must reset it.
+            self._password_hash = generate_password_hash(secrets.token_urlsafe(32))
+
+        def build(fields):
+            email = fields.get('email')
+            username = fields.get('username') or (email.split('@')[0] if email else None)
+            if not email or not username:
+                raise ValueError('email is required')
+            existing = self.users.get(_normalize_key(email))
+            if existing is not None:
+                self._remember(self.users, fields, existing)
+                return None
+            if _normalize_key(username) in self.users:
+                username = f'{username}-{secrets.token_hex(3)}'
+            user_id = self.writer.allocate_id(User)
+            self._remember(self.users, fields, user_id, email, username)
+            return {'id': user_id, 'username': username, 'email': email, 'password_hash': self._password_hash,
+                    'created_at': self.now, 'updated_at': self.now}
+
+        return self.writer.write(User, self._rows('users', records, build))
+
+    def import_teams(self, records):
+        memberships = []
+
+        def build(fields):
+            name = fields.get('name')
+            if not name:
+                raise ValueError('name is required')
+            if _normalize_key(name) in self.teams:
+                self._remember(self.teams, fields, self.teams[_normalize_key(name)])
+                return None
+            manager_id = self._resolve(self.users, fields.get('manager'), required='manager')
+            team_id = self.writer.allocate_id(Team)
+            self._remember(self.teams, fields, team_id, name)
+            self.team_managers[team_id] = manager_id
+            memberships.append({'team_id': team_id, 'user_id': manager_id, 'role_id': self.roles['Team Manager']})
+            for member in re.split(r'[;|]', fields.get('members') or ''):
+                user_id = self._resolve(self.users, member.strip())
+                if user_id and user_id != manager_id:
+                    memberships.append({'team_id': team_id, 'user_id': user_id, 'role_id': self.roles['Team Member']})
+            return {'id': team_id, 'name': name, 'description': fields.get('description'), 'manager_id': manager_id,
+                    'created_at': self.now, 'updated_at': self.now}
+
+        count = self.writer.write(Team, self._rows('teams', records, build))
+        self.writer.write(TeamMember, _unique(memberships, ('team_id', 'user_id')))
+        return count
+
+    def import_projects(self, records):
+        columns, members = [], []
+
+        def build(fields):
+            name = fields.get('name') or fields.get('id')
+            if not name:
+                raise ValueError('name is required')
+            if _normalize_key(name) in self.projects:
+                self._remember(self.projects, fields, self.projects[_normalize_key(name)])
+                return None
+            team_id = self._resolve(self.teams, fields.get('team'))
+            owner_id = self._resolve(self.users, fields.get('owner'))
+            if owner_id is None:
+                owner_id = self.team_managers.get(team_id)
+            if owner_id is None:
+                raise ValueError('owner or team is required')
+            project_id = self.writer.allocate_id(Project)
+            self._remember(self.projects, fields, project_id, name)
+            self.columns[project_id] = []
+            for order, column_name in enumerate(DEFAULT_COLUMNS):
+                column_id = self.writer.allocate_id(BoardColumn)
+                self.columns[project_id].append(column_id)
+                columns.append({'id': column_id, 'name': column_name, 'project_id': project_id, 'order': order,
+                                'created_at': self.now, 'updated_at': self.now})
+            members.append({'project_id': project_id, 'user_id': owner_id, 'role_id': self.roles['Project Owner']})
+            return {'id': project_id, 'name': name, 'description': fields.get('description'), 'owner_id': owner_id,
+                    'owner_team_id': team_id, 'created_at': self.now, 'updated_at': self.now}
+
+        count = self.writer.write(Project, self._rows('projects', records, build))
+        self.writer.write(BoardColumn, columns)
+        self.writer.write(ProjectMember, members)
+        if count:
+            # The owning team's other members contribute, as in create_project.
+            first_id = members[0]['project_id']
+            self.session.execute(insert(ProjectMember).from_select(
+                ['project_id', 'user_id', 'role_id'],
+                select(Project.id, TeamMember.user_id, literal(self.roles['Project Contributor']))
+                .join(TeamMember, TeamMember.team_id == Project.owner_team_id)
+                .where(Project.id >= first_id, ~exists().where(and_(
+                    ProjectMember.project_id == Project.id, ProjectMember.user_id == TeamMember.user_id)))
+            ))
+        return count
+
+    def import_items(self, records):
+        parents = []
+        memberships = {}
+
+        def build(fields):
+            project_id = self._resolve(self.projects, fields.get('project'), required='project')
+            columns = self.columns.get(project_id)
+            if not columns:
+                raise ValueError(f'project {project_id} has no board columns')
+            status = STATUS_ALIASES.get((fields.get('status') or 'todo').lower())
+            if status is None:
+                raise ValueError(f"unknown status {fields['status']!r}")
+            reporter_id = self._resolve(self.users, fields.get('reporter'), required='reporter')
+            assignee_id = self._resolve(self.users, fields.get('assignee'))
+            item_id = self.writer.allocate_id(Item)
+            self._remember(self.items, fields, item_id)
+            if fields.get('parent'):
+                parents.append((item_id, fields['parent']))
+            for user_id in (reporter_id, assignee_id):
+                if user_id:
+                    memberships.setdefault((project_id, user_id), None)
+            created_at = parse_datetime(fields.get('created_at')) or self.now
+            due = parse_datetime(fields.get('due_date'))
+            return {
+                'id': item_id,
+                'title': (fields.get('title') or 'Untitled')[:120],
+                'description': fields.get('description'),
+                'type': TYPE_ALIASES.get((fields.get('type') or 'task').lower(), 'task'),
+                'status': status,
+                'column_id': columns[min(STATUSES.index(status), len(columns) - 1)],
+                'project_id': project_id,
+                'reporter_id': reporter_id,
+                'assignee_id': assignee_id,
+                'priority': PRIORITY_ALIASES.get((fields.get('priority') or '').lower()),
+                'due_date': due.date() if due else None,
+                'created_at': created_at,
+                'updated_at': parse_datetime(fields.get('updated_at')) or created_at,
+                'parent_id': None,
+            }
+
+        count = self.writer.write(Item, self._rows('items', records, build))
+        # Parents may appear after their subtasks in the file, so link them afterwards.
+        links, unresolved = [], 0
+        for child, parent in parents:
+            parent_id = self._resolve_item(parent)
+            if parent_id:
+                links.append({'child_id': child, 'parent': parent_id})
+                continue
+            unresolved += 1
+            if unresolved <= 20:
+                logger.warning('[import] item %s left without its unknown parent %r', child, parent)
+        self.stats['items']['unresolved'] = self.stats['items'].get('unresolved', 0) + unresolved
+        table = Item.__table__
+        for start in range(0, len(links), self.writer.batch_size):
+            self.session.execute(
+                update(table).where(table.c.id == bindparam('child_id'))
+                .values(parent_id=bindparam('parent'), updated_at=table.c.updated_at),
+                links[start:start + self.writer.batch_size]
+            )
+        self._add_contributors(memberships)
+        return count
+
+    def _add_contributors(self, pairs):
+        # Reporters and assignees of imported items must be able to see them.
+        if not pairs:
+            return
+        project_ids = {project_id for project_id, _ in pairs}
+        existing = set(self.session.query(ProjectMember.project_id, ProjectMember.user_id)
+                       .filter(ProjectMember.project_id.in_(project_ids)))
+        self.writer.write(ProjectMember, [
+            {'project_id': project_id, 'user_id': user_id, 'role_id': self.roles['Project Contributor']}
+            for project_id, user_id in pairs if (project_id, user_id) not in existing
+        ])
+
+    def import_comments(self, records):
+        def build(fields):
+            item_id = self._resolve_item(fields.get('item'), required='item')
+            author_id = self._resolve(self.users, fields.get('author'), required='author')
+            if not fields.get('content'):
+                raise ValueError('content is required')
+            return {'id': self.writer.allocate_id(Comment), 'item_id': item_id, 'user_id': author_id,
+                    'content': fields['content'], 'created_at': parse_datetime(fields.get('created_at')) or self.now}
+
+        return self.writer.write(Comment, self._rows('comments', records, build))
+
+    def finish(self):
+        self.writer.sync_sequences([User, Team, Project, BoardColumn, Item, Comment])
+        self.session.commit()
+        return self.stats
+
+def _normalize_key(value):
+    return ('key', str(value).strip().lower())
+
+def _unique(rows, key):
+    seen = set()
+    for row in rows:
+        k = tuple(row[c] for c in key)
+        if k not in seen:
+            seen.add(k)
+            yield row
+
+def _summary(entity, stats):
+    summary = f"{entity}: imported {stats['imported']}, already present {stats['existing']}, skipped {stats['skipped']}"
+    if stats.get('unresolved'):
+        summary += f", unknown parent {stats['unresolved']}"
+    return summary
+
+import_cli = AppGroup('import', help='Bulk import users, teams, projects, items and comments from CSV or NDJSON.')
+
+def _run(entity, path, fmt, batch_size):
+    started = time.perf_counter()
+    importer = Importer(batch_size=batch_size)
+    getattr(importer, f'import_{entity}')(read_records(path, fmt))
+    stats = importer.finish()[entity]
+    click.echo(f'{_summary(entity, stats)} ({time.perf_counter() - started:.1f}s)')
+
+def _entity_command(entity):
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+                  help='Input format; defaults to the file extension.')
+    @click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+    def command(path, fmt, batch_size):
+        _run(entity, path, fmt, batch_size)
+    command.__doc__ = f'Import {entity} from a CSV or NDJSON file.'
+    import_cli.command(entity)(command)
+
+for _entity in ENTITIES:
+    _entity_command(_entity)
+
+@import_cli.command('bundle')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+def bundle_command(directory, batch_size):
+    """Import <entity>.csv / <entity>.ndjson files from DIRECTORY in one run.
+
+    Source ids are remapped in memory, so items can reference projects and
+    parents, and comments can reference items, by their ids in the export.
+    """
+    started = time.perf_counter()
+    importer = Importer(batch_size=batch_size)
+    for entity in ENTITIES:
+        for ext in ('csv', 'ndjson', 'jsonl'):
+            path = os.path.join(directory, f'{entity}.{ext}')
+            if os.path.exists(path):
+                getattr(importer, f'import_{entity}')(read_records(path))
+                db.session.flush()
+                break
+    for entity, stats in importer.finish().items():
+        click.echo(_summary(entity, stats))
+    click.echo(f'Done in {time.perf_counter() - started:.1f}s.')
@@ -0,0 +1,138 @@
+"""Append-only feed of changes to board entities.
+
+Every flush that inserts, updates or deletes an Item, BoardColumn,
+ProjectMember or Comment appends one `change_feed` row per object (entity,
+id, project, op, version) in the same transaction, so the feed commits or
+rolls back with the change itself. Item rows are written once per user
+whose inbox the item is in before or after the change (`user_id`: its
+assignee and reporter, old and new), so a user's task changes are one
+indexed range. Sync endpoints, caches and pollers read
+the feed by project and time instead of diffing the tables, and deletes stay
+visible after the row is gone.
+
+Writes that bypass the ORM (bulk INSERT ... SELECT / DELETE) fire no flush
+events; they must call `record_bulk` with the same row set before running.
+Rows older than CHANGE_FEED_RETENTION_DAYS are removed by
+`flask changes prune`; readers holding an older cursor fall back to a full
+snapshot.
+"""
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, insert, inspect, literal, select, union
+from sqlalchemy.orm import Session
+from models.db import db
+from models.board_column import BoardColumn
+from models.change_feed import ChangeFeed
+from models.comment import Comment
+from models.item import Item
+from models.project_member import ProjectMember
+
+TRACKED = {
+    Item: 'item',
+    BoardColumn: 'board_column',
+    ProjectMember: 'project_member',
+    Comment: 'comment',
+}
+
+class ChangeFeedService:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CHANGE_FEED_RETENTION_DAYS', 30)
+
+    def retention(self):
+        return timedelta(days=current_app.config.get('CHANGE_FEED_RETENTION_DAYS', 30))
+
+    def horizon(self):
+        """Changes before this time may have been pruned."""
+        return datetime.utcnow() - self.retention()
+
+change_feed = ChangeFeedService()
+
+def _entity_id(obj):
+    return obj.user_id if isinstance(obj, ProjectMember) else obj.id
+
+def _comment_projects(session, comments):
+    """Map the item ids of `comments` to their project ids, preferring loaded items."""
+    projects = {}
+    for obj in session.identity_map.values():
+        if isinstance(obj, Item):
+            projects[obj.id] = obj.project_id
+    for obj in session.deleted:
+        if isinstance(obj, Item):
+            projects[obj.id] = obj.project_id
+    missing = {c.item_id for c in comments} - projects.keys()
+    if missing:
+        projects.update(session.connection().execute(select(Item.id, Item.project_id).where(Item.id.in_(missing))).all())
+    return projects
+
+def _inbox_users(obj, op):
+    """The users whose inbox item `obj` is in before or after the change."""
+    users = {obj.assignee_id, obj.reporter_id}
+    if op == 'update':
+        state = inspect(obj)
+        users.update(state.attrs.assignee_id.history.deleted)
+        users.update(state.attrs.reporter_id.history.deleted)
+    # Ids may still be the strings they were assigned from (JWT identities).
+    return sorted({int(user) for user in users if user is not None}) or [None]
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    changes = [(obj, 'insert') for obj in session.new if type(obj) in TRACKED]
+    changes += [(obj, 'update') for obj in session.dirty
+                if type(obj) in TRACKED and session.is_modified(obj, include_collections=False)]
+    changes += [(obj, 'delete') for obj in session.deleted if type(obj) in TRACKED]
+    if not changes:
+        return
+    comments = [obj for obj, _ in changes if isinstance(obj, Comment)]
+    comment_projects = _comment_projects(session, comments) if comments else {}
+    now = datetime.utcnow()
+    rows = [{
+        'entity': TRACKED[type(obj)],
+        'entity_id': _entity_id(obj),
+        'project_id': comment_projects.get(obj.item_id) if isinstance(obj, Comment) else obj.project_id,
+        'op': op,
+        'version': getattr(obj, 'version', None),
+        'user_id': user_id,
+        'created_at': now,
+    } for obj, op in changes for user_id in (_inbox_users(obj, op) if isinstance(obj, Item) else [None])]
+    session.connection().execute(insert(ChangeFeed.__table__), rows)
+
+def record_bulk(entity, op, rows, user_id=None):
+    """Append a feed row for every (entity_id, project_id) row of the select `rows`.
+
+    Call it before the bulk statement it describes, with the same filter:
+    for a delete the rows are gone afterwards. Item rows go to the current
+    assignee and reporter; pass `user_id` to name the user instead, for a
+    bulk UPDATE that moves items into someone's inbox.
+    """
+    source = rows.subquery()
+    entity_id, project_id = list(source.c)[:2]
+    if user_id is not None:
+        users = select(entity_id, project_id, literal(user_id, ChangeFeed.user_id.type)).subquery()
+    elif entity == 'item':
+        items = Item.__table__
+        users = union(*(select(entity_id, project_id, user).join(items, items.c.id == entity_id).where(user.is_not(None))
+                        for user in (items.c.assignee_id, items.c.reporter_id))).subquery()
+    else:
+        users = select(entity_id, project_id, literal(None, ChangeFeed.user_id.type)).subquery()
+    entity_id, project_id, user = list(users.c)
+    query = select(literal(entity), entity_id, project_id, literal(op), user, literal(datetime.utcnow()))
+    return db.session.execute(insert(ChangeFeed).from_select(
+        ['entity', 'entity_id', 'project_id', 'op', 'user_id', 'created_at'], query)).rowcount
+
+def prune(before):
+    return db.session.execute(delete(ChangeFeed).where(ChangeFeed.created_at < before)).rowcount
+
+changes_cli = AppGroup('changes', help='Maintain the change feed.')
+
+@changes_cli.command('prune')
+def prune_command():
+    """Delete change feed rows older than CHANGE_FEED_RETENTION_DAYS (run daily)."""
+    count = prune(change_feed.horizon())
+    db.session.commit()
+    click.echo(f'Pruned {count} change feed rows.')
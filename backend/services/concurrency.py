@@ -0,0 +1,31 @@
+"""Optimistic concurrency for versioned rows (Item, BoardColumn).
+
+Versioned models map an integer `version` column as their `version_id_col`:
+every ORM UPDATE increments it and runs as `UPDATE ... WHERE id = ? AND
+version = <version read>`, so a write that lost a race raises StaleDataError
+at flush instead of silently overwriting the winner. Responses carry the
+version as a strong ETag; a PATCH sent with `If-Match` is only applied if
+that tag is still current, otherwise the client gets 409 with the current
+state and can retry without another GET.
+
+Bulk UPDATE statements bypass the ORM and must increment `version`
+themselves.
+"""
+from flask import jsonify, request
+
+def version_etag(version):
+    return str(version)
+
+def if_match_failed(obj):
+    """True if the request sent If-Match and none of its tags is `obj`'s current version."""
+    if_match = request.if_match
+    return bool(if_match) and not if_match.contains(version_etag(obj.version))
+
+def with_version(response, obj):
+    """Set the ETag of the Response `response` to `obj`'s version."""
+    response.set_etag(version_etag(obj.version))
+    return response
+
+def conflict(message, obj, state):
+    """409 with the current `state` of `obj` and its ETag."""
+    return with_version(jsonify({'error': message, 'current': state}), obj), 409
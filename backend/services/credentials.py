@@ -0,0 +1,166 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from services.metrics import CREDENTIAL_REJECTIONS, PASSWORD_HASH_DURATION
+
+class CredentialServiceBusy(RuntimeError):
+    """PASSWORD_HASH_QUEUE operations are already waiting for the hashing pool."""
+
+class LoginRateLimited(RuntimeError):
+    def __init__(self, retry_after):
+        super().__init__(f'Too many login attempts; retry in {retry_after}s')
+        self.retry_after = retry_after
+
+@lru_cache(maxsize=8)
+def method_prefix(method):
+    """The `<method>` part werkzeug stores in a hash, with default parameters filled in.
+
+    Parses `method` the way `generate_password_hash` does, without hashing;
+    raises ValueError for a method it would reject.
+    """
+    name, *args = method.split(':')
+    try:
+        if name == 'scrypt':
+            n, r, p = map(int, args) if args else (2**15, 8, 1)
+            return f'scrypt:{n}:{r}:{p}'
+        if name == 'pbkdf2' and len(args) <= 2:
+            hash_name = args[0] if args else 'sha256'
+            iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+            hashlib.new(hash_name)
+            return f'pbkdf2:{hash_name}:{iterations}'
+    except ValueError:
+        raise ValueError(f'Invalid hash method {method!r}') from None
+    raise ValueError(f'Invalid hash method {method!r}')
+
+class SlidingWindowLimiter:
+    """At most `limit` hits per key within any `window` seconds."""
+
+    def __init__(self, limit, window, max_keys=100000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.hits = {}
+
+    def hit(self, key):
+        """Record a hit for `key`; returns 0, or the seconds to wait when over the limit."""
+        now = time.monotonic()
+        with self.lock:
+            hits = self.hits.get(key)
+            if hits is None:
+                if len(self.hits) >= self.max_keys:
+                    self._purge(now)
+                hits = self.hits[key] = deque()
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+            if len(hits) >= self.limit:
+                return int(hits[0] + self.window - now) + 1
+            hits.append(now)
+            return 0
+
+    def _purge(self, now):
+        for key in [k for k, hits in self.hits.items() if not hits or hits[-1] <= now - self.window]:
+            del self.hits[key]
+        if len(self.hits) >= self.max_keys:
+            self.hits.clear()
+
+class _CredentialState:
+    def __init__(self, config):
+        self.method = config['PASSWORD_HASH_METHOD']
+        self.workers = config['PASSWORD_HASH_WORKERS']
+        self.timeout = config['PASSWORD_HASH_TIMEOUT']
+        self.slots = threading.BoundedSemaphore(config['PASSWORD_HASH_WORKERS'] + config['PASSWORD_HASH_QUEUE'])
+        self.limiter = SlidingWindowLimiter(config['LOGIN_ATTEMPTS_PER_ACCOUNT'], config['LOGIN_ATTEMPT_WINDOW'])
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def pool(self):
+        # Started on first use, after gunicorn has forked its workers; 'spawn'
+        # avoids forking a process that already runs request threads.
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self.executor
+
+    def run(self, operation, fn, *args):
+        started = time.perf_counter()
+        try:
+            if not self.workers:
+                return fn(*args)
+            if not self.slots.acquire(blocking=False):
+                CREDENTIAL_REJECTIONS.labels('busy').inc()
+                raise CredentialServiceBusy('Password hashing pool is saturated')
+            try:
+                future = self.pool().submit(fn, *args)
+            except BaseException:
+                self.slots.release()
+                raise
+            # The slot is held until the hash finishes, even if this request has given up on it.
+            future.add_done_callback(lambda _: self.slots.release())
+            return future.result(self.timeout)
+        except FutureTimeout:
+            CREDENTIAL_REJECTIONS.labels('timeout').inc()
+            raise CredentialServiceBusy('Password hashing timed out')
+        except BrokenProcessPool:
+            with self.lock:
+                self.executor = None
+            raise CredentialServiceBusy('Password hashing pool restarted')
+        finally:
+            PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - started)
+
+class CredentialService:
+    """Password hashing off the request thread, with per-account login limits.
+
+    Hashes are computed in a bounded process pool of PASSWORD_HASH_WORKERS
+    processes so that scrypt/pbkdf2 neither holds the GIL nor starves other
+    requests; once PASSWORD_HASH_QUEUE operations are waiting, further ones
+    raise CredentialServiceBusy instead of queueing (PASSWORD_HASH_WORKERS = 0
+    hashes inline, as the tests do). Hashes use PASSWORD_HASH_METHOD and older
+    ones are upgraded on the next successful login. Login attempts are limited
+    to LOGIN_ATTEMPTS_PER_ACCOUNT per LOGIN_ATTEMPT_WINDOW seconds per email,
+    counted per process.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Any werkzeug method string, e.g. 'scrypt' or 'pbkdf2:sha256:600000'.
+        app.config.setdefault('PASSWORD_HASH_METHOD', os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'))
+        app.config.setdefault('PASSWORD_HASH_WORKERS', 2)
+        app.config.setdefault('PASSWORD_HASH_QUEUE', 32)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)  # seconds
+        app.config.setdefault('LOGIN_ATTEMPTS_PER_ACCOUNT', 10)
+        app.config.setdefault('LOGIN_ATTEMPT_WINDOW', 60)  # seconds
+        method_prefix(app.config['PASSWORD_HASH_METHOD'])  # fail at startup on an unknown method
+        app.extensions['credentials'] = _CredentialState(app.config)
+
+    def _state(self):
+        return current_app.extensions['credentials']
+
+    def hash_password(self, password):
+        state = self._state()
+        return state.run('hash', generate_password_hash, password, state.method)
+
+    def verify_password(self, password_hash, password):
+        return self._state().run('verify', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != method_prefix(self._state().method)
+
+    def check_login_rate(self, email):
+        retry_after = self._state().limiter.hit(email.strip().lower())
+        if retry_after:
+            CREDENTIAL_REJECTIONS.labels('rate_limited').inc()
+            raise LoginRateLimited(retry_after)
+
+credentials = CredentialService()
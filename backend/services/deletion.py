@@ -0,0 +1,134 @@
+"""Bulk deletion of items, projects, teams and users with everything that references them.
+
+Subtrees are removed children first with `DELETE ... WHERE <parent> IN
+(...)` statements, so nothing is loaded into the session and no foreign key
+is left dangling. Items go in chunks of DELETION_CHUNK_SIZE ids: each chunk
+is one DELETE per dependent table (activity changes, activity logs, comments,
+status facts) and one for the items. Every step is idempotent, so a
+`delete_project` job that fails half-way is simply retried; with
+`commit=True` each chunk is committed on its own to keep transactions and
+memory small. Archived rows are deleted like active ones. Change feed rows for deleted items, columns and memberships are
+written with `record_bulk` before each DELETE.
+
+Notifications carry no item or project reference, so only a deleted user's
+own notifications are removed.
+"""
+from flask import current_app
+from sqlalchemy import delete, select, update
+from models.db import db
+from models.activity_change import ActivityChange
+from models.activity_log import ActivityLog
+from models.board_column import BoardColumn
+from models.comment import Comment
+from models.item import Item
+from models.item_status_fact import ItemStatusFact
+from models.notification import Notification
+from models.project import Project
+from models.project_daily_snapshot import ProjectDailySnapshot
+from models.project_member import ProjectJoinRequest, ProjectMember
+from models.report_artifact import ReportArtifact
+from models.team import Team
+from models.team_manager_request import TeamManagerRequest
+from models.team_member import TeamMember
+from models.user import User
+from services.archive import INCLUDE_ARCHIVED
+from services.change_feed import record_bulk
+from services.jobs import jobs
+
+def _chunk_size():
+    return current_app.config.get('DELETION_CHUNK_SIZE', 5000)
+
+def _execute(statement):
+    return db.session.execute(statement, execution_options={'synchronize_session': False}).rowcount
+
+def _bump(table):
+    return {'version': table.c.version + 1}
+
+def delete_items(item_ids):
+    """Delete the items `item_ids` with their history and comments; their subtasks are kept, detached.
+
+    Returns the number of items deleted.
+    """
+    item_ids = list(item_ids)
+    if not item_ids:
+        return 0
+    items = Item.__table__
+    detached = select(items.c.id, items.c.project_id).where(items.c.parent_id.in_(item_ids), items.c.id.not_in(item_ids))
+    record_bulk('item', 'update', detached)
+    _execute(update(items).where(items.c.parent_id.in_(item_ids), items.c.id.not_in(item_ids))
+             .values(parent_id=None, **_bump(items)))
+    _execute(delete(ActivityChange).where(ActivityChange.item_id.in_(item_ids)))
+    _execute(delete(ActivityLog).where(ActivityLog.item_id.in_(item_ids)))
+    _execute(delete(Comment).where(Comment.item_id.in_(item_ids)))
+    _execute(delete(ItemStatusFact).where(ItemStatusFact.item_id.in_(item_ids)))
+    record_bulk('item', 'delete', select(items.c.id, items.c.project_id).where(items.c.id.in_(item_ids)))
+    return _execute(delete(items).where(items.c.id.in_(item_ids)))
+
+def _in_chunks(query, delete_chunk, commit):
+    # Rows of the previous chunk are gone, so each round takes the first ids left.
+    total = 0
+    while True:
+        ids = db.session.scalars(query.limit(_chunk_size()), execution_options=INCLUDE_ARCHIVED).all()
+        if not ids:
+            return total
+        total += delete_chunk(ids)
+        if commit:
+            db.session.commit()
+
+def detach_project_members(project_id):
+    """Remove memberships and join requests first, so a project being deleted disappears from its members' lists."""
+    record_bulk('project_member', 'delete',
+                select(ProjectMember.user_id, ProjectMember.project_id).where(ProjectMember.project_id == project_id))
+    _execute(delete(ProjectMember).where(ProjectMember.project_id == project_id))
+    _execute(delete(ProjectJoinRequest).where(ProjectJoinRequest.project_id == project_id))
+
+@jobs.task('delete_project')
+def delete_project(project_id, commit=False):
+    """Delete project `project_id` and everything in it; returns the number of items deleted."""
+    detach_project_members(project_id)
+    # Subtasks may sit in a later chunk than their parent; the whole tree goes, so unlink it up front.
+    items = Item.__table__
+    _execute(update(items).where(items.c.project_id == project_id, items.c.parent_id.is_not(None)).values(parent_id=None))
+    deleted = _in_chunks(select(Item.id).where(Item.project_id == project_id).order_by(Item.id), delete_items, commit)
+    for model in (ItemStatusFact, ProjectDailySnapshot, ReportArtifact):
+        _execute(delete(model).where(model.project_id == project_id))
+    record_bulk('board_column', 'delete',
+                select(BoardColumn.id, BoardColumn.project_id).where(BoardColumn.project_id == project_id))
+    _execute(delete(BoardColumn).where(BoardColumn.project_id == project_id))
+    _execute(delete(Project).where(Project.id == project_id))
+    return deleted
+
+def project_item_count(project_id):
+    return db.session.query(Item.id).filter(Item.project_id == project_id).execution_options(**INCLUDE_ARCHIVED).count()
+
+def delete_team(team_id):
+    """Delete team `team_id`, its memberships and manager requests; its projects stay, without an owner team."""
+    _execute(delete(TeamMember).where(TeamMember.team_id == team_id))
+    _execute(delete(TeamManagerRequest).where(TeamManagerRequest.team_id == team_id))
+    _execute(update(Project).where(Project.owner_team_id == team_id).values(owner_team_id=None))
+    return _execute(delete(Team).where(Team.id == team_id))
+
+def delete_user(user_id, successor_id):
+    """Delete user `user_id`; what must keep an author moves to `successor_id`.
+
+    Memberships, join and manager requests and notifications are deleted;
+    assigned items are unassigned. Reported items, owned projects, managed
+    teams, comments and activity records are reassigned to `successor_id`
+    (the admin deleting the account).
+    """
+    items = Item.__table__
+    touched = (items.c.assignee_id == user_id) | (items.c.reporter_id == user_id)
+    record_bulk('item', 'update', select(items.c.id, items.c.project_id).where(touched))
+    _execute(update(items).where(items.c.assignee_id == user_id).values(assignee_id=None, **_bump(items)))
+    record_bulk('item', 'update', select(items.c.id, items.c.project_id).where(items.c.reporter_id == user_id),
+                user_id=successor_id)
+    _execute(update(items).where(items.c.reporter_id == user_id).values(reporter_id=successor_id, **_bump(items)))
+    _execute(update(Project).where(Project.owner_id == user_id).values(owner_id=successor_id))
+    _execute(update(Team).where(Team.manager_id == user_id).values(manager_id=successor_id))
+    for model in (Comment, ActivityLog, ActivityChange):
+        _execute(update(model).where(model.user_id == user_id).values(user_id=successor_id))
+    record_bulk('project_member', 'delete',
+                select(ProjectMember.user_id, ProjectMember.project_id).where(ProjectMember.user_id == user_id))
+    for model in (TeamMember, ProjectMember, ProjectJoinRequest, TeamManagerRequest, Notification):
+        _execute(delete(model).where(model.user_id == user_id))
+    return _execute(delete(User).where(User.id == user_id))
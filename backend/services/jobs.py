@@ -0,0 +1,187 @@
+import json
+import logging
+import threading
+import click
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, inspect, update
+from sqlalchemy.orm import Session
+from models.db import db
+from models.job import Job
+
+logger = logging.getLogger(__name__)
+
+class JobRunner:
+    """In-process background jobs backed by the `job` table.
+
+    `enqueue()` adds a Job row to the caller's session, so the job is durable
+    exactly when the request's own write commits. Committed jobs are handed to
+    a thread pool; failures are retried with exponential backoff up to
+    `max_attempts`, and `recover()` re-submits jobs left over by a restart.
+    With JOBS_ALWAYS_EAGER the handler runs inline in the caller's session.
+    Finished jobs are kept for JOBS_RETENTION_DAYS so their status and result
+    can be read, then deleted every JOBS_PRUNE_INTERVAL seconds (or by
+    `flask jobs prune`).
+    """
+
+    def __init__(self, app=None):
+        self.handlers = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOBS_ALWAYS_EAGER', False)
+        app.config.setdefault('JOBS_WORKERS', 4)
+        app.config.setdefault('JOBS_MAX_ATTEMPTS', 3)
+        app.config.setdefault('JOBS_RETRY_DELAY', 2.0)  # seconds, doubled per attempt
+        app.config.setdefault('JOBS_LEASE_SECONDS', 300)  # 'running' jobs older than this are presumed dead
+        app.config.setdefault('JOBS_RETENTION_DAYS', 7)
+        app.config.setdefault('JOBS_PRUNE_INTERVAL', 3600)  # seconds
+        executor = None
+        if not app.config['JOBS_ALWAYS_EAGER']:
+            executor = ThreadPoolExecutor(max_workers=app.config['JOBS_WORKERS'], thread_name_prefix='jobs')
+        app.extensions['jobs'] = _RunnerState(self, app, executor)
+
+    def task(self, kind):
+        def decorator(f):
+            self.handlers[kind] = f
+            return f
+        return decorator
+
+    def enqueue(self, kind, **payload):
+        if kind not in self.handlers:
+            raise KeyError(f'No job handler registered for {kind!r}')
+        state = current_app.extensions['jobs']
+        job = Job(kind=kind, payload=json.dumps(payload), status='pending', attempts=0,
+                  max_attempts=current_app.config['JOBS_MAX_ATTEMPTS'])
+        db.session.add(job)
+        if current_app.config['JOBS_ALWAYS_EAGER']:
+            job.attempts = 1
+            result = self.handlers[kind](**payload)
+            job.result = json.dumps(result) if result is not None else None
+            job.status, job.finished_at = 'done', datetime.utcnow()
+        else:
+            db.session.info.setdefault('pending_jobs', []).append((state, job))
+        return job
+
+    def recover(self, app):
+        """Re-submit jobs that were committed but never finished."""
+        state = app.extensions['jobs']
+        if state.executor is None:
+            return 0
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=app.config['JOBS_LEASE_SECONDS'])
+        with app.app_context():
+            db.session.execute(
+                update(Job).where(Job.status == 'running', Job.updated_at < stale).values(status='pending')
+            )
+            db.session.commit()
+            pending = db.session.query(Job.id, Job.run_after).filter(Job.status == 'pending').all()
+            db.session.remove()
+        for job_id, run_after in pending:
+            delay = (run_after - now).total_seconds() if run_after else 0
+            state.submit(job_id, delay=delay)
+        state.prune_periodically()
+        return len(pending)
+
+class _RunnerState:
+    def __init__(self, runner, app, executor):
+        self.runner = runner
+        self.app = app
+        self.executor = executor
+
+    def submit(self, job_id, delay=0):
+        if delay > 0:
+            timer = threading.Timer(delay, self.submit, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+            return
+        self.executor.submit(self.execute, job_id)
+
+    def prune_periodically(self):
+        with self.app.app_context():
+            try:
+                prune(horizon())
+                db.session.commit()
+            except Exception:
+                logger.exception('[jobs] Pruning finished jobs failed')
+            finally:
+                db.session.remove()
+        timer = threading.Timer(self.app.config['JOBS_PRUNE_INTERVAL'], self.prune_periodically)
+        timer.daemon = True
+        timer.start()
+
+    def execute(self, job_id):
+        with self.app.app_context():
+            try:
+                self._execute(job_id)
+            except Exception:
+                logger.exception('[jobs] Job %s crashed', job_id)
+            finally:
+                db.session.remove()
+
+    def _execute(self, job_id):
+        # Claim the job atomically so concurrent recoveries never run it twice.
+        claimed = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'pending')
+            .values(status='running', attempts=Job.attempts + 1, updated_at=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+        job = db.session.get(Job, job_id)
+        handler = self.runner.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise KeyError(f'No job handler registered for {job.kind!r}')
+            result = handler(**json.loads(job.payload))
+            job.result = json.dumps(result) if result is not None else None
+            job.status, job.finished_at = 'done', datetime.utcnow()
+            job.error = None
+            db.session.commit()
+            return
+        except Exception as e:
+            logger.warning('[jobs] Job %s (%s) attempt %s failed: %r', job_id, job.kind, job.attempts, e)
+            error = repr(e)[:1000]
+            db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.error = error
+        delay = None
+        if job.attempts >= job.max_attempts:
+            job.status, job.finished_at = 'failed', datetime.utcnow()
+        else:
+            delay = self.app.config['JOBS_RETRY_DELAY'] * (2 ** (job.attempts - 1))
+            job.status = 'pending'
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+        db.session.commit()
+        if delay is not None:
+            self.submit(job_id, delay=delay)
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_committed_jobs(session):
+    for state, job in session.info.pop('pending_jobs', []):
+        state.submit(inspect(job).identity[0])
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_jobs(session):
+    session.info.pop('pending_jobs', None)
+
+def horizon():
+    return datetime.utcnow() - timedelta(days=current_app.config['JOBS_RETENTION_DAYS'])
+
+def prune(before):
+    """Delete jobs that finished before `before`; returns the number deleted."""
+    return db.session.execute(delete(Job).where(Job.status.in_(('done', 'failed')), Job.finished_at < before)).rowcount
+
+jobs = JobRunner()
+
+jobs_cli = AppGroup('jobs', help='Maintain the background job table.')
+
+@jobs_cli.command('prune')
+def prune_command():
+    """Delete jobs finished more than JOBS_RETENTION_DAYS ago."""
+    count = prune(horizon())
+    db.session.commit()
+    click.echo(f'Pruned {count} jobs.')
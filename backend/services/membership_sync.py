@@ -0,0 +1,57 @@
+"""Set-based synchronisation of project membership from team membership.
+
+Each function is a single INSERT ... SELECT or DELETE whose row set is the
+difference between `team_member` and `project_member`, so attaching or
+detaching a team costs one statement regardless of its size. Statements run
+in the caller's session (pending changes are flushed first) and nothing is
+committed; the return value is the number of rows written. The same row set
+is appended to the change feed first, since bulk statements bypass its flush
+hook.
+"""
+from sqlalchemy import and_, case, delete, exists, insert, literal, select
+from models.db import db
+from models.project import Project
+from models.project_member import ProjectMember
+from models.team_member import TeamMember
+from services.change_feed import record_bulk
+
+def _team_users(team_id, user_ids=None):
+    query = select(TeamMember.user_id).where(TeamMember.team_id == team_id)
+    if user_ids is not None:
+        query = query.where(TeamMember.user_id.in_(user_ids))
+    return query
+
+def team_projects(team_id):
+    """Ids of the projects owned by `team_id`, as a subquery."""
+    return select(Project.id).where(Project.owner_team_id == team_id)
+
+def add_team_to_projects(team_id, project_ids, role_id, role_overrides=None, user_ids=None):
+    """Give every member of `team_id` (or only `user_ids`) a `role_id` membership in `project_ids`.
+
+    Users who are already members of a project keep their existing role.
+    `role_overrides` maps user ids to a different role id; `project_ids` may
+    be a list or a select such as `team_projects(team_id)`.
+    """
+    role = literal(role_id)
+    if role_overrides:
+        role = case(role_overrides, value=TeamMember.user_id, else_=role_id)
+    missing = select(TeamMember.user_id, Project.id) \
+        .join(Project, Project.id.in_(project_ids)) \
+        .where(TeamMember.team_id == team_id) \
+        .where(~exists().where(and_(ProjectMember.project_id == Project.id, ProjectMember.user_id == TeamMember.user_id)))
+    if user_ids is not None:
+        missing = missing.where(TeamMember.user_id.in_(user_ids))
+    record_bulk('project_member', 'insert', missing)
+    return db.session.execute(insert(ProjectMember).from_select(['user_id', 'project_id', 'role_id'],
+                                                                missing.add_columns(role))).rowcount
+
+def remove_team_from_projects(team_id, project_ids, user_ids=None, role_id=None):
+    """Delete the memberships of `team_id`'s members (or only `user_ids`) in `project_ids`.
+
+    With `role_id`, only memberships holding that role are removed.
+    """
+    where = [ProjectMember.project_id.in_(project_ids), ProjectMember.user_id.in_(_team_users(team_id, user_ids))]
+    if role_id is not None:
+        where.append(ProjectMember.role_id == role_id)
+    record_bulk('project_member', 'delete', select(ProjectMember.user_id, ProjectMember.project_id).where(*where))
+    return db.session.execute(delete(ProjectMember).where(*where), execution_options={'synchronize_session': False}).rowcount
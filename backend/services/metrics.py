@@ -0,0 +1,231 @@
+import bisect
+import math
+import os
+import threading
+import time
+from flask import g, request
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        # Children are created once per label set; after that every update only
+        # takes the child's own lock, so requests to different endpoints never contend.
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}')
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.copy().items()):
+            lines.extend(self._expose_child(values, child))
+        return lines
+
+class _Value:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _expose_child(self, values, child):
+        yield f'{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}'
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+class _HistogramValue:
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, amount):
+        index = bisect.bisect_left(self.upper_bounds, amount)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += amount
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, amount):
+        self.labels().observe(amount)
+
+    def _expose_child(self, values, child):
+        with child.lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.upper_bounds + (math.inf,), counts):
+            cumulative += count
+            le = (('le', _format_value(bound)),)
+            yield f'{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}'
+        yield f'{self.name}_sum{_label_text(self.labelnames, values)} {_format_value(total)}'
+        yield f'{self.name}_count{_label_text(self.labelnames, values)} {cumulative}'
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def expose(self):
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].expose())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by blueprint and endpoint.', ('blueprint', 'endpoint', 'method'))
+REQUESTS = registry.counter(
+    'http_requests_total', 'Requests by blueprint, endpoint and status code.', ('blueprint', 'endpoint', 'method', 'status'))
+IN_FLIGHT = registry.gauge(
+    'http_requests_in_flight', 'Requests currently being served.', ('blueprint',))
+POOL_CHECKOUT_WAIT = registry.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a connection from the pool.',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Cache lookups by cache name and result (hit or miss).', ('cache', 'result'))
+NOTIFICATION_FANOUT = registry.histogram(
+    'notification_fanout_size', 'Recipients per notification fan-out.',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000))
+PASSWORD_HASH_DURATION = registry.histogram(
+    'password_hash_duration_seconds', 'Time to hash or verify a password, including pool queueing.', ('operation',))
+CREDENTIAL_REJECTIONS = registry.counter(
+    'credential_rejections_total', 'Login and registration requests refused before hashing.', ('reason',))
+
+def cache_lookup(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+class RequestMetrics:
+    """Records request latency, status codes and in-flight requests per blueprint.
+
+    Values live in the process-wide `registry` and are exposed in Prometheus
+    text format by GET /metrics. Each gunicorn worker process keeps its own
+    registry; threads within a worker share it.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_TOKEN', os.environ.get('METRICS_TOKEN'))
+        if not app.config['METRICS_ENABLED']:
+            return
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        if uri and not uri.startswith('sqlite'):
+            # Must run before db.init_app() creates the engine.
+            app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).setdefault('poolclass', InstrumentedQueuePool)
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+
+    def _start_request(self):
+        g._metrics_started = time.perf_counter()
+        IN_FLIGHT.labels(request.blueprint or '').inc()
+
+    def _record_status(self, response):
+        g._metrics_status = response.status_code
+        return response
+
+    def _finish_request(self, exc):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        blueprint = request.blueprint or ''
+        endpoint = request.endpoint or 'unknown'
+        status = g.pop('_metrics_status', 500)
+        IN_FLIGHT.labels(blueprint).dec()
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(blueprint, endpoint, request.method, status).inc()
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import namedtuple
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_jwt_extended import get_current_user
+from models.db import db
+from models.user import User
+from services.metrics import cache_lookup
+from services.roles import role_catalog
+
+ADMIN_ROLE = 'Firm Admin'
+
+Principal = namedtuple('Principal', ['id', 'username', 'email', 'firm_role_id', 'is_admin'])
+
+def load_principal(user_id):
+    row = db.session.query(User.id, User.username, User.email, User.firm_role_id).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    is_admin = row.firm_role_id is not None and row.firm_role_id == role_catalog.id_of(ADMIN_ROLE, 'firm')
+    return Principal(row.id, row.username, row.email, row.firm_role_id, is_admin)
+
+class PrincipalCache:
+    """Resolves the JWT of each request to a `Principal`, cached per token `jti`.
+
+    A cache hit costs no query, so a deleted user stays authenticated in other
+    processes until the entry expires (AUTH_PRINCIPAL_TTL seconds). In the
+    process that deleted it, `revoke_user()` immediately rejects its tokens
+    issued up to the revocation; later tokens (a re-created account reusing
+    the id) are accepted.
+    """
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.revoked = {}
+
+    def get(self, jti, user_id):
+        now = time.monotonic()
+        entry = self.entries.get(jti)
+        if entry is not None and entry[0] > now:
+            cache_lookup('principal', True)
+            return entry[1]
+        cache_lookup('principal', False)
+        principal = load_principal(user_id)
+        if principal is not None:
+            with self.lock:
+                if len(self.entries) >= self.max_size:
+                    self._purge(now)
+                self.entries[jti] = (now + self.ttl, principal)
+        return principal
+
+    def _purge(self, now):
+        expired = [jti for jti, (expires, _) in self.entries.items() if expires <= now]
+        for jti in expired:
+            del self.entries[jti]
+        if len(self.entries) >= self.max_size:
+            self.entries.clear()
+
+    def revoke_user(self, user_id, keep_seconds):
+        now = time.monotonic()
+        with self.lock:
+            self.revoked = {uid: entry for uid, entry in self.revoked.items() if entry[1] > now}
+            self.revoked[int(user_id)] = (time.time(), now + keep_seconds)
+            for jti in [jti for jti, (_, p) in self.entries.items() if p.id == int(user_id)]:
+                del self.entries[jti]
+
+    def is_revoked(self, user_id, issued_at):
+        # `issued_at` is the token's `iat`, in whole seconds.
+        entry = self.revoked.get(int(user_id))
+        return entry is not None and entry[1] > time.monotonic() and issued_at <= entry[0]
+
+def init_app(app, jwt):
+    app.config.setdefault('AUTH_PRINCIPAL_TTL', 60)
+    app.config.setdefault('AUTH_PRINCIPAL_CACHE_SIZE', 10000)
+    app.extensions['principals'] = PrincipalCache(app.config['AUTH_PRINCIPAL_TTL'], app.config['AUTH_PRINCIPAL_CACHE_SIZE'])
+
+    @jwt.user_lookup_loader
+    def _lookup_principal(jwt_header, jwt_data):
+        return current_app.extensions['principals'].get(jwt_data['jti'], int(jwt_data['sub']))
+
+    @jwt.token_in_blocklist_loader
+    def _user_revoked(jwt_header, jwt_data):
+        return current_app.extensions['principals'].is_revoked(jwt_data['sub'], jwt_data['iat'])
+
+def current_principal():
+    """The authenticated Principal of this request, or None outside a @jwt_required view."""
+    try:
+        return get_current_user()
+    except RuntimeError:
+        return None
+
+def revoke_user(user_id):
+    # Tokens cannot outlive their expiry, so that is how long the entry is needed.
+    expires = current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES')
+    keep_seconds = expires.total_seconds() if hasattr(expires, 'total_seconds') else 86400 * 365
+    current_app.extensions['principals'].revoke_user(user_id, keep_seconds)
+
+admin_cli = AppGroup('admins', help='Grant or revoke the Firm Admin role.')
+
+def _admin_role():
+    role = role_catalog.find(ADMIN_ROLE, 'firm')
+    if role is None:
+        raise click.ClickException(f"Role '{ADMIN_ROLE}' does not exist; seed roles first.")
+    return role
+
+def _user(email):
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.ClickException(f'No user with email {email}')
+    return user
+
+@admin_cli.command('grant')
+@click.argument('email')
+def grant_admin_command(email):
+    """Make the user with EMAIL a firm admin."""
+    _user(email).firm_role_id = _admin_role().id
+    db.session.commit()
+    click.echo(f'{email} is now a firm admin.')
+
+@admin_cli.command('revoke')
+@click.argument('email')
+def revoke_admin_command(email):
+    """Remove the firm admin role from the user with EMAIL."""
+    user = _user(email)
+    if user.firm_role_id == _admin_role().id:
+        user.firm_role_id = None
+        db.session.commit()
+    click.echo(f'{email} is not a firm admin (running servers notice within AUTH_PRINCIPAL_TTL seconds).')
+
+@admin_cli.command('list')
+def list_admins_command():
+    """List firm admins."""
+    for user in User.query.filter_by(firm_role_id=_admin_role().id).order_by(User.id):
+        click.echo(f'{user.id}\t{user.email}')
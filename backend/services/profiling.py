@@ -0,0 +1,151 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID = re.compile(r'^[\w.-]+$')
+# Browsing profiles would otherwise record (and rotate in) profiles of its own.
+SKIP_ENDPOINTS = frozenset(['admin.get_profiles', 'admin.download_profile'])
+
+class RequestProfiler:
+    """Opt-in cProfile hook for slow or sampled requests.
+
+    With PROFILE_THRESHOLD_MS set every request runs under cProfile and only
+    those slower than the threshold are kept; PROFILE_SAMPLE_RATE keeps a
+    random fraction regardless of latency. Profiles are written to PROFILE_DIR
+    as `<id>.prof` (pstats format) plus `<id>.json` metadata, and only the
+    newest PROFILE_KEEP are retained. The profile listing and download
+    endpoints are never profiled.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILE_ENABLED', os.environ.get('PROFILE_ENABLED', '').lower() in ('1', 'true'))
+        app.config.setdefault('PROFILE_THRESHOLD_MS', 500)
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+        app.config.setdefault('PROFILE_KEEP', 50)
+        if not app.config['PROFILE_ENABLED']:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._discard)
+
+    def _start_request(self):
+        from flask import current_app
+        config = current_app.config
+        if request.endpoint in SKIP_ENDPOINTS:
+            return
+        sampled = random.random() < config['PROFILE_SAMPLE_RATE']
+        if not sampled and config['PROFILE_THRESHOLD_MS'] is None:
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread (or, on
+            # Python 3.12+, in this process); skip rather than fail the request.
+            return
+        g._profiler = profiler
+        g._profile_sampled = sampled
+        g._profile_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        from flask import current_app
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        duration_ms = (time.perf_counter() - g._profile_started) * 1000
+        threshold = current_app.config['PROFILE_THRESHOLD_MS']
+        if g._profile_sampled:
+            reason = 'sampled'
+        elif threshold is not None and duration_ms >= threshold:
+            reason = 'slow'
+        else:
+            return response
+        try:
+            self._save(current_app.config, profiler, {
+                'endpoint': request.endpoint,
+                'method': request.method,
+                'path': request.path,
+                'view_args': request.view_args or {},
+                'query_string': request.query_string.decode('utf-8', 'replace'),
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 3),
+                'reason': reason,
+            })
+        except OSError:
+            logger.exception('[profiling] Could not save profile for %s', request.path)
+        return response
+
+    def _discard(self, exc):
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+    def _save(self, config, profiler, metadata):
+        directory = config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        created_at = datetime.utcnow()
+        endpoint = re.sub(r'[^\w.-]', '_', metadata['endpoint'] or 'unknown')
+        profile_id = f"{created_at:%Y%m%dT%H%M%S%f}-{endpoint}-{uuid.uuid4().hex[:8]}"
+        metadata = {'id': profile_id, 'created_at': created_at.isoformat(), **metadata}
+        profiler.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+        with open(os.path.join(directory, f'{profile_id}.json'), 'w') as f:
+            json.dump(metadata, f)
+        self._rotate(directory, config['PROFILE_KEEP'])
+        logger.info('[profiling] Saved %s profile %s (%.1f ms)', metadata['reason'], profile_id, metadata['duration_ms'])
+
+    def _rotate(self, directory, keep):
+        with self._lock:
+            # Oldest first by write time; ids only order within one process's clock.
+            stems = []
+            for name in os.listdir(directory):
+                if name.endswith('.prof'):
+                    try:
+                        stems.append((os.stat(os.path.join(directory, name)).st_mtime_ns, name[:-5]))
+                    except FileNotFoundError:
+                        pass
+            stems.sort()
+            for _, stem in stems[:max(len(stems) - keep, 0)]:
+                for suffix in ('.prof', '.json'):
+                    try:
+                        os.remove(os.path.join(directory, stem + suffix))
+                    except FileNotFoundError:
+                        pass
+
+def list_profiles(directory):
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+def profile_path(directory, profile_id):
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(directory, f'{profile_id}.prof')
+    return path if os.path.isfile(path) else None
+
+request_profiler = RequestProfiler()
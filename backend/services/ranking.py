@@ -0,0 +1,195 @@
+"""Fractional ranks: the position of cards within a column and of columns within a board.
+
+A rank is a string of base-36 digits (0-9, A-Z) read as a fraction in
+[0, 1); plain string comparison orders ranks, so `ORDER BY rank` on the
+(`column_id`, `rank`) index renders a column without sorting. A key without
+trailing zeros exists strictly between any two others, so moving a card
+writes only that card's row. Keys grow by about one digit per five inserts
+into the same gap; once one is longer than RANK_REBALANCE_LENGTH a
+`rank_rebalance` job rewrites the column (or the board's columns) with short,
+evenly spaced keys. Rows written without the ORM have no rank and sort last
+until `flask ranks rebalance` gives them one.
+"""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, event, false, inspect, select, true, update
+from sqlalchemy.orm import Session
+from models.db import db
+from models.board_column import BoardColumn
+from models.item import Item
+from models.project import Project
+from services.archive import INCLUDE_ARCHIVED
+from services.change_feed import record_bulk
+from services.jobs import jobs
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+BASE = len(DIGITS)
+# What a ranked row is ordered within: (its parent key, the parent model).
+PARENTS = {Item: (Item.column_id, BoardColumn), BoardColumn: (BoardColumn.project_id, Project)}
+
+def _midpoint(low, high):
+    # `low` < `high` as fractions; '' is 0 and None is 1.
+    if high is not None:
+        common = 0
+        while common < len(high) and (low[common] if common < len(low) else '0') == high[common]:
+            common += 1
+        if common:
+            return high[:common] + _midpoint(low[common:], high[common:])
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+def rank_between(before=None, after=None):
+    """A rank sorting after `before` and before `after`; None leaves that side open."""
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f'Rank {before!r} does not sort before {after!r}')
+    return _midpoint(before or '', after)
+
+def spread(count):
+    """`count` short, increasing ranks spaced evenly over the middle half of the key space.
+
+    The free quarters at either end absorb later moves to the top or the
+    bottom of the list.
+    """
+    width = 1
+    while (BASE ** width // 2) // (count + 1) < BASE:
+        width += 1
+    step = (BASE ** width // 2) // (count + 1)
+    ranks = []
+    for n in range(1, count + 1):
+        value, digits = BASE ** width // 4 + n * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append(''.join(reversed(digits)).rstrip('0'))
+    return ranks
+
+def rank_after(rank):
+    """The shortest rank after `rank` (the first rank when None), for appending."""
+    if rank is None:
+        return rank_between()
+    for position, digit in enumerate(rank):
+        if digit != DIGITS[-1]:
+            return rank[:position] + DIGITS[DIGITS.index(digit) + 1]
+    return rank_between(rank, None)
+
+def rank_before(rank):
+    """The shortest rank before `rank` (the first rank when None), for prepending."""
+    if rank is None:
+        return rank_between()
+    for position, digit in enumerate(rank):
+        if digit != DIGITS[0]:
+            if DIGITS.index(digit) > 1:
+                return rank[:position] + DIGITS[DIGITS.index(digit) - 1]
+            break
+    return rank_between(None, rank)
+
+def schedule_rebalance(length, column_id=None, project_id=None):
+    """Enqueue a `rank_rebalance` of a column's cards or a board's columns once a rank has `length` digits."""
+    if length > current_app.config.get('RANK_REBALANCE_LENGTH', 24):
+        jobs.enqueue('rank_rebalance', column_id=column_id, project_id=project_id)
+
+def place(model, parent_id, exclude_id=None, after_rank=None, before_rank=None):
+    """A rank for a card of column `parent_id` (`model` Item) or a column of board `parent_id` (BoardColumn).
+
+    The row goes right after the row ranked `after_rank`, right before the
+    one ranked `before_rank`, or last; `exclude_id` is the row being moved.
+    The parent column or project row is locked first (FOR UPDATE, until the
+    transaction ends), so concurrent placements into the same list wait for
+    each other instead of computing the same rank. Archived cards keep their
+    ranks and count as neighbours, so restoring one never ties. One indexed
+    lookup of the neighbouring rank after the lock.
+    """
+    key, parent = PARENTS[model]
+    db.session.execute(select(parent.id).where(parent.id == parent_id).with_for_update(),
+                       execution_options=INCLUDE_ARCHIVED)
+    others = [key == parent_id, model.rank.is_not(None)]
+    if exclude_id is not None:
+        others.append(model.id != exclude_id)
+    if after_rank is not None:
+        following = _nearest(model, [*others, model.rank > after_rank])
+        return rank_after(after_rank) if following is None else rank_between(after_rank, following)
+    if before_rank is not None:
+        preceding = _nearest(model, [*others, model.rank < before_rank], descending=True)
+        return rank_before(before_rank) if preceding is None else rank_between(preceding, before_rank)
+    return rank_after(_nearest(model, others, descending=True))
+
+def _nearest(model, where, descending=False):
+    # The lowest (highest) rank matching `where`. Cards are looked up in the
+    # active and the archived partial index separately, in one statement.
+    order = model.rank.desc() if descending else model.rank
+    if model is not Item:
+        return db.session.scalar(select(model.rank).where(*where).order_by(order).limit(1))
+    firsts = [select(Item.rank).where(*where, Item.archived == flag).order_by(order).limit(1).scalar_subquery()
+              for flag in (false(), true())]
+    ranks = [r for r in db.session.execute(select(*firsts), execution_options=INCLUDE_ARCHIVED).one() if r is not None]
+    if not ranks:
+        return None
+    return max(ranks) if descending else min(ranks)
+
+def _rewrite(model, scope, *tiebreak):
+    ids = db.session.scalars(select(model.id).where(scope).order_by(model.rank.is_(None), model.rank, *tiebreak)).all()
+    if not ids:
+        return 0
+    table = model.__table__
+    db.session.execute(
+        update(table).where(table.c.id == bindparam('b_id'))
+        .values(rank=bindparam('b_rank'), version=table.c.version + 1),
+        [{'b_id': row_id, 'b_rank': rank} for row_id, rank in zip(ids, spread(len(ids)))])
+    return len(ids)
+
+@jobs.task('rank_rebalance')
+def rebalance(column_id=None, project_id=None):
+    """Respace the cards of `column_id`, or the columns of `project_id`; returns the rows rewritten."""
+    if column_id is not None:
+        record_bulk('item', 'update', select(Item.id, Item.project_id).where(Item.column_id == column_id))
+        return _rewrite(Item, Item.column_id == column_id, Item.id)
+    record_bulk('board_column', 'update', select(BoardColumn.id, BoardColumn.project_id).where(BoardColumn.project_id == project_id))
+    return _rewrite(BoardColumn, BoardColumn.project_id == project_id, BoardColumn.order, BoardColumn.id)
+
+@event.listens_for(Session, 'before_flush')
+def _rank_new_rows(session, flush_context, instances):
+    """Append new cards and columns, and cards moved to another column without a rank, at the end."""
+    cards, columns = {}, {}
+    for obj in session.new:
+        if isinstance(obj, Item) and obj.rank is None and obj.column_id is not None:
+            cards.setdefault(obj.column_id, []).append(obj)
+        elif isinstance(obj, BoardColumn) and obj.rank is None and obj.project_id is not None:
+            columns.setdefault(obj.project_id, []).append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Item):
+            state = inspect(obj)
+            if state.attrs.column_id.history.has_changes() and not state.attrs.rank.history.has_changes():
+                cards.setdefault(obj.column_id, []).append(obj)
+    if not cards and not columns:
+        return
+    with session.no_autoflush:
+        for column_id, objs in cards.items():
+            rank = place(Item, column_id)
+            for obj in objs:
+                obj.rank, rank = rank, rank_after(rank)
+        for project_id, objs in columns.items():
+            rank = place(BoardColumn, project_id)
+            for obj in sorted(objs, key=lambda c: c.order or 0):
+                obj.rank, rank = rank, rank_after(rank)
+
+ranks_cli = AppGroup('ranks', help='Maintain card and column ranks.')
+
+@ranks_cli.command('rebalance')
+@click.option('--project', 'project_id', type=int, default=None, help='Only this project (default: all).')
+def rebalance_command(project_id):
+    """Give every card and column an evenly spaced rank, keeping the current order."""
+    query = select(BoardColumn.id, BoardColumn.project_id)
+    if project_id is not None:
+        query = query.where(BoardColumn.project_id == project_id)
+    columns = db.session.execute(query).all()
+    cards = sum(rebalance(column_id=column_id) for column_id, _ in columns)
+    for board in sorted({board for _, board in columns}):
+        rebalance(project_id=board)
+    db.session.commit()
+    click.echo(f'Re-ranked {cards} cards in {len(columns)} columns.')
@@ -0,0 +1,92 @@
+"""Read-replica routing.
+
+SQLALCHEMY_REPLICA_URIS (a list; comma-separated in the environment) gives
+one engine per replica, created with SQLALCHEMY_ENGINE_OPTIONS. They are not
+Flask-SQLAlchemy binds, so `db.create_all()` and `db.engines` never see them.
+Within a GET or HEAD request, or one whose view is marked `@read_only`, a
+replica is picked at random and `RoutingSession` (models/db.py) sends every
+SELECT to it. Flushes and other statements always go to the primary, and
+once a request has written, its remaining reads go to the primary too.
+
+Replicas lag behind the primary. After a request writes, later requests
+with the same `Authorization` header read from the primary for
+REPLICA_STICKY_SECONDS (default 5; keep it above the replication lag), so
+clients see their own writes. Like the login limiter, stickiness is kept per
+process: with several workers, route a client to one worker or accept that
+another worker may serve it a replica read. Jobs, CLI commands and apps
+without replicas use the primary only.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from flask import current_app, g, request
+from sqlalchemy import create_engine
+
+READ_METHODS = frozenset(['GET', 'HEAD'])
+
+def read_only(view):
+    """Mark a view that only reads, so its SELECTs go to a replica whatever the HTTP method.
+
+    Put it directly below `@<blueprint>.route(...)`.
+    """
+    view.read_only = True
+    return view
+
+class ReplicaRouter:
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.sticky = {}  # client key -> monotonic time until which it reads from the primary
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Runs after db.init_app(), which fills in SQLALCHEMY_ENGINE_OPTIONS.
+        uris = os.environ.get('SQLALCHEMY_REPLICA_URIS', '')
+        app.config.setdefault('SQLALCHEMY_REPLICA_URIS', [uri.strip() for uri in uris.split(',') if uri.strip()])
+        app.config.setdefault('REPLICA_STICKY_SECONDS', 5)
+        app.config.setdefault('REPLICA_STICKY_MAX_CLIENTS', 100000)
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        app.extensions['db_replicas'] = [create_engine(uri, **options) for uri in app.config['SQLALCHEMY_REPLICA_URIS']]
+        app.before_request(self._route_request)
+        app.after_request(self._remember_write)
+
+    def _client(self):
+        header = request.headers.get(current_app.config.get('JWT_HEADER_NAME', 'Authorization'))
+        return hashlib.sha256(header.encode()).hexdigest() if header else None
+
+    def _route_request(self):
+        g._db_replica, g._db_wrote = None, False
+        replicas = current_app.extensions['db_replicas']
+        if not replicas:
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if request.method not in READ_METHODS and not getattr(view, 'read_only', False):
+            return
+        client = self._client()
+        if client is not None and self.sticky.get(client, 0) > time.monotonic():
+            return
+        g._db_replica = random.choice(replicas)
+
+    def _remember_write(self, response):
+        g.pop('_db_replica', None)
+        if not g.pop('_db_wrote', False):
+            return response
+        client = self._client()
+        if client is None:
+            return response
+        now = time.monotonic()
+        with self.lock:
+            if client not in self.sticky and len(self.sticky) >= current_app.config['REPLICA_STICKY_MAX_CLIENTS']:
+                self._purge(now)
+            self.sticky[client] = now + current_app.config['REPLICA_STICKY_SECONDS']
+        return response
+
+    def _purge(self, now):
+        for client in [c for c, until in self.sticky.items() if until <= now]:
+            del self.sticky[client]
+        if len(self.sticky) >= current_app.config['REPLICA_STICKY_MAX_CLIENTS']:
+            self.sticky.clear()
+
+replicas = ReplicaRouter()
@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import namedtuple
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import BigInteger, cast, event, exists, false, func, insert, inspect, literal, select, update
+from sqlalchemy.orm import Session
+from models.counter import Counter
+from models.db import db
+from models.permission import Permission
+from models.role import Role, role_permissions
+
+MAX_PERMISSION_BIT = 62  # permission_mask is a signed 64-bit integer
+BIT_COUNTER = 'permission_bit'  # Counter holding the next unused bit
+
+RoleInfo = namedtuple('RoleInfo', ['id', 'name', 'scope', 'mask', 'permissions'])
+
+def bit_value(bit):
+    return 1 << bit
+
+class _Catalog:
+    def __init__(self, roles, bits, loaded_at):
+        self.by_id = {role.id: role for role in roles}
+        self.by_key = {}
+        for role in sorted(roles, key=lambda r: r.id, reverse=True):
+            self.by_key[(role.name, role.scope)] = role  # the lowest id wins, like .first()
+        self.bits = bits
+        self.loaded_at = loaded_at
+
+class _CatalogState:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.catalog = None
+
+    def invalidate(self):
+        self.catalog = None
+
+class RoleCatalog:
+    """In-memory snapshot of roles and their permission bitmasks.
+
+    Roles change rarely, so lookups by id or (name, scope) and permission
+    checks are served from a dict instead of the database. Every Permission
+    owns a bit and every Role stores the OR of its permissions' bits in
+    `permission_mask`, so a check is an integer AND. The snapshot is loaded
+    at startup, dropped when a session that flushed a Role or Permission
+    ends its transaction, and reloaded at least every ROLE_CATALOG_TTL
+    seconds so that changes made by other processes are picked up.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ROLE_CATALOG_TTL', 300)
+        app.extensions['role_catalog'] = _CatalogState(app.config['ROLE_CATALOG_TTL'])
+
+    def _catalog(self):
+        state = current_app.extensions['role_catalog']
+        catalog = state.catalog
+        if catalog is None or time.monotonic() - catalog.loaded_at > state.ttl:
+            with state.lock:
+                catalog = state.catalog
+                if catalog is None or time.monotonic() - catalog.loaded_at > state.ttl:
+                    catalog = state.catalog = self._load()
+        return catalog
+
+    def _load(self):
+        loaded_at = time.monotonic()
+        bits = {action: bit for action, bit in db.session.execute(select(Permission.action, Permission.bit))
+                if bit is not None}
+        roles = []
+        for row in db.session.execute(select(Role.id, Role.name, Role.scope, Role.permission_mask)):
+            mask = row.permission_mask or 0
+            actions = frozenset(action for action, bit in bits.items() if mask & bit_value(bit))
+            roles.append(RoleInfo(row.id, row.name, row.scope, mask, actions))
+        return _Catalog(roles, bits, loaded_at)
+
+    def load(self):
+        current_app.extensions['role_catalog'].catalog = self._load()
+
+    def invalidate(self):
+        current_app.extensions['role_catalog'].invalidate()
+
+    def get(self, role_id):
+        """The RoleInfo for `role_id`, or None."""
+        if role_id is None:
+            return None
+        return self._catalog().by_id.get(role_id)
+
+    def find(self, name, scope):
+        """The RoleInfo named `name` in `scope`, or None."""
+        return self._catalog().by_key.get((name, scope))
+
+    def name_of(self, role_id):
+        role = self.get(role_id)
+        return role.name if role else None
+
+    def id_of(self, name, scope):
+        role = self.find(name, scope)
+        return role.id if role else None
+
+    def in_scope(self, scope):
+        return sorted((r for r in self._catalog().by_id.values() if r.scope == scope), key=lambda r: r.id)
+
+    def permissions(self, role_id):
+        """The frozenset of permission actions granted by `role_id` (empty if unknown)."""
+        role = self.get(role_id)
+        return role.permissions if role else frozenset()
+
+    def mask(self, *role_ids):
+        """The OR of the permission masks of `role_ids`; unknown ids and None contribute nothing."""
+        by_id = self._catalog().by_id
+        mask = 0
+        for role_id in role_ids:
+            role = by_id.get(role_id)
+            if role is not None:
+                mask |= role.mask
+        return mask
+
+    def action_bit(self, action):
+        """The mask bit of `action`, or 0 if it is not a known permission."""
+        bit = self._catalog().bits.get(action)
+        return 0 if bit is None else bit_value(bit)
+
+    def grants(self, role_id, action):
+        return bool(self.mask(role_id) & self.action_bit(action))
+
+    def grants_clause(self, role_id_column, action):
+        """SQL predicate: the role referenced by `role_id_column` grants `action`.
+
+        For filtering lists in the database, e.g. the projects in which the
+        user's membership allows `create_task`.
+        """
+        action_bit = self.action_bit(action)
+        if not action_bit:
+            return false()
+        granting = select(Role.id).where(Role.permission_mask.op('&')(literal(action_bit, BigInteger)) != 0)
+        return role_id_column.in_(granting)
+
+role_catalog = RoleCatalog()
+
+def _next_bits(session, count):
+    # A persistent counter rather than MAX(bit) + 1, so the bit of a deleted
+    # permission is never handed out again, and the UPDATE's row lock keeps
+    # concurrent flushes from taking the same bits.
+    counter = Counter.__table__
+    session.execute(insert(counter).from_select(
+        ['name', 'value'],
+        select(literal(BIT_COUNTER), select(func.coalesce(func.max(Permission.bit) + 1, 0)).scalar_subquery())
+        .where(~exists().where(counter.c.name == BIT_COUNTER))))
+    end = session.execute(update(counter).where(counter.c.name == BIT_COUNTER)
+                          .values(value=counter.c.value + count).returning(counter.c.value)).scalar_one()
+    if end - 1 > MAX_PERMISSION_BIT:
+        raise ValueError(f'Permission bits exhausted: only {MAX_PERMISSION_BIT + 1} permissions can be encoded')
+    return range(end - count, end)
+
+@event.listens_for(Session, 'before_flush')
+def _maintain_permission_masks(session, flush_context, instances):
+    with session.no_autoflush:
+        new_permissions = sorted((obj for obj in session.new if isinstance(obj, Permission) and obj.bit is None),
+                                 key=lambda p: p.action)
+        if new_permissions:
+            for permission, bit in zip(new_permissions, _next_bits(session, len(new_permissions))):
+                permission.bit = bit
+        for obj in session.deleted:
+            if isinstance(obj, Permission) and obj.bit is not None:
+                for role in obj.roles:
+                    role.permission_mask = (role.permission_mask or 0) & ~bit_value(obj.bit)
+        for obj in (*session.new, *session.dirty):
+            if isinstance(obj, Role) and (obj in session.new or inspect(obj).attrs.permissions.history.has_changes()):
+                obj.permission_mask = sum(bit_value(p.bit) for p in set(obj.permissions) if p.bit is not None)
+
+@event.listens_for(Session, 'after_flush')
+def _note_role_changes(session, flush_context):
+    if not has_app_context() or 'role_catalog' not in current_app.extensions:
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Role, Permission)):
+            session.info['role_catalog'] = current_app.extensions['role_catalog']
+            return
+
+# A reload between the flush and the end of the transaction may have seen
+# uncommitted rows, so invalidate on rollback as well as on commit.
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_role_catalog(session):
+    state = session.info.pop('role_catalog', None)
+    if state is not None:
+        state.invalidate()
+
+def sync_permission_masks(session):
+    """Assign missing permission bits and recompute every Role.permission_mask from role_permissions.
+
+    Needed after writing role_permissions rows without going through the ORM
+    relationship; the schema migration does the same for existing databases.
+    """
+    missing = session.query(Permission).filter(Permission.bit.is_(None)).order_by(Permission.id).all()
+    for permission, bit in zip(missing, _next_bits(session, len(missing))):
+        permission.bit = bit
+    session.flush()
+    # Bits are distinct and (role, permission) pairs unique, so SUM is a bitwise OR.
+    granted = select(func.coalesce(func.sum(cast(literal(1), BigInteger).op('<<')(Permission.bit)), 0)) \
+        .select_from(role_permissions) \
+        .join(Permission, Permission.id == role_permissions.c.permission_id) \
+        .where(role_permissions.c.role_id == Role.id) \
+        .scalar_subquery()
+    session.execute(update(Role).values(permission_mask=granted), execution_options={'synchronize_session': False})
+    session.info['role_catalog'] = current_app.extensions['role_catalog']
+    return session.query(func.count(Permission.id)).scalar()
+
+roles_cli = AppGroup('roles', help='Maintain role permission masks.')
+
+@roles_cli.command('sync-masks')
+def sync_masks_command():
+    """Assign permission bits and recompute every role's permission mask."""
+    count = sync_permission_masks(db.session)
+    db.session.commit()
+    click.echo(f'{count} permissions encoded; role masks recomputed.')
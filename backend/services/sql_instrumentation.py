@@ -0,0 +1,125 @@
+import heapq
+import logging
+import threading
+import time
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+class RequestQueryStats:
+    def __init__(self, keep):
+        self.count = 0
+        self.total_ms = 0.0
+        self.keep = keep
+        self.slowest = []  # min-heap of (ms, statement)
+
+    def record(self, statement, ms):
+        self.count += 1
+        self.total_ms += ms
+        entry = (ms, statement)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, entry)
+        elif ms > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+class EndpointQueryStats:
+    """Process-wide per-endpoint aggregates, safe to update from gunicorn threads."""
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def add(self, endpoint, stats):
+        with self.lock:
+            entry = self.endpoints.setdefault(endpoint, {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0, 'slowest': []
+            })
+            entry['requests'] += 1
+            entry['queries'] += stats.count
+            entry['max_queries'] = max(entry['max_queries'], stats.count)
+            entry['db_ms'] += stats.total_ms
+            entry['slowest'] = heapq.nlargest(self.keep, entry['slowest'] + stats.slowest)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                endpoint: {
+                    'requests': e['requests'],
+                    'queries': e['queries'],
+                    'avg_queries': round(e['queries'] / e['requests'], 2),
+                    'max_queries': e['max_queries'],
+                    'db_ms': round(e['db_ms'], 3),
+                    'avg_db_ms': round(e['db_ms'] / e['requests'], 3),
+                    'slowest': [{'ms': round(ms, 3), 'statement': statement} for ms, statement in e['slowest']],
+                }
+                for endpoint, e in self.endpoints.items()
+            }
+
+class SQLInstrumentation:
+    """Counts and times SQL statements per request.
+
+    Adds a `Server-Timing` header to every response, aggregates per-endpoint
+    statistics (served by GET /metrics/queries) and checks SQL_QUERY_BUDGETS,
+    a mapping of endpoint name to the maximum number of statements it may run.
+    With SQL_QUERY_BUDGET_ENFORCE (the test suite) exceeding a budget raises.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_INSTRUMENTATION', True)
+        app.config.setdefault('SQL_SLOW_QUERIES_KEPT', 5)
+        app.config.setdefault('SQL_QUERY_BUDGETS', {})
+        app.config.setdefault('SQL_QUERY_BUDGET_ENFORCE', False)
+        if not app.config['SQL_INSTRUMENTATION']:
+            return
+        app.extensions['sql_stats'] = EndpointQueryStats(app.config['SQL_SLOW_QUERIES_KEPT'])
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        from flask import current_app
+        g._sql_stats = RequestQueryStats(current_app.config['SQL_SLOW_QUERIES_KEPT'])
+        g._request_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        from flask import current_app
+        stats = g.pop('_sql_stats', None)
+        if stats is None:
+            return response
+        elapsed_ms = (time.perf_counter() - g.pop('_request_started')) * 1000
+        endpoint = request.endpoint or 'unknown'
+        current_app.extensions['sql_stats'].add(endpoint, stats)
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries", app;dur={elapsed_ms:.2f}'
+        )
+        budget = current_app.config['SQL_QUERY_BUDGETS'].get(endpoint)
+        if budget is not None and stats.count > budget:
+            message = f'{endpoint} ran {stats.count} SQL statements, budget is {budget}'
+            if current_app.config['SQL_QUERY_BUDGET_ENFORCE']:
+                raise QueryBudgetExceeded(message)
+            logger.warning('[sql] %s', message)
+        return response
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['_query_started'].pop()
+    if has_app_context():
+        stats = g.get('_sql_stats')
+        if stats is not None:
+            stats.record(statement, (time.perf_counter() - started) * 1000)
+
+sql_instrumentation = SQLInstrumentation()
@@ -0,0 +1,55 @@
+"""Incremental sync of a user's task inbox (items they report or are assigned).
+
+The first call returns every task and a signed token holding the time of the
+call; later calls with that token read the user's `item` rows of the change
+feed written since then (items the user was or is assigned to or reported
+by, whatever project they are in), return the changed items that are still
+in the inbox, the ids of the others (deleted, or no longer reported by or
+assigned to the user), and a fresh token. A transaction that commits after
+a sync may carry an earlier feed time, so each query reaches back
+TASK_SYNC_OVERLAP_SECONDS before the token; clients upsert by id and ignore
+unknown removals, so the overlap only repeats rows. A token older than the
+feed's retention gets a full snapshot again.
+"""
+from datetime import datetime, timedelta
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import or_, select
+from models.db import db
+from models.change_feed import ChangeFeed
+from models.item import Item
+from services.change_feed import change_feed
+
+class InvalidSyncToken(ValueError):
+    pass
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='task-sync')
+
+def make_token(user_id, since):
+    return _serializer().dumps({'u': user_id, 't': since.isoformat()})
+
+def read_token(token, user_id):
+    try:
+        data = _serializer().loads(token)
+        since = datetime.fromisoformat(data['t'])
+    except (BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidSyncToken('Invalid sync token')
+    if data.get('u') != user_id:
+        raise InvalidSyncToken('Sync token belongs to another user')
+    return since
+
+def sync_tasks(user_id, token=None):
+    """Return (tasks, removed item ids, next token, full snapshot?)."""
+    now = datetime.utcnow()
+    mine = or_(Item.assignee_id == user_id, Item.reporter_id == user_id)
+    since = None if token is None else read_token(token, user_id)
+    if since is None or since < change_feed.horizon():
+        tasks = Item.query.filter(mine).order_by(Item.created_at.desc()).all()
+        return tasks, [], make_token(user_id, now), True
+    since -= timedelta(seconds=current_app.config.get('TASK_SYNC_OVERLAP_SECONDS', 60))
+    changed = select(ChangeFeed.entity_id).distinct() \
+        .where(ChangeFeed.user_id == user_id, ChangeFeed.created_at > since, ChangeFeed.entity == 'item')
+    changed_ids = set(db.session.scalars(changed))
+    tasks = Item.query.filter(mine, Item.id.in_(changed_ids)).order_by(Item.updated_at).all() if changed_ids else []
+    return tasks, sorted(changed_ids - {task.id for task in tasks}), make_token(user_id, now), False
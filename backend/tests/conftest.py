@@ -4,21 +4,51 @@ from models.db import db
 from models.user import User
 from models.permission import Permission
 from models.role import Role
+from services.roles import role_catalog
 from werkzeug.security import generate_password_hash
 import os
 import time
 import tempfile
 
+# Maximum SQL statements per request; exceeding one fails the test (N+1 guard).
+QUERY_BUDGETS = {
+    'teams.get_team': 3,
+    'teams.get_my_teams': 2,
+    'teams.add_team_project': 3,
+    'teams.remove_team_project': 3,
+    'teams.add_team_member': 6,  # constant in team size: one INSERT ... SELECT covers every project
+    'teams.remove_team_member': 5,
+    'projects.create_project_route': 12,  # includes the board row lock taken when ranking the default columns
+    'admin.list_team_members': 2,
+    'column.get_columns_route': 3,
+    'projects.get_projects_route': 3,
+    'item.get_item_history_route': 4,
+    'reports.report_job': 6,
+    'reports.project_burndown': 3,
+    'reports.project_velocity': 3,
+    'reports.project_cycle_time': 3,
+}
+
+TEST_CONFIG = {
+    'TESTING': True,
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+    'WTF_CSRF_ENABLED': False,
+    'SECRET_KEY': 'test-secret-key',
+    'JWT_SECRET_KEY': 'test-jwt-key',
+    'JOBS_ALWAYS_EAGER': True,
+    'PASSWORD_HASH_WORKERS': 0,
+    'SQL_QUERY_BUDGETS': QUERY_BUDGETS,
+    'SQL_QUERY_BUDGET_ENFORCE': True,
+}
+
 @pytest.fixture
-def test_client():
+def app_config():
+    return dict(TEST_CONFIG)
+
+@pytest.fixture
+def test_client(app_config):
     # Create isolated app instance for each test
-    app = create_app({
-        'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
-        'WTF_CSRF_ENABLED': False,
-        'SECRET_KEY': 'test-secret-key',
-        'JWT_SECRET_KEY': 'test-jwt-key'
-    })
+    app = create_app(app_config)
     
     with app.app_context():
         db.create_all()
@@ -63,7 +93,8 @@ def init_database(test_client):
     db.session.commit()
 
     # Create Admin User
-    admin = User(username='admin', email='admin@example.com', password_hash=generate_password_hash('password'))
+    admin = User(username='admin', email='admin@example.com', password_hash=generate_password_hash('password'),
+                 firm_role_id=roles[0].id)
     db.session.add(admin)
     
     # Create Regular User
@@ -71,6 +102,7 @@ def init_database(test_client):
     db.session.add(user)
     
     db.session.commit()
+    role_catalog.load()  # as create_app does at startup
     return db
 
 @pytest.fixture
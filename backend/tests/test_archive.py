@@ -0,0 +1,94 @@
+from sqlalchemy import event, func, select
+from models.db import db
+from models.board_column import BoardColumn
+from models.item import Item
+from models.project import Project
+from models.team import Team
+
+def _project(test_client, auth_headers, name):
+    test_client.post('/teams', headers=auth_headers, json={'name': f'{name} Team', 'description': 'desc'})
+    team = Team.query.filter_by(name=f'{name} Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': name, 'owner_team_id': team.id})
+    project = Project.query.filter_by(name=name).first()
+    column = BoardColumn.query.filter_by(project_id=project.id).first()
+    ids = []
+    for n in range(3):
+        response = test_client.post(f'/items/projects/{project.id}/items', headers=auth_headers,
+                                    json={'title': f'Card {n}', 'column_id': column.id, 'parent_id': ids[0] if n == 2 else None})
+        ids.append(response.json['item']['id'])
+    return project.id, ids
+
+def _listed(test_client, auth_headers, project_id, archived=False):
+    response = test_client.get(f'/items/projects/{project_id}/items' + ('?archived=1' if archived else ''), headers=auth_headers)
+    assert response.json['total'] == len(response.json['items'])
+    return sorted(i['id'] for i in response.json['items'])
+
+def test_archive_and_restore_item_with_subtasks(test_client, auth_headers, init_database):
+    project_id, ids = _project(test_client, auth_headers, 'Shelf')
+    response = test_client.post(f'/items/{ids[0]}/archive', headers=auth_headers)
+    assert response.status_code == 200 and response.json['archived_items'] == 2
+    assert _listed(test_client, auth_headers, project_id) == [ids[1]]
+    assert _listed(test_client, auth_headers, project_id, archived=True) == [ids[0], ids[2]]
+    assert test_client.get(f'/items/{ids[0]}', headers=auth_headers).status_code == 404
+    assert test_client.patch(f'/items/{ids[2]}', headers=auth_headers, json={'title': 'x'}).status_code == 404
+
+    assert test_client.post(f'/items/{ids[1]}/restore', headers=auth_headers).status_code == 404
+    response = test_client.post(f'/items/{ids[0]}/restore', headers=auth_headers)
+    assert response.status_code == 200 and response.json['restored_items'] == 2
+    assert _listed(test_client, auth_headers, project_id) == ids
+    assert Item.query.get(ids[0]).version == 3
+
+def test_archive_and_restore_project(test_client, auth_headers, init_database):
+    project_id, ids = _project(test_client, auth_headers, 'Finished')
+    test_client.post(f'/items/{ids[1]}/archive', headers=auth_headers)
+    response = test_client.post(f'/projects/{project_id}/archive', headers=auth_headers)
+    assert response.status_code == 200 and response.json['archived_items'] == 2
+
+    listed = test_client.get('/projects', headers=auth_headers).json['projects']
+    assert project_id not in [p['id'] for p in listed]
+    archived = test_client.get('/projects?archived=1', headers=auth_headers).json['projects']
+    assert [p['id'] for p in archived] == [project_id]
+    assert test_client.get(f'/projects/{project_id}', headers=auth_headers).status_code == 404
+    assert test_client.get('/dashboard/stats', headers=auth_headers).json['projectCount'] == len(listed)
+    assert _listed(test_client, auth_headers, project_id) == []
+    assert test_client.post(f'/items/{ids[1]}/restore', headers=auth_headers).status_code == 409
+
+    response = test_client.post(f'/projects/{project_id}/restore', headers=auth_headers)
+    assert response.status_code == 200 and response.json['restored_items'] == 2
+    # The card archived on its own before the project stays archived.
+    assert _listed(test_client, auth_headers, project_id) == [ids[0], ids[2]]
+    assert test_client.get(f'/projects/{project_id}', headers=auth_headers).status_code == 200
+
+def test_archived_project_can_still_be_deleted(test_client, auth_headers, init_database):
+    project_id, ids = _project(test_client, auth_headers, 'Gone')
+    test_client.post(f'/projects/{project_id}/archive', headers=auth_headers)
+    assert test_client.delete(f'/projects/{project_id}', headers=auth_headers).status_code == 200
+    assert db.session.scalar(select(Item.id).where(Item.id.in_(ids)), execution_options={'include_archived': True}) is None
+
+def test_board_queries_use_the_active_partial_index(test_client, auth_headers, init_database):
+    statements = []
+    capture = lambda conn, cursor, statement, parameters, context, executemany: statements.append((statement, parameters))
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        Item.query.filter_by(column_id=1).order_by(Item.rank).all()
+        db.session.query(Item.status, func.count()).filter(Item.project_id == 1).group_by(Item.status).all()
+        Project.query.filter_by(owner_team_id=1).all()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    plans = [' '.join(str(row) for row in db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params))
+             for sql, params in statements]
+    assert 'ix_item_column_rank' in plans[0] and 'ix_item_project_status' in plans[1]
+    assert 'ix_project_owner_team' in plans[2]
+
+def test_restored_card_keeps_a_distinct_rank(test_client, auth_headers, init_database):
+    project_id, ids = _project(test_client, auth_headers, 'Ranks')
+    test_client.post(f'/items/{ids[2]}/archive', headers=auth_headers)  # the last card
+    column = BoardColumn.query.filter_by(project_id=project_id).first()
+    response = test_client.post(f'/items/projects/{project_id}/items', headers=auth_headers,
+                                json={'title': 'Later', 'column_id': column.id})
+    later = response.json['item']['id']
+    test_client.post(f'/items/{ids[2]}/restore', headers=auth_headers)
+    ranks = db.session.scalars(select(Item.rank).where(Item.column_id == column.id)).all()
+    assert len(set(ranks)) == len(ranks) == 4
+    listed = test_client.get(f'/items/projects/{project_id}/items?column_id={column.id}', headers=auth_headers).json['items']
+    assert [i['id'] for i in listed] == [*ids, later]
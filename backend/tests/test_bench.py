@@ -0,0 +1,45 @@
+import pytest
+from app import create_app
+from bench.seed import BENCH_PASSWORD, OrgSpec, bench_email, bench_user_ids, seed_org
+from bench.workload import ClientTarget, compare, run_workload
+from models.db import db
+from models.activity_log import ActivityLog
+from models.item import Item
+from models.project_member import ProjectMember
+
+@pytest.fixture
+def bench_app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'bench.db'}",
+        'SECRET_KEY': 'test-secret-key',
+        'JWT_SECRET_KEY': 'test-jwt-key',
+        'JOBS_ALWAYS_EAGER': True,
+    })
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+def test_seed_and_replay_smoke(bench_app):
+    spec = OrgSpec(users=6, teams=2, projects=3, items=60, activity_logs=100)
+    with bench_app.app_context():
+        seed_org(spec, log=lambda message: None)
+        assert Item.query.count() == 60
+        assert ActivityLog.query.count() == 100
+        assert ProjectMember.query.count() == 9
+        emails = [bench_email(uid) for uid in bench_user_ids()]
+        db.session.remove()
+    assert len(emails) == 6
+    result = run_workload(ClientTarget(bench_app), emails, BENCH_PASSWORD, requests=60, concurrency=2)
+    assert result['total']['count'] > 0
+    assert result['total']['errors'] == 0
+    stats = result['endpoints']['GET /projects']
+    assert stats['p50_ms'] <= stats['p95_ms'] <= stats['max_ms']
+    assert compare(result, result) == []
+
+def test_compare_flags_regressions():
+    baseline = {'endpoints': {'GET /projects': {'count': 100, 'p95_ms': 10.0}}}
+    current = {'endpoints': {'GET /projects': {'count': 100, 'p95_ms': 13.0}}}
+    assert compare(baseline, current, tolerance=0.5) == []
+    [regression] = compare(baseline, current, tolerance=0.25)
+    assert regression['endpoint'] == 'GET /projects' and regression['change'] == 0.3
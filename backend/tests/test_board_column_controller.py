@@ -1,7 +1,12 @@
 import pytest
+from models.db import db
+from models.activity_change import ActivityChange
+from models.activity_log import ActivityLog
+from models.board_column import BoardColumn
+from models.change_feed import ChangeFeed
+from models.item import Item
 from models.project import Project
 from models.team import Team
-from models.board_column import BoardColumn
 
 def test_get_columns(test_client, auth_headers, init_database):
     # Setup
@@ -28,3 +33,71 @@ def test_create_column(test_client, auth_headers, init_database):
     })
     assert response.status_code == 201
     assert BoardColumn.query.filter_by(name='To Do', project_id=project.id).first() is not None
+
+def test_update_column_if_match(test_client, auth_headers, init_database):
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Ver Team', 'description': 'desc'})
+    team = Team.query.filter_by(name='Ver Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': 'Ver P', 'description': 'desc', 'owner_team_id': team.id})
+    project = Project.query.filter_by(name='Ver P').first()
+    column = test_client.get(f'/projects/{project.id}/columns', headers=auth_headers).json['columns'][0]
+
+    stale = {**auth_headers, 'If-Match': f'"{column["version"]}"'}
+    response = test_client.patch(f'/columns/{column["id"]}', headers=stale, json={'name': 'Backlog'})
+    assert response.status_code == 200 and response.json['column']['version'] == column['version'] + 1
+    response = test_client.patch(f'/columns/{column["id"]}', headers=stale, json={'name': 'Icebox'})
+    assert response.status_code == 409
+    assert response.json['current']['name'] == 'Backlog'
+
+def test_reorder_and_delete_columns_in_bulk(test_client, auth_headers, init_database):
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Bulk Team', 'description': 'desc'})
+    team = Team.query.filter_by(name='Bulk Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': 'Bulk P', 'description': 'desc', 'owner_team_id': team.id})
+    project = Project.query.filter_by(name='Bulk P').first()
+    ids = [c['id'] for c in test_client.get(f'/projects/{project.id}/columns', headers=auth_headers).json['columns']]
+
+    response = test_client.put(f'/projects/{project.id}/columns/order', headers=auth_headers, json={'column_ids': ids[::-1]})
+    assert response.status_code == 200
+    assert [(c['id'], c['order']) for c in response.json['columns']] == [(i, n) for n, i in enumerate(ids[::-1])]
+    assert test_client.put(f'/projects/{project.id}/columns/order', headers=auth_headers,
+                           json={'column_ids': ids[1:]}).status_code == 400
+
+    cards = [test_client.post(f'/items/projects/{project.id}/items', headers=auth_headers,
+                              json={'title': f'Card {n}', 'column_id': ids[n % 2]}).json['item']['id'] for n in range(4)]
+    assert test_client.delete(f'/columns/{ids[0]}', headers=auth_headers).status_code == 409
+    response = test_client.delete(f'/columns/{ids[0]}?move_to={ids[1]}', headers=auth_headers)
+    assert (response.status_code, response.json['moved_items']) == (200, 2)
+    assert BoardColumn.query.get(ids[0]) is None
+    listed = test_client.get(f'/items/projects/{project.id}/items?column_id={ids[1]}', headers=auth_headers).json['items']
+    assert [i['id'] for i in listed] == [cards[1], cards[3], cards[0], cards[2]]
+    assert ActivityChange.query.filter_by(field='column_id', new_value=str(ids[1])).count() == 2
+    assert ChangeFeed.query.filter_by(entity='item', op='update').count() == 2
+    moved = Item.query.filter(Item.id.in_([cards[0], cards[2]])).all()
+    assert {i.version for i in moved} == {2}
+    assert all(i.updated_at > i.created_at for i in moved)
+    linked = db.session.query(ActivityChange.item_id, ActivityLog.item_id) \
+        .join(ActivityLog, ActivityLog.id == ActivityChange.activity_log_id).filter(ActivityChange.field == 'column_id')
+    assert sorted(linked) == [(cards[0], cards[0]), (cards[2], cards[2])]
+
+def test_moving_cards_counts_archived_cards_in_both_columns(test_client, auth_headers, init_database):
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Shelf Team', 'description': 'desc'})
+    team = Team.query.filter_by(name='Shelf Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': 'Shelf P', 'owner_team_id': team.id})
+    project = Project.query.filter_by(name='Shelf P').first()
+    ids = [c['id'] for c in test_client.get(f'/projects/{project.id}/columns', headers=auth_headers).json['columns']]
+    source = [test_client.post(f'/items/projects/{project.id}/items', headers=auth_headers,
+                               json={'title': f'Source {n}', 'column_id': ids[0]}).json['item']['id'] for n in range(2)]
+    target = [test_client.post(f'/items/projects/{project.id}/items', headers=auth_headers,
+                               json={'title': f'Target {n}', 'column_id': ids[1]}).json['item']['id'] for n in range(3)]
+    archived = [source[1], *target[1:]]
+    for card in archived:
+        test_client.post(f'/items/{card}/archive', headers=auth_headers)
+
+    response = test_client.delete(f'/columns/{ids[0]}?move_to={ids[1]}', headers=auth_headers)
+    assert (response.status_code, response.json['moved_items']) == (200, 2)
+    assert {c.item_id for c in ActivityChange.query.filter_by(field='column_id')} == set(source)
+    assert ChangeFeed.query.filter_by(entity='item', entity_id=source[1], op='update').count() == 2  # archive, move
+
+    for card in archived:
+        test_client.post(f'/items/{card}/restore', headers=auth_headers)
+    listed = test_client.get(f'/items/projects/{project.id}/items?column_id={ids[1]}', headers=auth_headers).json['items']
+    assert [i['id'] for i in listed] == [*target, *source]
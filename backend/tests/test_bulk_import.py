@@ -0,0 +1,89 @@
+import json
+from flask import current_app
+from models.db import db
+from models.comment import Comment
+from models.item import Item
+from models.project import Project
+from models.project_member import ProjectMember
+from models.team import Team
+from models.team_member import TeamMember
+from models.user import User
+from services.bulk_import import parse_datetime
+
+JIRA_ISSUES = '''Issue key,Summary,Issue Type,Status,Project key,Priority,Reporter,Assignee,Created,Parent id
+APP-2,Login fails on Safari,Sub-task,In Progress,APP,Highest,jane@corp.test,joe@corp.test,12/Mar/24 10:15 AM,APP-1
+APP-1,Authentication epic,Epic,Done,APP,Medium,jane@corp.test,,11/Mar/24 9:00 AM,
+APP-3,Unknown status,Task,Frozen,APP,Low,jane@corp.test,,11/Mar/24 9:00 AM,
+APP-4,Unknown project,Task,To Do,NOPE,Low,jane@corp.test,,11/Mar/24 9:00 AM,
+'''
+
+def _write_bundle(path):
+    (path / 'users.csv').write_text('id,username,email\nu1,jane,jane@corp.test\nu2,joe,joe@corp.test\nu3,admin2,admin@example.com\n')
+    (path / 'teams.ndjson').write_text(json.dumps({'id': 't1', 'name': 'Platform', 'manager': 'u1', 'members': 'u2;u1'}) + '\n')
+    (path / 'projects.csv').write_text('Project key,Project name,Team\nAPP,Customer App,t1\n')
+    (path / 'items.csv').write_text(JIRA_ISSUES)
+    (path / 'comments.csv').write_text('Issue key,Author,Comment body,Created\nAPP-2,joe,"Repro, with ""quotes""",2024-03-13T08:00:00Z\n')
+
+def test_import_bundle_remaps_ids(test_client, init_database, tmp_path):
+    _write_bundle(tmp_path)
+    result = current_app.test_cli_runner().invoke(args=['import', 'bundle', str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert 'items: imported 2, already present 0, skipped 2' in result.output
+    assert 'users: imported 2, already present 1' in result.output
+
+    jane = User.query.filter_by(email='jane@corp.test').one()
+    joe = User.query.filter_by(email='joe@corp.test').one()
+    team = Team.query.filter_by(name='Platform').one()
+    assert team.manager_id == jane.id
+    assert TeamMember.query.filter_by(team_id=team.id).count() == 2
+    project = Project.query.filter_by(name='Customer App').one()
+    assert project.owner_id == jane.id and project.owner_team_id == team.id
+    assert project.board_columns.count() == 4
+    members = {m.user_id: m.role.name for m in ProjectMember.query.filter_by(project_id=project.id)}
+    assert members == {jane.id: 'Project Owner', joe.id: 'Project Contributor'}
+
+    epic = Item.query.filter_by(title='Authentication epic').one()
+    subtask = Item.query.filter_by(title='Login fails on Safari').one()
+    assert (epic.type, epic.status) == ('epic', 'done')
+    assert (subtask.type, subtask.status, subtask.priority) == ('task', 'inprogress', 'Critical')
+    assert subtask.parent_id == epic.id
+    assert subtask.assignee_id == joe.id and subtask.reporter_id == jane.id
+    assert subtask.column_id == project.board_columns.filter_by(order=1).one().id
+    assert subtask.created_at == parse_datetime('2024-03-12T10:15:00')
+    comment = Comment.query.one()
+    assert (comment.item_id, comment.user_id, comment.content) == (subtask.id, joe.id, 'Repro, with "quotes"')
+
+def test_import_single_entity_resolves_natural_keys(test_client, init_database, tmp_path):
+    path = tmp_path / 'projects.ndjson'
+    path.write_text(json.dumps({'name': 'Solo', 'owner': 'user@example.com'}) + '\n' +
+                    json.dumps({'name': 'Orphan'}) + '\n')
+    result = current_app.test_cli_runner().invoke(args=['import', 'projects', str(path)])
+    assert result.exit_code == 0, result.output
+    assert 'imported 1, already present 0, skipped 1' in result.output
+    user = User.query.filter_by(email='user@example.com').one()
+    project = Project.query.filter_by(name='Solo').one()
+    assert project.owner_id == user.id
+    # New rows keep working with ORM-assigned ids afterwards.
+    db.session.add(Project(name='After', owner_id=user.id))
+    db.session.commit()
+    assert Project.query.filter_by(name='After').one().id > project.id
+
+def test_import_comments_on_existing_items(test_client, init_database, tmp_path):
+    _write_bundle(tmp_path)
+    current_app.test_cli_runner().invoke(args=['import', 'bundle', str(tmp_path)])
+    epic = Item.query.filter_by(title='Authentication epic').one()
+    path = tmp_path / 'later.csv'
+    # A bare numeric id is a source id, which this run has not seen.
+    path.write_text(f'Issue id,Author,Comment body\nlocal:{epic.id},jane,Follow-up\n{epic.id},jane,Lost\n')
+    result = current_app.test_cli_runner().invoke(args=['import', 'comments', str(path)])
+    assert result.exit_code == 0, result.output
+    assert 'imported 1, already present 0, skipped 1' in result.output
+    assert Comment.query.filter_by(content='Follow-up').one().item_id == epic.id
+
+    path = tmp_path / 'subtasks.csv'
+    path.write_text(f'Issue id,Summary,Project key,Reporter,Parent id\n'
+                    f'10,Linked,Customer App,jane,local:{epic.id}\n11,Orphan,Customer App,jane,{epic.id}\n')
+    result = current_app.test_cli_runner().invoke(args=['import', 'items', str(path)])
+    assert 'items: imported 2, already present 0, skipped 0, unknown parent 1' in result.output
+    assert Item.query.filter_by(title='Linked').one().parent_id == epic.id
+    assert Item.query.filter_by(title='Orphan').one().parent_id is None
@@ -0,0 +1,74 @@
+import time
+import pytest
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+from models.user import User
+from services.credentials import credentials, method_prefix, CredentialServiceBusy
+
+def _login(test_client, password='password'):
+    return test_client.post('/login', json={'email': 'admin@example.com', 'password': password})
+
+def test_login_is_rate_limited_per_account(test_client, init_database):
+    current_app.extensions['credentials'].limiter.limit = 3
+    for _ in range(3):
+        assert _login(test_client, 'wrong').status_code == 401
+    response = _login(test_client)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    other = test_client.post('/login', json={'email': 'user@example.com', 'password': 'password'})
+    assert other.status_code == 200
+
+def test_login_rehashes_with_configured_method(test_client, init_database):
+    user = User.query.filter_by(email='admin@example.com').first()
+    assert user.password_hash.startswith('scrypt:')
+    current_app.extensions['credentials'].method = 'pbkdf2:sha256:1000'
+    assert _login(test_client).status_code == 200
+    user = User.query.filter_by(email='admin@example.com').first()
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+    assert not credentials.needs_rehash(user.password_hash)
+    assert _login(test_client).status_code == 200
+    assert _login(test_client, 'wrong').status_code == 401
+
+def test_saturated_pool_returns_503(test_client, init_database):
+    state = current_app.extensions['credentials']
+    state.workers = 1
+    state.slots = type(state.slots)(1)
+    state.slots.acquire()
+    response = _login(test_client)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    state.slots.release()
+
+def test_hashing_in_process_pool(test_client):
+    state = current_app.extensions['credentials']
+    state.workers = 1
+    state.method = 'pbkdf2:sha256:1000'
+    try:
+        password_hash = credentials.hash_password('secret')
+        assert check_password_hash(password_hash, 'secret')
+        assert credentials.verify_password(password_hash, 'secret')
+        assert not credentials.verify_password(password_hash, 'other')
+    finally:
+        state.executor.shutdown()
+
+@pytest.mark.parametrize('method', ['scrypt', 'scrypt:16384:8:1', 'pbkdf2', 'pbkdf2:sha512', 'pbkdf2:sha256:1000'])
+def test_method_prefix_matches_werkzeug(method):
+    assert method_prefix(method) == generate_password_hash('x', method=method).split('$', 1)[0]
+
+@pytest.mark.parametrize('method', ['bcrypt', 'scrypt:1', 'pbkdf2:nosuchhash', 'pbkdf2:sha256:many'])
+def test_method_prefix_rejects_unknown_methods(method):
+    with pytest.raises(ValueError):
+        method_prefix(method)
+
+def test_timed_out_hash_keeps_its_slot(test_client):
+    state = current_app.extensions['credentials']
+    state.workers, state.timeout = 1, 0.01
+    state.slots = type(state.slots)(1)
+    try:
+        with pytest.raises(CredentialServiceBusy):
+            state.run('hash', time.sleep, 1)
+        # The sleep is still running in the pool, so its slot is not free yet.
+        assert not state.slots.acquire(blocking=False)
+        assert state.slots.acquire(timeout=5)
+    finally:
+        state.executor.shutdown()
@@ -0,0 +1,75 @@
+from flask import current_app
+from models.activity_log import ActivityLog
+from models.board_column import BoardColumn
+from models.change_feed import ChangeFeed
+from models.comment import Comment
+from models.db import db
+from models.item import Item
+from models.project import Project
+from models.project_member import ProjectMember
+from models.team import Team
+from models.team_member import TeamMember
+from models.user import User
+
+def _project_with_items(test_client, auth_headers, name, count=3):
+    test_client.post('/teams', headers=auth_headers, json={'name': f'{name} Team', 'description': 'desc'})
+    team = Team.query.filter_by(name=f'{name} Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': name, 'owner_team_id': team.id})
+    project = Project.query.filter_by(name=name).first()
+    column = BoardColumn.query.filter_by(project_id=project.id).first()
+    ids = []
+    for n in range(count):
+        response = test_client.post(f'/items/projects/{project.id}/items', headers=auth_headers,
+                                    json={'title': f'Card {n}', 'column_id': column.id, 'parent_id': ids[0] if ids else None})
+        ids.append(response.json['item']['id'])
+        test_client.post(f'/items/{ids[-1]}/comments', headers=auth_headers, json={'content': 'note'})
+    return project.id, ids
+
+def _leftovers(project_id, ids):
+    return (Item.query.filter_by(project_id=project_id).count(), Comment.query.filter(Comment.item_id.in_(ids)).count(),
+            ActivityLog.query.filter(ActivityLog.item_id.in_(ids)).count(), BoardColumn.query.filter_by(project_id=project_id).count(),
+            ProjectMember.query.filter_by(project_id=project_id).count(), Project.query.get(project_id) is not None)
+
+def test_delete_project_removes_the_whole_tree(test_client, auth_headers, init_database):
+    project_id, ids = _project_with_items(test_client, auth_headers, 'Doomed')
+    response = test_client.delete(f'/projects/{project_id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert _leftovers(project_id, ids) == (0, 0, 0, 0, 0, False)
+    assert ChangeFeed.query.filter_by(project_id=project_id, entity='item', op='delete').count() == 3
+
+def test_large_project_is_deleted_in_background_chunks(test_client, auth_headers, init_database):
+    project_id, ids = _project_with_items(test_client, auth_headers, 'Huge', count=5)
+    current_app.config.update(DELETION_INLINE_ITEMS=2, DELETION_CHUNK_SIZE=2)
+    response = test_client.delete(f'/projects/{project_id}', headers=auth_headers)
+    assert response.status_code == 202 and response.json['job_id']
+    assert _leftovers(project_id, ids) == (0, 0, 0, 0, 0, False)
+
+def test_delete_item_keeps_subtasks(test_client, auth_headers, init_database):
+    project_id, ids = _project_with_items(test_client, auth_headers, 'Parent')
+    assert test_client.delete(f'/items/{ids[0]}', headers=auth_headers).status_code == 200
+    assert Item.query.get(ids[0]) is None and Comment.query.filter_by(item_id=ids[0]).count() == 0
+    assert [(i.parent_id, i.version) for i in Item.query.filter(Item.id.in_(ids[1:]))] == [(None, 2), (None, 2)]
+
+def test_delete_user_and_team_leave_no_dangling_rows(test_client, auth_headers, init_database):
+    admin_id = User.query.filter_by(email='admin@example.com').first().id
+    user = User.query.filter_by(email='user@example.com').first()
+    user_id = user.id
+    project_id, ids = _project_with_items(test_client, auth_headers, 'Shared', count=1)
+    team_id = Team.query.filter_by(name='Shared Team').first().id
+    test_client.post(f'/teams/{team_id}/members', headers=auth_headers, json={'email': user.email})
+    test_client.patch(f'/items/{ids[0]}', headers=auth_headers, json={'assignee_id': user_id})
+    Item.query.get(ids[0]).reporter_id = user_id
+    db.session.commit()
+
+    assert test_client.delete(f'/users/{user_id}', headers=auth_headers).status_code == 200
+    item = Item.query.get(ids[0])
+    assert (item.assignee_id, item.reporter_id) == (None, admin_id)
+    # The reassigned task is announced in the successor's inbox.
+    assert ChangeFeed.query.filter_by(entity='item', entity_id=ids[0], op='update', user_id=admin_id).count() >= 1
+    assert TeamMember.query.filter_by(user_id=user_id).count() == 0
+    assert ProjectMember.query.filter_by(user_id=user_id).count() == 0
+    assert test_client.delete(f'/users/{admin_id}', headers=auth_headers).status_code == 400
+
+    assert test_client.delete(f'/teams/{team_id}', headers=auth_headers).status_code == 200
+    assert TeamMember.query.filter_by(team_id=team_id).count() == 0
+    assert Project.query.get(project_id).owner_team_id is None
@@ -0,0 +1,145 @@
+import pytest
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.orm.exc import StaleDataError
+from models.activity_change import ActivityChange
+from models.activity_log import ActivityLog
+from models.board_column import BoardColumn
+from models.change_feed import ChangeFeed
+from models.db import db
+from models.item import Item
+from models.project import Project
+from models.team import Team
+from models.user import User
+
+@pytest.fixture
+def project(test_client, auth_headers, init_database):
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Item Team', 'description': 'desc'})
+    team = Team.query.filter_by(name='Item Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': 'Item Project', 'description': 'desc', 'owner_team_id': team.id})
+    return Project.query.filter_by(name='Item Project').first()
+
+def _create_item(test_client, auth_headers, project, **fields):
+    column = BoardColumn.query.filter_by(project_id=project.id).order_by(BoardColumn.order).first()
+    response = test_client.post(f'/items/projects/{project.id}/items', headers=auth_headers,
+                                json={'title': 'Task', 'column_id': column.id, **fields})
+    assert response.status_code == 201, response.json
+    return response.json['item']['id']
+
+def test_update_item_records_structured_changes(test_client, auth_headers, project):
+    item_id = _create_item(test_client, auth_headers, project)
+    user = User.query.filter_by(email='user@example.com').first()
+    response = test_client.patch(f'/items/{item_id}', headers=auth_headers, json={'status': 'done', 'assignee_id': user.id})
+    assert response.status_code == 200
+
+    log = ActivityLog.query.filter_by(item_id=item_id, action='updated').one()
+    assert 'status: todo -> done' in log.details
+    changes = {c.field: c for c in ActivityChange.query.filter_by(activity_log_id=log.id)}
+    assert (changes['status'].old_value, changes['status'].new_value) == ('todo', 'done')
+    assert (changes['assignee_id'].old_value, changes['assignee_id'].new_value) == (None, str(user.id))
+
+    response = test_client.get(f'/items/{item_id}/history?field=status', headers=auth_headers)
+    assert response.status_code == 200
+    assert [h['new_value'] for h in response.json['history']] == ['done']
+
+def test_get_items_rejects_bad_filters(test_client, auth_headers, project):
+    for query in ('column_id=abc', 'limit=ten', 'offset=x'):
+        response = test_client.get(f'/items/projects/{project.id}/items?{query}', headers=auth_headers)
+        assert response.status_code == 400
+
+def test_delete_item_removes_history(test_client, auth_headers, project):
+    item_id = _create_item(test_client, auth_headers, project)
+    test_client.patch(f'/items/{item_id}', headers=auth_headers, json={'title': 'Renamed'})
+    response = test_client.delete(f'/items/{item_id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert ActivityChange.query.filter_by(item_id=item_id).count() == 0
+
+def test_delete_subtask_item_is_logged_on_its_parent(test_client, auth_headers, project):
+    parent_id = _create_item(test_client, auth_headers, project)
+    child_id = _create_item(test_client, auth_headers, project, parent_id=parent_id)
+    assert test_client.delete(f'/items/{child_id}', headers=auth_headers).status_code == 200
+    log = ActivityLog.query.filter_by(item_id=parent_id, action='deleted').one()
+    assert log.details == f'Subtask {child_id} deleted'
+
+def test_my_tasks_sync_returns_only_changes(test_client, auth_headers, user_auth_headers, project):
+    user = User.query.filter_by(email='user@example.com').first()
+    admin = User.query.filter_by(email='admin@example.com').first()
+    first = _create_item(test_client, auth_headers, project, title='First', assignee_id=user.id)
+    second = _create_item(test_client, auth_headers, project, title='Second', assignee_id=user.id)
+
+    snapshot = test_client.get('/items/my-tasks/sync', headers=user_auth_headers).json
+    assert snapshot['full'] and sorted(t['id'] for t in snapshot['tasks']) == [first, second]
+    current_app.config['TASK_SYNC_OVERLAP_SECONDS'] = 0
+
+    def sync(token):
+        response = test_client.get(f'/items/my-tasks/sync?token={token}', headers=user_auth_headers)
+        assert response.status_code == 200
+        return response.json
+
+    delta = sync(snapshot['token'])
+    assert (delta['tasks'], delta['removed'], delta['full']) == ([], [], False)
+    test_client.patch(f'/items/{first}', headers=auth_headers, json={'status': 'done'})
+    test_client.patch(f'/items/{second}', headers=auth_headers, json={'assignee_id': admin.id})
+    delta = sync(delta['token'])
+    assert [(t['id'], t['status']) for t in delta['tasks']] == [(first, 'done')]
+    assert delta['removed'] == [second]
+    test_client.delete(f'/items/{first}', headers=auth_headers)
+    delta = sync(delta['token'])
+    assert (delta['tasks'], delta['removed']) == ([], [first])
+
+    admin_token = test_client.get('/items/my-tasks/sync', headers=auth_headers).json['token']
+    assert test_client.get(f'/items/my-tasks/sync?token={admin_token}', headers=user_auth_headers).status_code == 400
+    assert test_client.get('/items/my-tasks/sync?token=garbage', headers=user_auth_headers).status_code == 400
+
+def test_my_tasks_sync_ignores_other_users_items(test_client, auth_headers, user_auth_headers, project):
+    user = User.query.filter_by(email='user@example.com').first()
+    test_client.post(f'/admin/users/{user.id}/projects/{project.id}', headers=auth_headers)
+    mine = _create_item(test_client, auth_headers, project, assignee_id=user.id)
+    others = _create_item(test_client, auth_headers, project)
+    token = test_client.get('/items/my-tasks/sync', headers=user_auth_headers).json['token']
+    current_app.config['TASK_SYNC_OVERLAP_SECONDS'] = 0
+    test_client.patch(f'/items/{others}', headers=auth_headers, json={'status': 'done'})
+    test_client.patch(f'/items/{mine}', headers=auth_headers, json={'status': 'done'})
+    delta = test_client.get(f'/items/my-tasks/sync?token={token}', headers=user_auth_headers).json
+    assert ([t['id'] for t in delta['tasks']], delta['removed']) == ([mine], [])
+
+def test_change_feed_records_orm_and_bulk_writes(test_client, auth_headers, project):
+    commented = _create_item(test_client, auth_headers, project)
+    item_id = _create_item(test_client, auth_headers, project)
+    test_client.patch(f'/items/{item_id}', headers=auth_headers, json={'title': 'Renamed'})
+    test_client.delete(f'/items/{item_id}', headers=auth_headers)
+    test_client.post(f'/items/{commented}/comments', headers=auth_headers, json={'content': 'Hi'})
+    ops = [(c.entity, c.op) for c in ChangeFeed.query.filter_by(entity_id=item_id, entity='item').order_by(ChangeFeed.seq)]
+    assert ops == [('item', 'insert'), ('item', 'update'), ('item', 'delete')]
+    comment = ChangeFeed.query.filter_by(entity='comment').one()
+    assert (comment.op, comment.project_id) == ('insert', project.id)
+
+    # Team membership syncs with a bulk INSERT ... SELECT, outside flush events.
+    user = User.query.filter_by(email='user@example.com').first()
+    test_client.post(f'/teams/{project.owner_team_id}/members', headers=auth_headers, json={'email': user.email})
+    added = ChangeFeed.query.filter_by(entity='project_member', entity_id=user.id).one()
+    # Membership rows are not in anyone's task inbox.
+    assert (added.op, added.project_id, added.user_id) == ('insert', project.id, None)
+
+def test_update_item_with_stale_if_match_conflicts(test_client, auth_headers, project):
+    item_id = _create_item(test_client, auth_headers, project)
+    etag = test_client.get(f'/items/{item_id}', headers=auth_headers).headers['ETag']
+    assert etag == '"1"'
+
+    response = test_client.patch(f'/items/{item_id}', headers={**auth_headers, 'If-Match': etag}, json={'title': 'Mine'})
+    assert response.status_code == 200
+    assert (response.headers['ETag'], response.json['item']['version']) == ('"2"', 2)
+
+    response = test_client.patch(f'/items/{item_id}', headers={**auth_headers, 'If-Match': etag}, json={'title': 'Lost'})
+    assert response.status_code == 409
+    assert (response.json['current']['title'], response.json['current']['version']) == ('Mine', 2)
+    assert response.headers['ETag'] == '"2"'
+    assert test_client.patch(f'/items/{item_id}', headers=auth_headers, json={'status': 'done'}).status_code == 200
+
+def test_concurrent_item_update_raises_stale_data(test_client, auth_headers, project):
+    item = Item.query.get(_create_item(test_client, auth_headers, project))
+    db.session.execute(update(Item.__table__).where(Item.id == item.id).values(version=Item.version + 1))
+    item.title = 'Overwrite'
+    with pytest.raises(StaleDataError):
+        db.session.flush()
+    db.session.rollback()
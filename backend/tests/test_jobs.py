@@ -0,0 +1,122 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+import pytest
+from flask import current_app
+from app import create_app
+from models.db import db
+from models.job import Job
+from models.notification import Notification
+from models.item import Item
+from models.user import User
+from services.jobs import jobs
+
+_flaky_calls = []
+
+@jobs.task('test_flaky')
+def flaky(fail_times):
+    _flaky_calls.append(fail_times)
+    if len(_flaky_calls) <= fail_times:
+        raise RuntimeError('boom')
+    return {'calls': len(_flaky_calls)}
+
+@pytest.fixture
+def threaded_app():
+    # A file-backed SQLite database so worker threads get their own connections.
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'SECRET_KEY': 'test-secret-key',
+        'JWT_SECRET_KEY': 'test-jwt-key',
+        'JOBS_ALWAYS_EAGER': False,
+        'JOBS_WORKERS': 2,
+        'JOBS_RETRY_DELAY': 0.01,
+    })
+    yield app
+    app.extensions['jobs'].executor.shutdown(wait=True)
+    with app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+    os.remove(path)
+
+def _wait_for(app, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            status = job.status
+            db.session.remove()
+        if status in ('done', 'failed'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} still {status}')
+
+def test_job_runs_after_commit_in_background(threaded_app):
+    with threaded_app.app_context():
+        user = User(username='u', email='u@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        job = jobs.enqueue('notify', user_ids=[user.id], message='hello')
+        db.session.commit()
+        job_id = job.id
+    assert _wait_for(threaded_app, job_id) == 'done'
+    with threaded_app.app_context():
+        assert Notification.query.filter_by(message='hello').count() == 1
+        assert db.session.get(Job, job_id).finished_at is not None
+
+def test_rolled_back_job_is_discarded(threaded_app):
+    with threaded_app.app_context():
+        jobs.enqueue('notify', user_ids=[1], message='never')
+        db.session.rollback()
+        assert Job.query.count() == 0
+
+def test_failed_job_is_retried(threaded_app):
+    _flaky_calls.clear()
+    with threaded_app.app_context():
+        job = jobs.enqueue('test_flaky', fail_times=1)
+        db.session.commit()
+        job_id = job.id
+    assert _wait_for(threaded_app, job_id) == 'done'
+    with threaded_app.app_context():
+        job = db.session.get(Job, job_id)
+        assert job.attempts == 2
+
+def test_job_fails_after_max_attempts(threaded_app):
+    _flaky_calls.clear()
+    with threaded_app.app_context():
+        job = jobs.enqueue('test_flaky', fail_times=10)
+        db.session.commit()
+        job_id = job.id
+    assert _wait_for(threaded_app, job_id) == 'failed'
+    with threaded_app.app_context():
+        job = db.session.get(Job, job_id)
+        assert job.attempts == threaded_app.config['JOBS_MAX_ATTEMPTS']
+        assert 'boom' in job.error
+
+def test_comment_notifies_participants(test_client, auth_headers, init_database):
+    admin = User.query.filter_by(email='admin@example.com').first()
+    user = User.query.filter_by(email='user@example.com').first()
+    item = Item(title='T', type='task', status='todo', column_id=1, project_id=1, reporter_id=admin.id, assignee_id=user.id)
+    db.session.add(item)
+    db.session.commit()
+    response = test_client.post(f'/items/{item.id}/comments', headers=auth_headers, json={'content': 'hi'})
+    assert response.status_code == 201
+    assert Notification.query.filter_by(user_id=user.id).count() == 1
+    assert Notification.query.filter_by(user_id=admin.id).count() == 0
+    assert Job.query.filter_by(kind='comment_notify', status='done').count() == 1
+
+def test_prune_deletes_only_old_finished_jobs(test_client, init_database):
+    old = datetime.utcnow() - timedelta(days=current_app.config['JOBS_RETENTION_DAYS'] + 1)
+    db.session.add_all([
+        Job(kind='notify', status='done', finished_at=old),
+        Job(kind='notify', status='failed', finished_at=old),
+        Job(kind='notify', status='done', finished_at=datetime.utcnow()),
+        Job(kind='notify', status='pending', created_at=old),
+    ])
+    db.session.commit()
+    result = current_app.test_cli_runner().invoke(args=['jobs', 'prune'])
+    assert 'Pruned 2 jobs.' in result.output
+    assert sorted(j.status for j in Job.query) == ['done', 'pending']
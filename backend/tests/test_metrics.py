@@ -0,0 +1,55 @@
+import re
+import threading
+from flask import current_app
+from services.metrics import Histogram, registry
+
+def _sample(text, name, **labels):
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        metric, _, value = line.rpartition(' ')
+        if metric.split('{')[0] != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', metric))
+        if all(found.get(k) == str(v) for k, v in labels.items()):
+            return float(value)
+    return 0.0
+
+def test_metrics_records_request_latency_by_blueprint(test_client, auth_headers):
+    before = test_client.get('/metrics').get_data(as_text=True)
+    test_client.get('/me', headers=auth_headers)
+    response = test_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain')
+    text = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    labels = {'blueprint': 'auth', 'endpoint': 'auth.me', 'method': 'GET'}
+    count = _sample(text, 'http_request_duration_seconds_count', **labels)
+    assert count == _sample(before, 'http_request_duration_seconds_count', **labels) + 1
+    assert _sample(text, 'http_request_duration_seconds_bucket', le='+Inf', **labels) == count
+    assert _sample(text, 'http_requests_total', status=200, **labels) >= 1
+    # Only the /metrics request itself is in flight while rendering.
+    assert _sample(text, 'http_requests_in_flight', blueprint='metrics') == 1
+
+def test_metrics_token(test_client):
+    current_app.config['METRICS_TOKEN'] = 'scrape-secret'
+    assert test_client.get('/metrics').status_code == 401
+    response = test_client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+
+def test_histogram_is_thread_safe():
+    histogram = registry.histogram('test_thread_safety_seconds', 'test', ('worker',), buckets=(0.5, 1.0))
+
+    def observe():
+        for i in range(1000):
+            histogram.labels('shared').observe(i % 3 * 0.5)
+
+    threads = [threading.Thread(target=observe) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    text = registry.expose()
+    assert 'test_thread_safety_seconds_count{worker="shared"} 8000' in text
+    assert 'test_thread_safety_seconds_bucket{worker="shared",le="0.5"} 5336' in text
+    assert isinstance(histogram, Histogram)
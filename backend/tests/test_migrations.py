@@ -0,0 +1,57 @@
+import os
+from flask_migrate import Migrate, downgrade, upgrade
+from sqlalchemy import text
+from app import create_app
+from models.db import db
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+OLD_ROWS = [
+    "INSERT INTO role (id, name, scope) VALUES (1, 'Firm Admin', 'firm'), (2, 'Auditor', 'firm'), (3, 'Team Member', 'team')",
+    "INSERT INTO permission (id, action) VALUES (1, 'create_team'), (2, 'view_tasks'), (3, 'edit_any_task')",
+    "INSERT INTO role_permissions (role_id, permission_id) VALUES (1, 1), (1, 2), (1, 3), (2, 2)",
+    "INSERT INTO user (id, username, email, password_hash) VALUES (1, 'admin', 'admin@example.com', 'x'),"
+    " (2, 'audit', 'audit@example.com', 'x'), (3, 'dev', 'dev@example.com', 'x')",
+    "INSERT INTO team (id, name, manager_id) VALUES (1, 'Ops', 2)",
+    "INSERT INTO team_member (team_id, user_id, role_id) VALUES (1, 2, 2), (1, 3, 3)",
+    "INSERT INTO project (id, name, owner_id) VALUES (1, 'Legacy', 1)",
+    "INSERT INTO board_column (id, name, project_id, \"order\") VALUES (1, 'Done', 1, 1), (2, 'To Do', 1, 0)",
+    "INSERT INTO item (id, title, type, status, column_id, project_id, reporter_id)"
+    " VALUES (1, 'a', 'task', 'todo', 2, 1, 1), (2, 'b', 'task', 'todo', 2, 1, 1), (3, 'c', 'task', 'done', 1, 1, 1)",
+]
+
+def test_upgrade_adds_and_backfills_new_columns(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'legacy.db'}",
+        'SECRET_KEY': 'test-secret-key',
+        'JWT_SECRET_KEY': 'test-jwt-key',
+    })
+    Migrate(app, db, directory=MIGRATIONS)
+    with app.app_context():
+        # Fresh databases already have every column, so upgrading changes nothing.
+        upgrade(directory=MIGRATIONS)
+        # Downgrading leaves the schema the columns were added to.
+        downgrade(directory=MIGRATIONS, revision='base')
+        with db.engine.begin() as conn:
+            for statement in OLD_ROWS:
+                conn.execute(text(statement))
+        upgrade(directory=MIGRATIONS)
+
+        with db.engine.connect() as conn:
+            firm_roles = dict(conn.execute(text('SELECT email, firm_role_id FROM user')).all())
+            masks = dict(conn.execute(text('SELECT name, permission_mask FROM role')).all())
+            bits = [bit for (bit,) in conn.execute(text('SELECT bit FROM permission ORDER BY id'))]
+            cards = [row_id for (row_id,) in conn.execute(text('SELECT id FROM item WHERE column_id = 2 ORDER BY rank'))]
+            columns = [row_id for (row_id,) in conn.execute(text('SELECT id FROM board_column ORDER BY rank'))]
+            versions = {version for (version,) in conn.execute(text('SELECT version FROM item'))}
+            archived = {flag for (flag,) in conn.execute(text('SELECT archived FROM project UNION SELECT archived FROM item'))}
+            project_indexes = {name for (name,) in conn.execute(text("SELECT name FROM sqlite_master WHERE tbl_name = 'project'"))}
+        db.session.remove()
+        db.drop_all()
+    assert firm_roles == {'admin@example.com': 1, 'audit@example.com': 2, 'dev@example.com': None}
+    assert bits == [0, 1, 2]
+    assert masks == {'Firm Admin': 0b111, 'Auditor': 0b010, 'Team Member': 0}
+    assert cards == [1, 2] and columns == [2, 1]
+    assert versions == {1} and archived == {0}
+    assert {'ix_project_owner_team', 'ix_project_archived'} <= project_indexes
@@ -0,0 +1,59 @@
+import time
+from flask import current_app
+from models.db import db
+from models.notification import Notification
+from models.role import Role
+from models.user import User
+
+def _queries(response):
+    return int(response.headers['Server-Timing'].split('desc="')[1].split(' ')[0])
+
+def test_principal_is_cached_per_token(test_client, auth_headers):
+    first = test_client.get('/me', headers=auth_headers)
+    assert first.status_code == 200
+    assert first.json['email'] == 'admin@example.com'
+    second = test_client.get('/me', headers=auth_headers)
+    assert second.json == first.json
+    assert _queries(second) == 0
+
+def test_admin_check_uses_principal(test_client, auth_headers, user_auth_headers):
+    test_client.get('/me', headers=auth_headers)
+    response = test_client.get('/users/all', headers=auth_headers)
+    assert response.status_code == 200
+    assert _queries(response) == 1  # only the user listing itself
+    assert test_client.get('/users/all', headers=user_auth_headers).status_code == 403
+
+def test_deleted_user_token_is_revoked(test_client, auth_headers, user_auth_headers):
+    assert test_client.get('/me', headers=user_auth_headers).status_code == 200
+    user = User.query.filter_by(email='user@example.com').first()
+    assert test_client.delete(f'/users/{user.id}', headers=auth_headers).status_code == 200
+    response = test_client.get('/me', headers=user_auth_headers)
+    assert response.status_code == 401
+    assert test_client.get('/projects', headers=user_auth_headers).status_code == 401
+
+def test_revocation_only_rejects_earlier_tokens(test_client, init_database):
+    principals = current_app.extensions['principals']
+    principals.revoke_user(42, keep_seconds=60)
+    now = time.time()
+    assert principals.is_revoked(42, int(now) - 1)
+    assert not principals.is_revoked(42, int(now) + 1)
+    assert not principals.is_revoked(43, int(now) - 1)
+
+def test_admin_comes_from_firm_role(test_client, init_database, auth_headers, user_auth_headers):
+    assert test_client.get('/users/all', headers=user_auth_headers).status_code == 403
+    result = current_app.test_cli_runner().invoke(args=['admins', 'grant', 'user@example.com'])
+    assert result.exit_code == 0, result.output
+    # A fresh token is not in the principal cache yet.
+    token = test_client.post('/login', json={'email': 'user@example.com', 'password': 'password'}).json['token']
+    response = test_client.get('/users/all', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert test_client.get('/me/firm-permissions', headers={'Authorization': f'Bearer {token}'}).json['roles'] == ['Firm Admin']
+
+def test_manager_request_notifies_every_admin(test_client, init_database, auth_headers, user_auth_headers):
+    admin_role = Role.query.filter_by(name='Firm Admin').first()
+    second = User(username='admin2', email='ops@example.com', password_hash='x', firm_role_id=admin_role.id)
+    db.session.add(second)
+    db.session.commit()
+    team_id = test_client.post('/teams', headers=auth_headers, json={'name': 'T'}).json['team']['id']
+    assert test_client.post(f'/teams/{team_id}/manager-request', headers=user_auth_headers).status_code == 200
+    assert Notification.query.filter_by(user_id=second.id).count() == 1
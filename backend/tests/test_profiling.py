@@ -0,0 +1,60 @@
+import pstats
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from models.db import db
+from models.role import Role
+from models.user import User
+
+@pytest.fixture
+def profiled(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SECRET_KEY': 'test-secret-key',
+        'JWT_SECRET_KEY': 'test-jwt-key',
+        'JOBS_ALWAYS_EAGER': True,
+        'PROFILE_ENABLED': True,
+        'PROFILE_THRESHOLD_MS': 0,
+        'PROFILE_DIR': str(tmp_path),
+        'PROFILE_KEEP': 2,
+    })
+    with app.app_context():
+        role = Role(name='Firm Admin', scope='firm')
+        db.session.add(role)
+        db.session.flush()
+        admin = User(username='admin', email='admin@example.com', password_hash='x', firm_role_id=role.id)
+        user = User(username='user', email='user@example.com', password_hash='x')
+        db.session.add_all([admin, user])
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        user_headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+        yield app.test_client(), headers, user_headers, tmp_path
+        db.drop_all()
+
+def test_slow_requests_are_profiled_and_rotated(profiled):
+    client, headers, _, directory = profiled
+    for _ in range(3):
+        assert client.get('/me', headers=headers).status_code == 200
+    assert len(list(directory.glob('*.prof'))) == 2
+    assert len(list(directory.glob('*.json'))) == 2
+
+def test_admin_can_list_and_download_profiles(profiled):
+    client, headers, user_headers, directory = profiled
+    client.get('/me', headers=headers)
+    assert client.get('/admin/profiles', headers=user_headers).status_code == 403
+    response = client.get('/admin/profiles', headers=headers)
+    assert response.status_code == 200
+    profile = next(p for p in response.json['profiles'] if p['endpoint'] == 'auth.me')
+    assert profile['method'] == 'GET' and profile['reason'] == 'slow' and profile['status'] == 200
+    download = client.get(f"/admin/profiles/{profile['id']}", headers=headers)
+    assert download.status_code == 200
+    saved = directory / 'download.prof'
+    saved.write_bytes(download.data)
+    assert pstats.Stats(str(saved)).total_calls > 0
+    assert client.get('/admin/profiles/missing', headers=headers).status_code == 404
+
+def test_profiling_disabled_by_default(test_client, auth_headers):
+    response = test_client.get('/admin/profiles', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['enabled'] is False
@@ -1,6 +1,11 @@
 import pytest
+from models.db import db
+from models.item import Item
 from models.project import Project
+from models.project_member import ProjectMember
+from models.role import Role
 from models.team import Team
+from models.user import User
 
 def test_create_project_success(test_client, auth_headers, init_database):
     # Create valid team first
@@ -46,3 +51,32 @@ def test_update_project(test_client, auth_headers, init_database):
     })
     assert response.status_code == 200
     assert Project.query.get(project.id).name == 'New Name'
+
+def test_get_projects_pages_with_cursor(test_client, auth_headers, user_auth_headers, init_database):
+    user = User.query.filter_by(email='user@example.com').first()
+    visitor = Role.query.filter_by(name='Project Visitor').first()
+    projects = [Project(name=f'Visited {n}', owner_id=user.id) for n in range(2000)]
+    db.session.add_all(projects)
+    db.session.flush()
+    db.session.add_all(ProjectMember(project_id=p.id, user_id=user.id, role_id=visitor.id) for p in projects)
+    db.session.add(Item(title='Done', type='task', status='done', column_id=0, project_id=projects[0].id, reporter_id=user.id))
+    db.session.commit()
+
+    everything = test_client.get('/projects', headers=user_auth_headers).json['projects']
+    assert len(everything) == 2000
+    assert everything[0]['role'] == 'Project Visitor'
+
+    seen, cursor = [], None
+    while True:
+        url = '/projects?limit=700&progress=1' + (f'&cursor={cursor}' if cursor else '')
+        response = test_client.get(url, headers=user_auth_headers)
+        assert response.status_code == 200
+        seen.extend(response.json['projects'])
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            break
+    assert [p['id'] for p in seen] == [p['id'] for p in everything]
+    assert seen[0]['progress'] == {'total': 1, 'completed': 1, 'in_progress': 0, 'todo': 0}
+    assert seen[1]['progress']['total'] == 0
+    assert test_client.get('/projects?limit=0', headers=user_auth_headers).status_code == 400
+    assert test_client.get('/projects?cursor=abc', headers=user_auth_headers).status_code == 400
@@ -0,0 +1,73 @@
+import random
+from models.db import db
+from models.board_column import BoardColumn
+from models.item import Item
+from models.project import Project
+from models.team import Team
+from services.ranking import rank_after, rank_before, rank_between, rebalance, spread
+
+def _queries(response):
+    return int(response.headers['Server-Timing'].split('desc="')[1].split(' ')[0])
+
+def test_rank_between_orders_any_insertion_sequence():
+    rng = random.Random(7)
+    ranks = [rank_between()]
+    for _ in range(500):
+        at = rng.randrange(len(ranks) + 1)
+        low = ranks[at - 1] if at else None
+        high = ranks[at] if at < len(ranks) else None
+        rank = rank_between(low, high) if low and high else rank_after(low) if low else rank_before(high)
+        assert (low is None or low < rank) and (high is None or rank < high) and not rank.endswith('0')
+        ranks.insert(at, rank)
+    assert len(set(ranks)) == len(ranks)
+    assert spread(1000) == sorted(set(spread(1000))) and max(len(r) for r in spread(1000)) <= 4
+
+def _board(test_client, auth_headers):
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Rank Team', 'description': 'desc'})
+    team = Team.query.filter_by(name='Rank Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': 'Rank Project', 'owner_team_id': team.id})
+    project = Project.query.filter_by(name='Rank Project').first()
+    columns = test_client.get(f'/projects/{project.id}/columns', headers=auth_headers).json['columns']
+    return project, [c['id'] for c in columns]
+
+def test_move_item_writes_one_row(test_client, auth_headers, init_database):
+    project, columns = _board(test_client, auth_headers)
+    ids = [test_client.post(f'/items/projects/{project.id}/items', headers=auth_headers,
+                            json={'title': f'Card {n}', 'column_id': columns[0]}).json['item']['id'] for n in range(3)]
+
+    def order(column_id):
+        response = test_client.get(f'/items/projects/{project.id}/items?column_id={column_id}', headers=auth_headers)
+        return [i['id'] for i in response.json['items']]
+
+    assert order(columns[0]) == ids
+    response = test_client.post(f'/items/{ids[2]}/move', headers=auth_headers, json={'before_id': ids[0]})
+    assert response.status_code == 200
+    assert order(columns[0]) == [ids[2], ids[0], ids[1]]
+    # Neighbour lookup and the card's own UPDATE, plus the auth and item reads.
+    assert _queries(response) <= 8
+
+    test_client.post(f'/items/{ids[0]}/move', headers=auth_headers, json={'column_id': columns[1]})
+    test_client.post(f'/items/{ids[1]}/move', headers=auth_headers, json={'column_id': columns[1], 'after_id': ids[0]})
+    assert order(columns[1]) == [ids[0], ids[1]]
+    assert test_client.post(f'/items/{ids[1]}/move', headers=auth_headers,
+                            json={'after_id': ids[2]}).status_code == 400  # ids[2] is in another column
+
+def test_move_column_and_rebalance(test_client, auth_headers, init_database):
+    project, columns = _board(test_client, auth_headers)
+    response = test_client.post(f'/columns/{columns[3]}/move', headers=auth_headers, json={'before_id': columns[0]})
+    assert response.status_code == 200
+    listed = test_client.get(f'/projects/{project.id}/columns', headers=auth_headers).json['columns']
+    assert [c['id'] for c in listed] == [columns[3]] + columns[:3]
+
+    cards = [Item(title=str(n), type='task', status='todo', column_id=columns[0], project_id=project.id, reporter_id=1)
+             for n in range(4)]
+    db.session.add_all(cards)
+    db.session.commit()
+    db.session.execute(Item.__table__.update().where(Item.id == cards[1].id).values(rank=None))
+    assert rebalance(column_id=columns[0]) == 4
+    assert rebalance(project_id=project.id) == 4
+    db.session.commit()
+    ranked = Item.query.filter_by(column_id=columns[0]).order_by(Item.rank).all()
+    assert [i.id for i in ranked] == [cards[0].id, cards[2].id, cards[3].id, cards[1].id]
+    assert all(i.version == 2 for i in ranked)
+    assert BoardColumn.query.filter_by(project_id=project.id).order_by(BoardColumn.rank).first().id == columns[3]
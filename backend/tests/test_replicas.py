@@ -0,0 +1,47 @@
+import shutil
+import pytest
+from flask import current_app
+from models.db import db
+from models.notification import Notification
+from models.team import Team
+from models.user import User
+from services.replicas import read_only, replicas
+
+@pytest.fixture
+def app_config(app_config, tmp_path):
+    # Two SQLite files stand in for the primary and a replica; _replicate() copies one onto the other.
+    return {**app_config, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}',
+            'SQLALCHEMY_REPLICA_URIS': [f'sqlite:///{tmp_path / "replica.db"}']}
+
+def _replicate(tmp_path):
+    db.session.remove()
+    for engine in [*db.engines.values(), *current_app.extensions['db_replicas']]:
+        engine.dispose()
+    shutil.copyfile(tmp_path / 'primary.db', tmp_path / 'replica.db')
+
+def test_reads_use_the_replica_until_the_client_writes(test_client, auth_headers, init_database, tmp_path):
+    _replicate(tmp_path)
+    admin = User.query.filter_by(email='admin@example.com').first()
+    db.session.add(Notification(user_id=admin.id, message='Not replicated yet'))
+    db.session.commit()
+
+    def messages():
+        return [n['message'] for n in test_client.get('/notifications', headers=auth_headers).json]
+
+    assert messages() == []
+    assert list(db.metadatas) == [None]  # replicas are not binds
+    response = test_client.post('/teams', headers=auth_headers, json={'name': 'Written', 'description': 'desc'})
+    assert response.status_code == 201 and Team.query.filter_by(name='Written').count() == 1
+    # The write makes this client's reads go to the primary for a while.
+    assert messages() == ['Not replicated yet']
+    replicas.sticky.clear()
+    assert messages() == []
+
+def test_post_marked_read_only_uses_the_replica(test_client, tmp_path):
+    def count_users():
+        return {'users': User.query.count()}
+    test_client.application.add_url_rule('/probe', 'probe', read_only(count_users), methods=['POST'])
+    _replicate(tmp_path)
+    db.session.add(User(username='late', email='late@example.com', password_hash='x'))
+    db.session.commit()
+    assert test_client.post('/probe').json == {'users': 0}
@@ -0,0 +1,60 @@
+from controllers.report_controller import project_data_version
+from models.db import db
+from models.item import Item
+from models.job import Job
+from models.project import Project
+from models.report_artifact import ReportArtifact
+from models.team import Team
+from models.user import User
+
+def _create_project(test_client, auth_headers):
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Report Team', 'description': 'desc'})
+    team = Team.query.filter_by(name='Report Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': 'Report Project', 'description': 'desc', 'owner_team_id': team.id})
+    return Project.query.filter_by(name='Report Project').first()
+
+def test_report_job_returns_json_artifact(test_client, auth_headers, init_database):
+    project = _create_project(test_client, auth_headers)
+    response = test_client.post(f'/reports/project/{project.id}/jobs', headers=auth_headers, json={'format': 'json'})
+    assert response.status_code == 202
+    job_id = response.json['job']['id']
+
+    result = test_client.get(f'/reports/jobs/{job_id}', headers=auth_headers)
+    assert result.status_code == 200
+    assert result.json['report']['project']['name'] == 'Report Project'
+    assert result.headers['ETag']
+
+    cached = test_client.get(f'/reports/jobs/{job_id}', headers={**auth_headers, 'If-None-Match': result.headers['ETag']})
+    assert cached.status_code == 304
+
+def test_report_artifact_reused_until_data_changes(test_client, auth_headers, init_database):
+    project = _create_project(test_client, auth_headers)
+    test_client.post(f'/reports/project/{project.id}/jobs', headers=auth_headers, json={'format': 'csv'})
+    test_client.post(f'/reports/project/{project.id}/jobs', headers=auth_headers, json={'format': 'csv'})
+    assert Job.query.filter_by(kind='project_report').count() == 2
+    assert ReportArtifact.query.count() == 1
+    first = ReportArtifact.query.first().digest
+
+    db.session.add(Item(title='New task', type='task', status='todo', column_id=1, project_id=project.id, reporter_id=1))
+    db.session.commit()
+    response = test_client.post(f'/reports/project/{project.id}/jobs', headers=auth_headers, json={'format': 'csv'})
+    result = test_client.get(f"/reports/jobs/{response.json['job']['id']}", headers=auth_headers)
+    assert result.status_code == 200
+    assert result.headers['Content-Type'].startswith('text/csv')
+    assert 'New task' in result.get_data(as_text=True)
+    assert ReportArtifact.query.count() == 1
+    assert ReportArtifact.query.first().digest != first
+
+def test_report_job_forbidden_for_non_member(test_client, auth_headers, user_auth_headers, init_database):
+    project = _create_project(test_client, auth_headers)
+    response = test_client.post(f'/reports/project/{project.id}/jobs', headers=auth_headers)
+    job_id = response.json['job']['id']
+    assert test_client.get(f'/reports/jobs/{job_id}', headers=user_auth_headers).status_code == 403
+
+def test_data_version_changes_when_a_member_changes(test_client, auth_headers, init_database):
+    project = _create_project(test_client, auth_headers)
+    version = project_data_version(project.id)
+    member = User.query.filter_by(email='admin@example.com').first()
+    member.username = 'renamed-admin'
+    db.session.commit()
+    assert project_data_version(project.id) != version
@@ -0,0 +1,96 @@
+from flask import current_app
+from models.db import db
+from models.permission import Permission
+from models.role import Role
+from models.team import Team
+from models.user import User
+from services.roles import role_catalog
+
+def _queries(response):
+    return int(response.headers['Server-Timing'].split('desc="')[1].split(' ')[0])
+
+def test_catalog_serves_role_lookups(test_client, auth_headers):
+    owner = role_catalog.find('Project Owner', 'project')
+    assert owner.id == Role.query.filter_by(name='Project Owner', scope='project').first().id
+    assert role_catalog.get(owner.id) is owner
+    assert role_catalog.find('Project Owner', 'team') is None
+    assert 'create_team' in role_catalog.permissions(role_catalog.id_of('Firm Admin', 'firm'))
+    assert role_catalog.permissions(None) == frozenset()
+    test_client.get('/me', headers=auth_headers)
+    response = test_client.get('/me/firm-permissions', headers=auth_headers)
+    assert 'create_team' in response.json['permissions']
+    assert _queries(response) == 0
+
+def test_catalog_refreshes_after_role_changes(test_client, init_database):
+    role = Role.query.filter_by(name='Team Member', scope='team').first()
+    assert not role_catalog.grants(role.id, 'view_tasks')
+    role.permissions.append(Permission.query.filter_by(action='view_tasks').first())
+    db.session.add(Role(name='Team Lead', scope='team'))
+    db.session.flush()
+    db.session.rollback()
+    assert not role_catalog.grants(role.id, 'view_tasks')
+    assert role_catalog.find('Team Lead', 'team') is None
+
+    role = Role.query.filter_by(name='Team Member', scope='team').first()
+    role.permissions.append(Permission.query.filter_by(action='view_tasks').first())
+    db.session.add(Role(name='Team Lead', scope='team'))
+    db.session.commit()
+    assert role_catalog.grants(role.id, 'view_tasks')
+    assert [r.name for r in role_catalog.in_scope('team')] == ['Team Manager', 'Team Member', 'Team Lead']
+
+def test_permission_masks_follow_role_permissions(test_client, init_database):
+    permissions = {p.action: p for p in Permission.query.all()}
+    assert sorted(p.bit for p in permissions.values()) == list(range(len(permissions)))
+    admin = Role.query.filter_by(name='Firm Admin').first()
+    assert admin.permission_mask == sum(1 << p.bit for p in permissions.values())
+    visitor = Role.query.filter_by(name='Project Visitor').first()
+    visitor.permissions = [permissions['view_project'], permissions['view_tasks']]
+    db.session.commit()
+    assert visitor.permission_mask == (1 << permissions['view_project'].bit) | (1 << permissions['view_tasks'].bit)
+    assert role_catalog.permissions(visitor.id) == {'view_project', 'view_tasks'}
+    assert not role_catalog.grants(visitor.id, 'create_task')
+    assert not role_catalog.grants(visitor.id, 'no_such_permission')
+
+    new = Permission(action='archive_project')
+    visitor.permissions.append(new)
+    db.session.commit()
+    assert new.bit == len(permissions)
+    assert role_catalog.grants(visitor.id, 'archive_project')
+
+    # Masks written behind the ORM's back are rebuilt by `flask roles sync-masks`.
+    Role.query.update({Role.permission_mask: 0})
+    db.session.commit()
+    result = current_app.test_cli_runner().invoke(args=['roles', 'sync-masks'])
+    assert result.exit_code == 0, result.output
+    assert role_catalog.permissions(visitor.id) == {'view_project', 'view_tasks', 'archive_project'}
+
+def test_permission_bits_are_never_reused(test_client, init_database):
+    top = Permission.query.order_by(Permission.bit.desc()).first()
+    bit = top.bit
+    db.session.delete(top)
+    db.session.commit()
+    new = Permission(action='merge_projects')
+    db.session.add(new)
+    db.session.commit()
+    assert new.bit == bit + 1
+
+def test_projects_filtered_by_permission_in_sql(test_client, init_database, auth_headers, user_auth_headers):
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Perm Team', 'description': 'Test'})
+    team = Team.query.filter_by(name='Perm Team').first()
+    for name in ('Visible', 'Writable'):
+        test_client.post('/projects', headers=auth_headers, json={'name': name, 'owner_team_id': team.id})
+    user = User.query.filter_by(email='user@example.com').first()
+    contributor = Role.query.filter_by(name='Project Contributor').first()
+    contributor.permissions = [Permission.query.filter_by(action='create_task').first()]
+    db.session.commit()
+    projects = {p['name']: p['id'] for p in test_client.get('/projects', headers=auth_headers).json['projects']}
+    for project_id in projects.values():
+        test_client.post(f'/admin/users/{user.id}/projects/{project_id}', headers=auth_headers)
+    visitor = Role.query.filter_by(name='Project Visitor').first()
+    test_client.patch(f"/admin/users/{user.id}/projects/{projects['Visible']}/role", headers=auth_headers,
+                      json={'role_id': visitor.id})
+
+    names = lambda r: sorted(p['name'] for p in r.json['projects'])
+    assert names(test_client.get('/projects', headers=user_auth_headers)) == ['Visible', 'Writable']
+    assert names(test_client.get('/projects?permission=create_task', headers=user_auth_headers)) == ['Writable']
+    assert names(test_client.get('/projects?permission=bogus', headers=user_auth_headers)) == []
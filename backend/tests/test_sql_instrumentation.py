@@ -0,0 +1,47 @@
+import pytest
+from flask import current_app
+from models.db import db
+from models.team import Team
+from models.team_member import TeamMember
+from models.user import User
+from services.sql_instrumentation import QueryBudgetExceeded
+
+def test_server_timing_header(test_client, auth_headers):
+    response = test_client.get('/me', headers=auth_headers)
+    assert response.status_code == 200
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('db;dur=')
+    assert 'queries"' in timing and 'app;dur=' in timing
+
+def test_get_team_query_count_independent_of_members(test_client, auth_headers, init_database):
+    team = Team(name='Big', manager_id=1)
+    db.session.add(team)
+    db.session.flush()
+    users = [User(username=f'm{i}', email=f'm{i}@example.com', password_hash='x') for i in range(10)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([TeamMember(team_id=team.id, user_id=u.id, role_id=3) for u in users])
+    db.session.commit()
+    team_id = team.id
+    db.session.expunge_all()
+    response = test_client.get(f'/teams/{team_id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json['members']) == 10
+    stats = current_app.extensions['sql_stats'].snapshot()['teams.get_team']
+    assert stats['max_queries'] <= 3
+
+def test_query_budget_exceeded_fails(test_client, auth_headers):
+    current_app.config['SQL_QUERY_BUDGETS'] = {'auth.me': 0}
+    with pytest.raises(QueryBudgetExceeded):
+        test_client.get('/me', headers=auth_headers)
+
+def test_query_metrics_admin_only(test_client, auth_headers, user_auth_headers):
+    test_client.get('/me', headers=auth_headers)
+    assert test_client.get('/metrics/queries', headers=user_auth_headers).status_code == 403
+    response = test_client.get('/metrics/queries', headers=auth_headers)
+    assert response.status_code == 200
+    me = response.json['endpoints']['auth.me']
+    assert me['requests'] >= 1
+    assert me['queries'] >= 1
+    assert me['slowest'][0]['statement'].upper().startswith('SELECT')
+    assert response.json['budgets']['teams.get_team'] == 3
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets are in milliseconds of cumulative import time as reported by
+# `python -X importtime`; override on slow CI machines via the environment.
+IMPORT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', 400))
+COLD_START_BUDGET_MS = float(os.environ.get('STARTUP_COLD_START_BUDGET_MS', 1000))
+
+def _importtime(code):
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Top-level imports have a single space of indentation.
+        if not name.startswith('  '):
+            total_us += int(cumulative)
+        modules[name.strip()] = int(cumulative)
+    return total_us / 1000.0, modules, proc.stdout
+
+def test_import_app_has_no_side_effects():
+    _, modules, stdout = _importtime(
+        "import sys, app; print(','.join(m for m in ('models', 'controllers', 'routes', 'flask_migrate') if any(k == m or k.startswith(m + '.') for k in sys.modules)))"
+    )
+    assert stdout.strip() == ''
+    assert 'app' in modules
+
+def test_import_app_within_budget():
+    _, modules, _ = _importtime('import app')
+    assert modules['app'] / 1000.0 < IMPORT_BUDGET_MS, f"import app took {modules['app'] / 1000.0:.1f}ms"
+
+def test_cold_start_within_budget():
+    total_ms, _, _ = _importtime(
+        "import app; app.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'SECRET_KEY': 'x', 'JWT_SECRET_KEY': 'x'})"
+    )
+    assert total_ms < COLD_START_BUDGET_MS, f'cold start imports took {total_ms:.1f}ms'
+
+def test_app_logs_without_a_logging_config():
+    # As under gunicorn or `flask run`: nothing configures the root logger before create_app().
+    code = ("import logging, app; app.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'JOBS_ALWAYS_EAGER': True}); "
+            "logging.getLogger('services.jobs').info('jobs ready')")
+    proc = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert 'INFO services.jobs jobs ready' in proc.stderr
@@ -1,7 +1,11 @@
 import pytest
+from models.db import db
+from models.project import Project
+from models.project_member import ProjectMember
+from models.role import Role
 from models.team import Team
 from models.team_member import TeamMember
-from models.role import Role
+from models.user import User
 
 def test_create_team_admin(test_client, auth_headers, init_database):
     response = test_client.post('/teams', headers=auth_headers, json={
@@ -76,3 +80,50 @@ def test_manager_request_flow(test_client, user_auth_headers, auth_headers, init
     # We can't query DB object inside test directly efficiently without refreshing session often, 
     # but the API response for get_team should show it.
     pass # Verified by logic flow assertion
+
+def _large_team(test_client, auth_headers, size):
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Big Team', 'description': 'Test'})
+    team = Team.query.filter_by(name='Big Team').first()
+    member_role = Role.query.filter_by(name='Team Member', scope='team').first()
+    users = [User(username=f'member{n}', email=f'member{n}@example.com', password_hash='x') for n in range(size)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all(TeamMember(team_id=team.id, user_id=u.id, role_id=member_role.id) for u in users)
+    db.session.commit()
+    return team.id, [u.id for u in users]
+
+def test_team_project_membership_is_set_based(test_client, auth_headers, init_database):
+    team_id, user_ids = _large_team(test_client, auth_headers, 300)
+    test_client.post('/teams', headers=auth_headers, json={'name': 'Owner Team', 'description': 'Test'})
+    owner_team = Team.query.filter_by(name='Owner Team').first()
+    test_client.post('/projects', headers=auth_headers, json={'name': 'Shared', 'owner_team_id': owner_team.id})
+    project_id = Project.query.filter_by(name='Shared').first().id
+    owner_role = Role.query.filter_by(name='Project Owner', scope='project').first()
+
+    response = test_client.post(f'/teams/{team_id}/projects', headers=auth_headers, json={
+        'project_id': project_id, 'roles': {'alice': 'Project Owner'}})
+    assert response.status_code == 400
+    response = test_client.post(f'/teams/{team_id}/projects', headers=auth_headers, json={
+        'project_id': project_id, 'roles': {str(user_ids[0]): 'Project Owner'}})
+    assert response.status_code == 200
+    assert ProjectMember.query.filter_by(project_id=project_id).count() == 301  # plus the admin, who manages both teams
+    assert ProjectMember.query.filter_by(project_id=project_id, user_id=user_ids[0]).first().role_id == owner_role.id
+    # Attaching again only adds what is missing.
+    assert test_client.post(f'/teams/{team_id}/projects', headers=auth_headers,
+                            json={'project_id': project_id}).status_code == 200
+    assert ProjectMember.query.filter_by(project_id=project_id).count() == 301
+
+    response = test_client.delete(f'/teams/{team_id}/projects/{project_id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert ProjectMember.query.filter_by(project_id=project_id).count() == 0
+
+def test_team_members_follow_owned_projects(test_client, auth_headers, init_database):
+    team_id, _ = _large_team(test_client, auth_headers, 3)
+    for name in ('P1', 'P2'):
+        test_client.post('/projects', headers=auth_headers, json={'name': name, 'owner_team_id': team_id})
+    user = User.query.filter_by(email='user@example.com').first()
+    assert test_client.post(f'/teams/{team_id}/members', headers=auth_headers,
+                            json={'email': 'user@example.com'}).status_code == 200
+    assert ProjectMember.query.filter_by(user_id=user.id).count() == 2
+    assert test_client.delete(f'/teams/{team_id}/members/{user.id}', headers=auth_headers).status_code == 200
+    assert ProjectMember.query.filter_by(user_id=user.id).count() == 0